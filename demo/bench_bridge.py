@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Kiro bridge burst benchmark - answer latency with warm Kiro workers.
+
+Builds a KiroIRCBridge whose Kiro worker pool runs demo/stub_kiro_worker.py,
+then pushes a burst of !ai commands from distinct users through the same
+path IRC messages take (_enqueue -> fair queue -> bridge workers ->
+_call_ai -> worker pool). Replies are captured instead of sent to IRC.
+Each request's time from enqueue to answer is reported, next to the time
+a single request takes on its own.
+
+Usage:
+    python demo/bench_bridge.py
+    python demo/bench_bridge.py --burst 24 --kiro-workers 4 --latency 0.2 --startup 2
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "demo"))
+
+from kiro_irc_bridge import KiroIRCBridge
+
+
+class CapturedIRC:
+    """Stands in for the IRC connection: records when each answer is sent."""
+
+    def __init__(self):
+        self.answered = {}  # nick -> monotonic time of the answer
+        self.arrived = asyncio.Event()
+
+    def msg(self, target: str, text: str):
+        if "stub answer" in text:
+            self.answered[target] = time.monotonic()
+            self.arrived.set()
+
+    def disconnect(self):
+        pass
+
+
+async def burst(bridge: KiroIRCBridge, irc: CapturedIRC, users: list) -> list:
+    """Enqueue one command per user at once; seconds until each was answered."""
+    irc.answered.clear()
+    started = time.monotonic()
+    for nick in users:
+        # DMs so the answer is addressed to the user and can be matched to the request
+        bridge._enqueue(nick, bridge.config["irc"]["nick"], f"{bridge.config['command_prefix']}check status", True)
+    while len(irc.answered) < len(users):
+        irc.arrived.clear()
+        await irc.arrived.wait()
+    return [irc.answered[nick] - started for nick in users]
+
+
+async def bench(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            "irc": {"host": "bench", "port": 0, "nick": "devops-ai", "channels": []},
+            "command_prefix": "!ai ",
+            "workers": args.bridge_workers,
+            "queue": {"max": args.burst + 10, "per_user": 3},
+            "backend": {"mcp_config": str(Path(tmp, "no-mcp.json"))},
+            "context": {"snapshot": str(Path(tmp, "context.json"))},
+            "kiro": {
+                "worker_command": [sys.executable, str(ROOT / "demo" / "stub_kiro_worker.py"),
+                                   "--startup", str(args.startup), "--latency", str(args.latency)],
+                "workers": args.kiro_workers,
+            },
+        }
+        bridge = KiroIRCBridge(config)
+        bridge.loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        await bridge.start()
+        print(f"Backend and {args.kiro_workers} Kiro workers ready in {time.monotonic() - started:.2f}s")
+        irc = CapturedIRC()
+        bridge.irc = irc
+        bridge._start_workers()
+        try:
+            single = (await burst(bridge, irc, ["solo"]))[0]
+            times = await burst(bridge, irc, [f"user{i}" for i in range(args.burst)])
+        finally:
+            for task in bridge._workers:
+                task.cancel()
+            await asyncio.gather(*bridge._workers, return_exceptions=True)
+            await bridge.close()
+
+    print(f"Single request:        {single * 1000:.0f} ms")
+    print(f"Burst of {args.burst}: all answered in {max(times):.2f}s, "
+          f"p50 {statistics.median(times) * 1000:.0f} ms, max {max(times) * 1000:.0f} ms")
+    waves = -(-args.burst // min(args.kiro_workers, args.bridge_workers))
+    print(f"Expected with warm workers: ~{waves} x {args.latency * 1000:.0f} ms "
+          f"(a cold start per request would add {args.startup:.1f}s to each)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=12, help="Commands sent at once (default 12)")
+    parser.add_argument("--kiro-workers", type=int, default=3, help="Warm Kiro workers (default 3)")
+    parser.add_argument("--bridge-workers", type=int, default=4, help="Bridge request workers (default 4)")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per stub answer (default 0.1)")
+    parser.add_argument("--startup", type=float, default=1.5, help="Stub agent start-up seconds (default 1.5)")
+    sys.exit(asyncio.run(bench(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark - time from `python` to the phosphor HomeScreen.
+
+Each run starts a fresh interpreter under `python -X importtime`, boots the
+app headless with Textual's run_test() and stops as soon as HomeScreen is
+the active screen. The parent reports the median wall time, the slowest
+imports, and fails (exit 1) when:
+
+- the median time-to-HomeScreen is over --budget, or
+- any lazily loaded subsystem (AI/Azure, wormhole, audio, requests,
+  dotenv) was imported by `src.ui.app` itself
+
+Usage:
+    python demo/bench_startup.py
+    python demo/bench_startup.py --runs 5 --budget 0.8 --top 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Must not be imported before first use (see Phosphor.subsystems)
+LAZY_MODULES = (
+    "src.core.mcp_client",
+    "src.core.devops_health_bot",
+    "src.core.azure_bot_client",
+    "src.azure_container_manager",
+    "src.core.wormhole",
+    "src.core.audio",
+    "requests",
+    "dotenv",
+)
+
+
+async def _child():
+    """Boot the app headless and report when HomeScreen is up."""
+    from src.ui.app import Phosphor
+    from src.ui.screens import HomeScreen
+
+    eager = [name for name in LAZY_MODULES if name in sys.modules]
+    app = Phosphor()
+    async with app.run_test(headless=True) as pilot:
+        while not isinstance(app.screen, HomeScreen):
+            await pilot.pause()
+        home_at = time.time()
+    print(json.dumps({"home_at": home_at, "eager": eager}))
+
+
+def _run_once(python: str) -> dict:
+    """One cold start; returns timing, eager imports and the importtime table."""
+    started = time.time()
+    proc = subprocess.run(
+        [python, "-X", "importtime", __file__, "--child"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["elapsed"] = result["home_at"] - started
+    result["imports"] = _parse_importtime(proc.stderr)
+    return result
+
+
+def _parse_importtime(stderr: str) -> dict:
+    """Map top-level module -> cumulative import time (seconds)."""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            cumulative_us = int(cumulative)
+        except ValueError:
+            continue  # Header line
+        if name.startswith("  "):
+            continue  # Nested import, already counted in its parent
+        imports[name.strip()] = max(imports.get(name.strip(), 0), cumulative_us / 1e6)
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure phosphor time-to-HomeScreen")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0, help="max median seconds to HomeScreen")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        import asyncio
+        sys.path.insert(0, str(ROOT))
+        asyncio.run(_child())
+        return
+
+    runs = [_run_once(sys.executable) for _ in range(args.runs)]
+    times = [run["elapsed"] for run in runs]
+    median = statistics.median(times)
+
+    print(f"time to HomeScreen: median {median * 1000:.0f}ms "
+          f"(runs: {', '.join(f'{t * 1000:.0f}ms' for t in times)}, budget {args.budget * 1000:.0f}ms)")
+    slowest = sorted(runs[-1]["imports"].items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+    print("slowest top-level imports (last run):")
+    for name, seconds in slowest:
+        print(f"  {seconds * 1000:8.1f}ms  {name}")
+
+    failures = []
+    if median > args.budget:
+        failures.append(f"median {median * 1000:.0f}ms is over the {args.budget * 1000:.0f}ms budget")
+    eager = sorted({name for run in runs for name in run["eager"]})
+    if eager:
+        failures.append(f"imported at startup instead of on first use: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
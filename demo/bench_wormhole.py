@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Wormhole transfer benchmark - throughput of concurrent sends and receives.
+
+Runs --pairs send/receive pairs at once through TransferManager and
+reports each transfer's throughput and the aggregate. By default the
+`wormhole` CLI is replaced by demo/fake_wormhole.py, a local stand-in
+for the mailbox and transit relay, so the numbers measure the manager
+and the loopback path. With --real the actual CLI is used; point it at
+a local mailbox server and transit relay, e.g.:
+
+    twist wormhole-mailbox --port=tcp:4000
+    twist transitrelay --port=tcp:4001
+    python demo/bench_wormhole.py --real --relay-url ws://127.0.0.1:4000/v1 \\
+        --transit-helper tcp:127.0.0.1:4001
+
+With --dcc the pairs go by DCC SEND instead, between two managers whose
+CTCP messages are passed to each other in-process in place of IRC.
+
+Usage:
+    python demo/bench_wormhole.py
+    python demo/bench_wormhole.py --size 500 --pairs 4
+    python demo/bench_wormhole.py --dcc
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.core.dcc import parse_ctcp
+from src.core.wormhole import TransferManager, format_bytes
+
+
+def dcc_pair():
+    """Sender and receiver managers with DCC requests delivered between them as CTCP text."""
+    offers = asyncio.Queue()
+    managers = {}
+
+    def link(own_nick):
+        def send_dcc(nick, request):
+            parsed = parse_ctcp(f"\x01{request.to_ctcp()}\x01")
+
+            def deliver():
+                code = managers[nick].handle_dcc(own_nick, parsed)
+                if code:
+                    offers.put_nowait(code)
+
+            asyncio.get_running_loop().call_soon(deliver)
+        return send_dcc
+
+    managers["sender"] = TransferManager(send_dcc=link("sender"), stream_host="127.0.0.1")
+    managers["receiver"] = TransferManager(send_dcc=link("receiver"))
+    return managers["sender"], managers["receiver"], offers
+
+
+async def start_dcc(files, targets):
+    sender, receiver, offers = dcc_pair()
+    sends, receives = [], []
+    for path in files:
+        sends.append(await sender.offer_dcc(str(path), "receiver"))
+        receives.append(await receiver.accept_dcc(await offers.get(), str(targets)))
+    return sends, receives
+
+
+async def bench(args) -> int:
+    command = ["wormhole"] if args.real else [sys.executable, str(ROOT / "demo" / "fake_wormhole.py")]
+    manager = TransferManager(command, relay_url=args.relay_url, transit_helper=args.transit_helper)
+    with tempfile.TemporaryDirectory() as tmp:
+        sources, targets = Path(tmp, "out"), Path(tmp, "in")
+        sources.mkdir()
+        targets.mkdir()
+        files = []
+        for i in range(args.pairs):
+            path = sources / f"payload-{i}.bin"
+            with open(path, "wb") as f:
+                for _ in range(args.size):
+                    f.write(os.urandom(1024 * 1024))
+            files.append(path)
+
+        started = time.monotonic()
+        if args.dcc:
+            sends, receives = await start_dcc(files, targets)
+        else:
+            sends = await asyncio.gather(*(manager.send(str(path)) for path in files))
+            receives = await asyncio.gather(*(manager.receive(send.code, str(targets)) for send in sends))
+        results = await asyncio.gather(*(t.wait() for t in sends + receives))
+        elapsed = time.monotonic() - started
+
+    for transfer in sends + receives:
+        print(f"  {transfer.summary()}")
+    total = args.size * args.pairs * 1024 * 1024
+    print(f"\n{args.pairs} x {args.size} MB in {elapsed:.2f}s: {format_bytes(total / elapsed)}/s aggregate")
+    return 0 if all(results) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100, help="MB per file (default 100)")
+    parser.add_argument("--pairs", type=int, default=2, help="Concurrent send/receive pairs (default 2)")
+    parser.add_argument("--real", action="store_true", help="Use the real wormhole CLI")
+    parser.add_argument("--dcc", action="store_true", help="Send by DCC over loopback instead of wormhole")
+    parser.add_argument("--relay-url", help="Mailbox server for --real")
+    parser.add_argument("--transit-helper", help="Transit relay for --real")
+    sys.exit(asyncio.run(bench(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
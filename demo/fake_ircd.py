@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Fake IRCd - a tiny local IRC server stand-in for exercising phosphor.
+
+Implements just enough of RFC 1459 and IRCv3 for the client's code paths:
+CAP negotiation (server-time, message-tags, batch, echo-message,
+multi-prefix, away-notify, draft/chathistory), JOIN/PART/QUIT/NICK/PRIVMSG,
+AWAY, NAMES, LIST (with ELIST mask/user-count filters) and CHATHISTORY
+LATEST/BEFORE/AFTER.
+
+It can also fill #test with phantom users and periodically split them off
+and rejoin them, to reproduce netsplit storms.
+
+Usage:
+    python demo/fake_ircd.py --port 6667 --seed 500
+    python demo/fake_ircd.py --crowd 300 --split-every 20
+    python demo/fake_ircd.py --listed 50000
+
+Then enter "localhost:6667" as a custom server on the phosphor home screen.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import itertools
+import time
+from datetime import datetime, timezone
+
+
+SERVER_NAME = "fake.ircd"
+CAPS = [
+    "server-time",
+    "message-tags",
+    "batch",
+    "echo-message",
+    "multi-prefix",
+    "away-notify",
+    "draft/chathistory",
+]
+HISTORY_MAX = 100
+
+
+def _iso(ts: float) -> str:
+    """Format a timestamp as an IRCv3 server-time value."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + \
+        f"{int(ts * 1000) % 1000:03d}Z"
+
+
+def _parse_line(line: str):
+    """Split a raw client line into (command, params)."""
+    if line.startswith("@"):
+        line = line.split(" ", 1)[1] if " " in line else ""
+    trailing = None
+    if " :" in line:
+        line, trailing = line.split(" :", 1)
+    parts = line.split()
+    if trailing is not None:
+        parts.append(trailing)
+    if not parts:
+        return "", []
+    return parts[0].upper(), parts[1:]
+
+
+class Client:
+    """One connected client."""
+
+    def __init__(self, server: "FakeIRCd", reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.nick = "*"
+        self.user = "user"
+        self.caps = set()
+        self.negotiating = False
+        self.registered = False
+        self.away = None
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.nick}!{self.user}@localhost"
+
+    def send(self, line: str, tags: dict = None):
+        """Send a line, attaching only the tags this client negotiated."""
+        if tags:
+            allowed = {}
+            for key, value in tags.items():
+                if key == "time" and "server-time" in self.caps:
+                    allowed[key] = value
+                elif key == "batch" and "batch" in self.caps:
+                    allowed[key] = value
+                elif key == "msgid" and "message-tags" in self.caps:
+                    allowed[key] = value
+            if allowed:
+                line = "@" + ";".join(f"{k}={v}" for k, v in allowed.items()) + " " + line
+        self.writer.write((line + "\r\n").encode("utf-8", "replace"))
+
+    def numeric(self, code: str, *params: str):
+        """Send a numeric reply."""
+        self.send(f":{SERVER_NAME} {code} {self.nick} " + " ".join(params))
+
+
+class FakeIRCd:
+    """In-memory IRC server."""
+
+    def __init__(self, seed: int = 0, crowd: int = 0, listed: int = 0):
+        self.clients = {}  # nick -> Client
+        self.channels = {}  # channel -> set of nicks (phantoms have no Client)
+        self.phantoms = [f"lurker{i}" for i in range(crowd)]
+        self.topics = {}  # channel -> topic
+        self.history = {}  # channel -> [{'msgid', 'ts', 'source', 'text'}]
+        self._ids = itertools.count(1)
+        if seed:
+            self._seed_history("#test", seed)
+        if crowd:
+            self.channels.setdefault("#test", set()).update(self.phantoms)
+        # Channels that only exist for LIST: name -> (users, topic)
+        self.listed = {
+            f"#chan-{i}": ((i * 7919) % 500 + 1, f"Fake channel number {i}")
+            for i in range(listed)
+        }
+
+    def _broadcast(self, nicks, line: str, tags: dict = None):
+        """Send a line to every real client among ``nicks``."""
+        for nick in nicks:
+            client = self.clients.get(nick)
+            if client:
+                client.send(line, tags)
+
+    async def simulate_splits(self, every: float, downtime: float = 5.0):
+        """Split the phantom users off and rejoin them, forever."""
+        servers = "hub.fake.ircd leaf.fake.ircd"
+        while True:
+            await asyncio.sleep(every)
+            members = self.channels.setdefault("#test", set())
+            watchers = [n for n in members if n in self.clients]
+            print(f"⚡ Splitting {len(self.phantoms)} phantom users")
+            for nick in self.phantoms:
+                members.discard(nick)
+                self._broadcast(watchers, f":{nick}!lurk@leaf QUIT :{servers}", {"time": _iso(time.time())})
+            await self._drain()
+            await asyncio.sleep(downtime)
+            watchers = [n for n in members if n in self.clients]
+            print(f"⚡ Rejoining {len(self.phantoms)} phantom users")
+            for nick in self.phantoms:
+                members.add(nick)
+                self._broadcast(watchers, f":{nick}!lurk@leaf JOIN #test", {"time": _iso(time.time())})
+            await self._drain()
+
+    async def _drain(self):
+        """Flush every client's write buffer."""
+        for client in list(self.clients.values()):
+            try:
+                await client.writer.drain()
+            except ConnectionError:
+                pass
+
+    def _seed_history(self, channel: str, count: int):
+        """Pre-fill a channel with backlog spaced one minute apart."""
+        now = time.time()
+        self.channels.setdefault(channel, set())
+        records = self.history.setdefault(channel, [])
+        for i in range(count):
+            records.append({
+                "msgid": f"m{next(self._ids)}",
+                "ts": now - (count - i) * 60,
+                "source": f"ghost{i % 7}!ghost@localhost",
+                "text": f"backlog message {i + 1} of {count}",
+            })
+
+    async def handle(self, reader, writer):
+        """Serve one connection until it closes."""
+        client = Client(self, reader, writer)
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                command, params = _parse_line(raw.decode("utf-8", "replace").rstrip("\r\n"))
+                handler = getattr(self, f"cmd_{command.lower()}", None)
+                if handler:
+                    handler(client, params)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._remove(client, "Connection closed")
+            writer.close()
+
+    def _remove(self, client: Client, reason: str):
+        """Drop a client from every channel and tell the others."""
+        if self.clients.get(client.nick) is not client:
+            return
+        del self.clients[client.nick]
+        notified = set()
+        for members in self.channels.values():
+            if client.nick in members:
+                members.discard(client.nick)
+                notified.update(members)
+        self._broadcast(notified, f":{client.prefix} QUIT :{reason}", {"time": _iso(time.time())})
+
+    def _try_register(self, client: Client):
+        """Complete registration once NICK/USER are in and CAP is done."""
+        if client.registered or client.negotiating or client.nick == "*" or not client.user:
+            return
+        client.registered = True
+        client.numeric("001", f":Welcome to the fake IRC network {client.nick}")
+        client.numeric("005", f"CHATHISTORY={HISTORY_MAX}", "ELIST=MU", "CHANTYPES=#",
+                       "PREFIX=(ov)@+", ":are supported by this server")
+        client.numeric("422", ":MOTD File is missing")
+
+    # -- registration ---------------------------------------------------
+
+    def cmd_cap(self, client: Client, params: list):
+        sub = params[0].upper() if params else ""
+        if sub == "LS":
+            client.negotiating = True
+            client.send(f":{SERVER_NAME} CAP {client.nick} LS :{' '.join(CAPS)}")
+        elif sub == "REQ" and len(params) > 1:
+            wanted = params[1].split()
+            if all(cap.lstrip("-") in CAPS for cap in wanted):
+                for cap in wanted:
+                    if cap.startswith("-"):
+                        client.caps.discard(cap[1:])
+                    else:
+                        client.caps.add(cap)
+                client.send(f":{SERVER_NAME} CAP {client.nick} ACK :{params[1]}")
+            else:
+                client.send(f":{SERVER_NAME} CAP {client.nick} NAK :{params[1]}")
+        elif sub == "END":
+            client.negotiating = False
+            self._try_register(client)
+
+    def cmd_nick(self, client: Client, params: list):
+        if not params:
+            return
+        new = params[0]
+        if new in self.clients:
+            client.numeric("433", new, ":Nickname is already in use")
+            return
+        old_prefix = client.prefix
+        renamed = self.clients.pop(client.nick, None) is client
+        if renamed:
+            for members in self.channels.values():
+                if client.nick in members:
+                    members.discard(client.nick)
+                    members.add(new)
+        client.nick = new
+        self.clients[new] = client
+        if renamed and client.registered:
+            self._broadcast(list(self.clients), f":{old_prefix} NICK :{new}")
+        self._try_register(client)
+
+    def cmd_user(self, client: Client, params: list):
+        if params:
+            client.user = params[0]
+        self._try_register(client)
+
+    def cmd_ping(self, client: Client, params: list):
+        client.send(f":{SERVER_NAME} PONG {SERVER_NAME} :{params[0] if params else ''}")
+
+    def cmd_quit(self, client: Client, params: list):
+        self._remove(client, params[0] if params else "Quit")
+        client.writer.close()
+
+    # -- channels ---------------------------------------------------------
+
+    def cmd_join(self, client: Client, params: list):
+        if not params:
+            return
+        for channel in params[0].split(","):
+            members = self.channels.setdefault(channel, set())
+            members.add(client.nick)
+            self._broadcast(members, f":{client.prefix} JOIN {channel}", {"time": _iso(time.time())})
+            self._send_names(client, channel)
+
+    def _send_names(self, client: Client, channel: str):
+        names = sorted(self.channels.get(channel, ()))
+        for i in range(0, len(names), 40):
+            client.numeric("353", "=", channel, ":" + " ".join(names[i:i + 40]))
+        client.numeric("366", channel, ":End of /NAMES list.")
+
+    def cmd_names(self, client: Client, params: list):
+        if params:
+            self._send_names(client, params[0])
+
+    def cmd_part(self, client: Client, params: list):
+        if not params or client.nick not in self.channels.get(params[0], ()):
+            return
+        channel = params[0]
+        self._broadcast(self.channels[channel], f":{client.prefix} PART {channel}", {"time": _iso(time.time())})
+        self.channels[channel].discard(client.nick)
+
+    def cmd_away(self, client: Client, params: list):
+        client.away = params[0] if params and params[0] else None
+        shared = set()
+        for members in self.channels.values():
+            if client.nick in members:
+                shared.update(members)
+        shared.discard(client.nick)
+        line = f":{client.prefix} AWAY" + (f" :{client.away}" if client.away else "")
+        self._broadcast([n for n in shared if n in self.clients and "away-notify" in self.clients[n].caps], line)
+
+    def cmd_privmsg(self, client: Client, params: list):
+        if len(params) < 2:
+            return
+        target, text = params[0], params[1]
+        ts = time.time()
+        msgid = f"m{next(self._ids)}"
+        tags = {"time": _iso(ts), "msgid": msgid}
+        line = f":{client.prefix} PRIVMSG {target} :{text}"
+        if target.startswith("#"):
+            self.history.setdefault(target, []).append(
+                {"msgid": msgid, "ts": ts, "source": client.prefix, "text": text})
+            recipients = [self.clients[n] for n in self.channels.get(target, ())
+                          if n != client.nick and n in self.clients]
+        else:
+            recipients = [self.clients[target]] if target in self.clients else []
+        for other in recipients:
+            other.send(line, tags)
+        if "echo-message" in client.caps:
+            client.send(line, tags)
+
+    def cmd_list(self, client: Client, params: list):
+        mask, min_users = "*", 0
+        for condition in (params[0].split(",") if params else []):
+            if condition.startswith(">") and condition[1:].isdigit():
+                min_users = int(condition[1:]) + 1
+            else:
+                mask = condition.lower()
+        entries = dict(self.listed)
+        for channel, members in self.channels.items():
+            entries[channel] = (len(members), self.topics.get(channel, ""))
+        client.numeric("321", "Channel", ":Users  Name")
+        for channel, (users, topic) in entries.items():
+            if users >= min_users and fnmatch.fnmatchcase(channel.lower(), mask):
+                client.numeric("322", channel, str(users), f":{topic}")
+        client.numeric("323", ":End of /LIST")
+
+    # -- CHATHISTORY -------------------------------------------------------
+
+    def cmd_chathistory(self, client: Client, params: list):
+        if len(params) < 4:
+            client.send(f"FAIL CHATHISTORY NEED_MORE_PARAMS :Missing parameters")
+            return
+        sub, channel, ref, limit = params[0].upper(), params[1], params[2], params[3]
+        records = self.history.get(channel, [])
+        limit = min(int(limit) if limit.isdigit() else HISTORY_MAX, HISTORY_MAX)
+
+        if sub == "LATEST":
+            page = records[-limit:]
+        elif sub in ("AFTER", "BEFORE"):
+            index = self._find(records, ref)
+            if index is None:
+                client.send(f"FAIL CHATHISTORY INVALID_MSGREFTYPE {channel} :Unknown message reference")
+                return
+            page = records[index + 1:index + 1 + limit] if sub == "AFTER" else records[max(0, index - limit):index]
+        else:
+            client.send(f"FAIL CHATHISTORY INVALID_PARAMS {sub} :Unsupported subcommand")
+            return
+
+        ref_id = f"b{next(self._ids)}"
+        client.send(f":{SERVER_NAME} BATCH +{ref_id} chathistory {channel}")
+        for record in page:
+            client.send(f":{record['source']} PRIVMSG {channel} :{record['text']}",
+                        {"batch": ref_id, "time": _iso(record["ts"]), "msgid": record["msgid"]})
+        client.send(f":{SERVER_NAME} BATCH -{ref_id}")
+
+    @staticmethod
+    def _find(records: list, ref: str):
+        """Resolve a msgid=/timestamp= reference to the index it points at."""
+        kind, _, value = ref.partition("=")
+        if kind == "msgid":
+            for i, record in enumerate(records):
+                if record["msgid"] == value:
+                    return i
+            return None
+        if kind == "timestamp":
+            try:
+                ts = datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                return None
+            # Index of the last record at or before the timestamp
+            index = -1
+            for i, record in enumerate(records):
+                if record["ts"] <= ts:
+                    index = i
+            return index
+        if ref == "*":
+            return len(records) - 1
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fake IRC server for local phosphor testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6667)
+    parser.add_argument("--seed", type=int, default=0, help="backlog messages to pre-fill #test with")
+    parser.add_argument("--crowd", type=int, default=0, help="phantom users to put in #test")
+    parser.add_argument("--split-every", type=float, default=0,
+                        help="seconds between simulated netsplits of the phantom users")
+    parser.add_argument("--listed", type=int, default=0, help="extra channels that only show up in LIST")
+    args = parser.parse_args()
+
+    ircd = FakeIRCd(seed=args.seed, crowd=args.crowd, listed=args.listed)
+    server = await asyncio.start_server(ircd.handle, args.host, args.port)
+    if args.crowd and args.split_every:
+        asyncio.create_task(ircd.simulate_splits(args.split_every))
+    print(f"🧪 Fake IRCd listening on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nStopped.")
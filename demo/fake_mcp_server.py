@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Fake MCP server - a stand-in for mcp-server-docker speaking MCP over stdio.
+
+Serves list_containers, inspect_container and get_container_stats for a
+handful of made-up containers. Requests are handled concurrently, so with
+--delay several in-flight tools/call requests overlap, which exercises the
+client's pipelining. --crash-after N exits after N tool calls to exercise
+restarts.
+
+Usage: point an MCP config at it, e.g. demo/fake_mcp.json:
+
+    {"mcpServers": {"docker": {"command": "python",
+                               "args": ["demo/fake_mcp_server.py", "--delay", "0.2"]}}}
+
+and set "mcp_config": "demo/fake_mcp.json" in .phosphor/config.json, then
+run /ai check docker.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+CONTAINERS = [
+    {"ID": "a1b2c3d4e5f6", "Names": "prod-web-1", "State": "running", "Status": "Up 3 hours",
+     "Labels": "env=prod,app=web", "health": "healthy", "restarts": 0, "cpu": 12.5, "mem": "180MiB"},
+    {"ID": "b2c3d4e5f6a1", "Names": "prod-api-1", "State": "running", "Status": "Up 3 hours",
+     "Labels": "env=prod,app=api", "health": "unhealthy", "restarts": 4, "cpu": 91.0, "mem": "1.2GiB"},
+    {"ID": "c3d4e5f6a1b2", "Names": "staging-db-1", "State": "exited", "Status": "Exited (1) 5 minutes ago",
+     "Labels": "env=staging,app=db", "health": None, "restarts": 7, "cpu": 0.0, "mem": "0B"},
+    {"ID": "d4e5f6a1b2c3", "Names": "dev-redis-1", "State": "running", "Status": "Up 2 days",
+     "Labels": "env=dev,app=redis", "health": "healthy", "restarts": 0, "cpu": 0.4, "mem": "12MiB"},
+]
+
+TOOLS = [
+    {"name": "list_containers", "description": "List containers",
+     "inputSchema": {"type": "object", "properties": {"all": {"type": "boolean"}}}},
+    {"name": "inspect_container", "description": "Inspect a container",
+     "inputSchema": {"type": "object", "properties": {"container_id": {"type": "string"}},
+                     "required": ["container_id"]}},
+    {"name": "get_container_stats", "description": "Resource usage of a container",
+     "inputSchema": {"type": "object", "properties": {"container_id": {"type": "string"}},
+                     "required": ["container_id"]}},
+]
+
+
+class FakeMCPServer:
+    def __init__(self, delay: float, crash_after: int):
+        self.delay = delay
+        self.crash_after = crash_after
+        self.calls = 0
+
+    def send(self, message: dict):
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+    def find(self, container_id: str) -> dict:
+        for container in CONTAINERS:
+            if container["ID"].startswith(container_id) or container["Names"] == container_id:
+                return container
+        raise KeyError(container_id)
+
+    async def call_tool(self, name: str, args: dict):
+        await asyncio.sleep(self.delay)
+        if name == "list_containers":
+            containers = CONTAINERS if args.get("all") else [c for c in CONTAINERS if c["State"] == "running"]
+            return [{k: c[k] for k in ("ID", "Names", "State", "Status", "Labels")} for c in containers]
+        container = self.find(args.get("container_id", ""))
+        if name == "inspect_container":
+            state = {"Status": container["State"], "RestartCount": container["restarts"],
+                     "StartedAt": "2024-01-01T00:00:00Z"}
+            if container["health"]:
+                state["Health"] = {"Status": container["health"]}
+            return {"Id": container["ID"], "Name": container["Names"], "State": state}
+        if name == "get_container_stats":
+            return {"cpu_percent": container["cpu"], "memory_usage": container["mem"]}
+        raise KeyError(name)
+
+    async def handle(self, message: dict):
+        method = message.get("method")
+        request_id = message.get("id")
+        if request_id is None:
+            return  # Notification
+        if method == "initialize":
+            result = {"protocolVersion": message["params"].get("protocolVersion", "2024-11-05"),
+                      "capabilities": {"tools": {"listChanged": True}},
+                      "serverInfo": {"name": "fake-mcp-docker", "version": "0.1"}}
+        elif method == "ping":
+            result = {}
+        elif method == "tools/list":
+            result = {"tools": TOOLS}
+        elif method == "tools/call":
+            params = message.get("params", {})
+            try:
+                data = await self.call_tool(params.get("name"), params.get("arguments") or {})
+                result = {"content": [{"type": "text", "text": json.dumps(data)}]}
+            except KeyError as e:
+                result = {"content": [{"type": "text", "text": f"not found: {e}"}], "isError": True}
+            self.calls += 1
+            if self.crash_after and self.calls >= self.crash_after:
+                self.send({"jsonrpc": "2.0", "id": request_id, "result": result})
+                os._exit(3)
+        else:
+            self.send({"jsonrpc": "2.0", "id": request_id,
+                       "error": {"code": -32601, "message": f"Method not found: {method}"}})
+            return
+        self.send({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            task = asyncio.create_task(self.handle(message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake MCP docker server for local phosphor testing")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds each tool call takes")
+    parser.add_argument("--crash-after", type=int, default=0, help="exit after this many tool calls")
+    args = parser.parse_args()
+    asyncio.run(FakeMCPServer(args.delay, args.crash_after).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the `wormhole` CLI, for benchmarking TransferManager locally.
+
+Prints the same lines and tqdm-style progress bar as `wormhole send` /
+`wormhole receive --accept-file`, but the "mailbox" is the code itself
+(7-<port>) and the "transit relay" is a direct loopback TCP stream, so
+transfers run at local speed without the public relay servers.
+
+Usage (as TransferManager's command):
+    python demo/fake_wormhole.py send <file>
+    python demo/fake_wormhole.py receive --accept-file <code>
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+
+CHUNK = 1024 * 1024
+
+
+def scaled(count: float) -> str:
+    for unit in ("", "k", "M", "G"):
+        if count < 1000 or unit == "G":
+            return f"{count:.2f}{unit}" if unit else f"{count:.0f}"
+        count /= 1000
+
+
+def progress(done: int, total: int, started: float):
+    elapsed = max(time.monotonic() - started, 1e-6)
+    percent = done * 100 // total if total else 100
+    sys.stderr.write(f"\r{percent:3d}%|{'█' * (percent // 10):<10}| {scaled(done)}B/{scaled(total)}B "
+                     f"[00:00<00:00, {scaled(done / elapsed)}B/s]")
+    sys.stderr.flush()
+
+
+def send(path: str) -> int:
+    size = os.path.getsize(path)
+    server = socket.create_server(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    print(f"Sending {scaled(size)}B file named '{os.path.basename(path)}'", file=sys.stderr)
+    print(f"Wormhole code is: 7-{port}", file=sys.stderr)
+    print("On the other computer, please run:\n", file=sys.stderr)
+    print(f"wormhole receive 7-{port}\n", file=sys.stderr, flush=True)
+    conn, _ = server.accept()
+    with conn, open(path, "rb") as f:
+        conn.sendall(json.dumps({"name": os.path.basename(path), "size": size}).encode() + b"\n")
+        print("Sending (<-127.0.0.1:%d).." % port, file=sys.stderr)
+        started, offset, last = time.monotonic(), 0, 0.0
+        while offset < size:
+            offset += os.sendfile(conn.fileno(), f.fileno(), offset, min(CHUNK, size - offset))
+            if time.monotonic() - last > 0.1:
+                progress(offset, size, started)
+                last = time.monotonic()
+        progress(offset, size, started)
+        print("\nFile sent.. waiting for confirmation", file=sys.stderr)
+        if conn.recv(1) != b"\x06":
+            print("Transfer failed: no confirmation", file=sys.stderr)
+            return 1
+    print("Confirmation received. Transfer complete.", file=sys.stderr)
+    return 0
+
+
+def receive(code: str) -> int:
+    port = int(code.split("-", 1)[1])
+    with socket.create_connection(("127.0.0.1", port)) as conn:
+        reader = conn.makefile("rb")
+        header = json.loads(reader.readline())
+        name, size = os.path.basename(header["name"]), header["size"]
+        print(f"Receiving file ({scaled(size)}B) into: {name}", file=sys.stderr)
+        buffer = bytearray(CHUNK)
+        view = memoryview(buffer)
+        started, done, last = time.monotonic(), 0, 0.0
+        with open(name + ".tmp", "wb") as f:
+            while done < size:
+                count = reader.readinto(view[:min(CHUNK, size - done)])
+                if not count:
+                    print("\nTransfer failed: connection closed", file=sys.stderr)
+                    return 1
+                f.write(view[:count])
+                done += count
+                if time.monotonic() - last > 0.1:
+                    progress(done, size, started)
+                    last = time.monotonic()
+        progress(done, size, started)
+        os.replace(name + ".tmp", name)
+        conn.sendall(b"\x06")
+    print(f"\nReceived file written to {name}", file=sys.stderr)
+    return 0
+
+
+def main() -> int:
+    args = [a for a in sys.argv[1:]]
+    # Relay options are accepted and ignored: loopback needs no relay
+    for option in ("--relay-url", "--transit-helper"):
+        while option in args:
+            index = args.index(option)
+            del args[index:index + 2]
+    if args[:1] == ["send"] and len(args) == 2:
+        return send(args[1])
+    if args[:1] == ["receive"] and args[-1] != "receive":
+        return receive(args[-1])
+    print(__doc__, file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,9 +8,24 @@ import asyncio
 import json
 import subprocess
 import sys
+import time
+from pathlib import Path
 from typing import Optional
 import miniirc
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core import metrics
+from src.core.context_store import ContextStore
+from src.core.fair_queue import QUEUE_WAIT, FairQueue
+from src.core.worker_pool import WorkerError, WorkerPool
+
+BRIDGE_REQUESTS = metrics.counter("phosphor_bridge_requests_total", "Bridge AI requests handled", ("result",))
+BRIDGE_SERVICE = metrics.histogram("phosphor_bridge_service_seconds", "Time spent answering a bridge request")
+BRIDGE_BUSY = metrics.gauge("phosphor_bridge_busy_workers", "Bridge workers handling a request")
+
+DM_CHANNEL = "(dm)"  # All DMs share one fairness slot
+
 
 class KiroIRCBridge:
     """Bridge between IRC and Kiro CLI with MCP tools."""
@@ -18,7 +33,109 @@ class KiroIRCBridge:
     def __init__(self, config: dict):
         self.config = config
         self.irc = None
-        self.sessions = {}  # Track conversation context per channel/user
+        # Conversation context per (network, channel, user), bounded in size and age
+        context = config.get("context", {})
+        self.sessions = ContextStore(
+            max_bytes=context.get("max_bytes", 4000),
+            ttl=context.get("ttl", 3600),
+            max_sessions=context.get("max_sessions", 1000),
+            snapshot_path=context.get("snapshot", ".phosphor/bridge_context.json"),
+        )
+        self.mcp = None  # Shared AI backend (MCP sessions, Azure client, caches), built in start()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        
+        # Inbound commands: one bounded fair queue drained by a fixed pool of workers
+        limits = config.get("queue", {})
+        self.worker_count = config.get("workers", 4)
+        self.queue: Optional[FairQueue] = None
+        self.max_queued = limits.get("max", 50)
+        self.max_per_user = limits.get("per_user", 3)
+        self._workers = []
+        self._busy = 0
+        self.metrics_server = None
+        self.kiro_pool: Optional[WorkerPool] = None  # Long-lived Kiro workers, if configured
+    
+    async def start(self):
+        """Build the AI backend once and warm it up before taking requests."""
+        # Import here to avoid circular dependencies
+        from src.core.mcp_client import MCPClient
+        
+        backend = self.config.get("backend", {})
+        self.mcp = MCPClient(
+            config_path=backend.get("mcp_config", "mcp.json"),
+            cache_ttls=backend.get("cache_ttls"),
+            file_index=backend.get("file_index", False),
+            # Anyone in the channel can ask: no file reads unless the operator opts in
+            file_tools=backend.get("file_tools", False),
+        )
+        await self.mcp.start()
+        
+        restored = self.sessions.load()
+        if restored:
+            print(f"✓ Restored {restored} conversation contexts")
+        
+        kiro_config = self.config.get("kiro", {})
+        if kiro_config.get("worker_command"):
+            self.kiro_pool = WorkerPool(
+                kiro_config["worker_command"],
+                size=kiro_config.get("workers", 2),
+                name="kiro",
+                max_requests=kiro_config.get("max_requests", 100),
+                timeout=kiro_config.get("timeout", 60),
+            )
+            try:
+                await self.kiro_pool.start()
+                print(f"✓ {self.kiro_pool.size} Kiro workers ready")
+            except WorkerError as e:
+                print(f"⚠️  Kiro workers unavailable ({e}), retrying in the background")
+        print("✓ AI backend ready")
+    
+    async def close(self):
+        """Disconnect from IRC and shut the AI backend down."""
+        if self.irc:
+            self.irc.disconnect()
+        if self.mcp:
+            await self.mcp.close()
+            self.mcp = None
+        if self.kiro_pool:
+            await self.kiro_pool.close()
+            self.kiro_pool = None
+        self.sessions.snapshot()
+    
+    async def serve(self):
+        """Start the backend, connect, and handle requests until stop()."""
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        await self.start()
+        self._start_workers()
+        reporter = asyncio.create_task(self._report_stats(self.config.get("stats_interval", 60)))
+        if self.config.get("metrics_port"):
+            self.metrics_server = metrics.MetricsServer(int(self.config["metrics_port"]))
+            self.metrics_server.start()
+            print(f"✓ Metrics on http://127.0.0.1:{self.config['metrics_port']}/metrics")
+        self.connect()
+        try:
+            await self._stopped.wait()
+        finally:
+            for task in self._workers + [reporter]:
+                task.cancel()
+            await asyncio.gather(*self._workers, reporter, return_exceptions=True)
+            if self.metrics_server:
+                self.metrics_server.stop()
+            await self.close()
+    
+    def _start_workers(self):
+        """Create the request queue and the workers that drain it (on the running loop)."""
+        self.queue = FairQueue("bridge", maxsize=self.max_queued, max_per_user=self.max_per_user)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"bridge-worker-{i}") for i in range(self.worker_count)
+        ]
+    
+    def stop(self):
+        """Ask serve() to finish (safe from any thread)."""
+        if self.loop and self._stopped:
+            self.loop.call_soon_threadsafe(self._stopped.set)
         
     def connect(self):
         """Connect to IRC server."""
@@ -50,17 +167,65 @@ class KiroIRCBridge:
             is_command = message.startswith(self.config["command_prefix"])
             
             if is_command or is_dm:
-                asyncio.create_task(self._handle_ai_request(
-                    nick, target, message, is_dm
-                ))
+                # miniirc calls us on its own thread; the queue lives on the bridge's loop
+                self.loop.call_soon_threadsafe(self._enqueue, nick, target, message, is_dm)
         
         print(f"✓ Connected to {server['host']}:{server['port']} as {server['nick']}")
         print(f"✓ Joined channels: {', '.join(server['channels'])}")
         print(f"✓ Listening for commands: {self.config['command_prefix']}<prompt>")
         print("✓ Bridge is running. Press Ctrl+C to stop.\n")
     
+    def _enqueue(self, nick: str, target: str, message: str, is_dm: bool):
+        """Queue a command, or tell the user why it was shed (runs on the loop)."""
+        reply_target = nick if is_dm else target
+        try:
+            position = self.queue.put_nowait(
+                (nick, target, message, is_dm), DM_CHANNEL if is_dm else target, nick
+            )
+        except asyncio.QueueFull as e:
+            BRIDGE_REQUESTS.inc(result="shed")
+            if e.args and e.args[0] == "user":
+                self.irc.msg(nick, f"⏳ You already have {self.max_per_user} requests queued, "
+                                   f"please wait for those first.")
+            else:
+                self.irc.msg(reply_target, f"⏳ {nick}: busy, {self.max_queued} requests queued. Try again shortly.")
+            return
+        ahead = position - (self.worker_count - self._busy)  # Beyond what idle workers pick up now
+        if ahead > 0:
+            self.irc.msg(reply_target, f"⏳ {nick}: busy, queued #{ahead}")
+    
+    async def _worker(self):
+        """Take queued commands in fair order and answer them, one at a time."""
+        while True:
+            nick, target, message, is_dm = await self.queue.get()
+            self._busy += 1
+            BRIDGE_BUSY.set(self._busy)
+            started = time.monotonic()
+            try:
+                ok = await self._handle_ai_request(nick, target, message, is_dm)
+                BRIDGE_REQUESTS.inc(result="ok" if ok else "error")
+            finally:
+                BRIDGE_SERVICE.observe(time.monotonic() - started)
+                self._busy -= 1
+                BRIDGE_BUSY.set(self._busy)
+    
+    async def _report_stats(self, interval: float):
+        """Log throughput and queue latency periodically (and snapshot context)."""
+        last = 0.0
+        while True:
+            await asyncio.sleep(interval)
+            self.sessions.snapshot()
+            done = BRIDGE_REQUESTS.total()
+            if done == last:
+                continue
+            p50 = QUEUE_WAIT.quantile(0.5, queue="bridge") * 1000
+            p99 = QUEUE_WAIT.quantile(0.99, queue="bridge") * 1000
+            print(f"[BRIDGE] {(done - last) / interval * 60:.1f} req/min, queued {len(self.queue)}, "
+                  f"busy {self._busy}/{self.worker_count}, queue wait p50 {p50:.0f}ms p99 {p99:.0f}ms")
+            last = done
+    
     async def _handle_ai_request(self, nick: str, target: str, message: str, is_dm: bool):
-        """Handle an AI request from IRC."""
+        """Handle an AI request from IRC; returns False if it failed."""
         # Extract the prompt
         if message.startswith(self.config["command_prefix"]):
             prompt = message[len(self.config["command_prefix"]):].strip()
@@ -68,7 +233,7 @@ class KiroIRCBridge:
             prompt = message.strip()
         
         if not prompt:
-            return
+            return True
         
         # Check if this is a private request
         is_private_request = prompt.lower().startswith("private ")
@@ -99,10 +264,28 @@ class KiroIRCBridge:
             # Send response back to IRC
             self._send_multiline(reply_target, content)
             
+            session = self._session_key(nick, target)
+            self.sessions.add(session, "user", prompt)
+            self.sessions.add(session, "assistant", content)
+            return True
+            
         except Exception as e:
             error_msg = f"❌ Error: {str(e)}"
             self.irc.msg(nick, error_msg)  # Errors always go to user
             print(f"Error processing request: {e}", file=sys.stderr)
+            return False
+    
+    def _session_key(self, user: str, channel: str) -> tuple:
+        """Context key for a user in a channel (DMs share one channel slot)."""
+        server = self.config["irc"]
+        if channel == server["nick"]:
+            channel = DM_CHANNEL
+        return (f"{server['host']}:{server['port']}", channel, user)
+    
+    def _history(self, user: str, channel: str) -> str:
+        """Recent conversation as a prompt section, or "" if there is none."""
+        history = self.sessions.render(self._session_key(user, channel))
+        return f"\nRecent conversation with {user}:\n{history}\n" if history else ""
     
     def _parse_visibility(self, response: str) -> tuple[str, str]:
         """
@@ -136,14 +319,11 @@ class KiroIRCBridge:
         """
         Call the AI assistant with the command.
         
-        For now, this uses the local MCP client directly.
-        In production, this would call Kiro CLI or another AI service.
+        Warm Kiro workers answer when ``kiro.worker_command`` is configured,
+        with the recent conversation in their prompt; otherwise, or if the
+        workers fail, the local MCP client does. That router is keyword-based
+        and stateless, so it gets the bare prompt.
         """
-        # Import here to avoid circular dependencies
-        from src.core.mcp_client import MCPClient
-        
-        mcp = MCPClient()
-        
         # Extract the actual prompt from the command
         if command.startswith("/ai private "):
             prompt = command[12:]  # Remove "/ai private "
@@ -155,11 +335,20 @@ class KiroIRCBridge:
             prompt = command
             is_private = False
         
-        # Build context for the AI
-        context = self._build_ai_context(user, channel, command, is_dm, is_private)
+        if self.kiro_pool:
+            context = self._build_ai_context(user, channel, command, is_dm, is_private)
+            try:
+                response = await self._call_kiro(user, channel, context)
+            except WorkerError as e:
+                print(f"[BRIDGE] Kiro workers failed ({e}), answering with MCP tools", file=sys.stderr)
+            else:
+                # Kiro may narrow visibility to private, never widen it
+                stated, content = self._parse_visibility(response)
+                visibility = "private" if is_private or stated == "private" else "public"
+                return f"VISIBILITY: {visibility}\n\n{content}"
         
         # Execute the command
-        result = await mcp.execute(prompt)
+        result = await self.mcp.execute(prompt)
         
         # Format the response with visibility directive
         if "error" in result:
@@ -175,15 +364,26 @@ class KiroIRCBridge:
         
         return full_response
     
-    async def _call_kiro(self, user: str, channel: str, prompt: str) -> str:
-        """Call Kiro CLI with MCP tools."""
-        # Build the full prompt with context
-        full_prompt = self._build_prompt(user, channel, prompt)
+    async def _call_kiro(self, user: str, channel: str, full_prompt: str) -> str:
+        """Call Kiro CLI with MCP tools.
+        
+        Args:
+            user: IRC nick the answer is for
+            channel: Channel (or the bot's nick for DMs)
+            full_prompt: Prompt with IRC context and history (see _build_ai_context)
         
+        Raises:
+            WorkerError: the worker pool could not answer
+        """
         # Prepare Kiro CLI command
         kiro_config = self.config.get("kiro", {})
         agent = kiro_config.get("agent", "ops-ai")
         
+        # Warm workers, when configured, skip process start-up and agent initialization
+        if self.kiro_pool:
+            response = await self.kiro_pool.call(full_prompt, agent=agent, user=user, channel=channel)
+            return self._format_response(response)
+        
         # Call Kiro CLI as subprocess
         # Note: Adjust this command based on your Kiro CLI installation
         cmd = [
@@ -231,7 +431,7 @@ User: {user}
 Command: {command}
 Target: {target_type}
 Requested Visibility: {visibility}
-
+{self._history(user, channel)}
 PROTOCOL:
 - You MUST start your response with: VISIBILITY: {visibility}
 - Then add a blank line
@@ -252,40 +452,6 @@ Respond now:"""
         
         return context
     
-    def _build_prompt(self, user: str, channel: str, prompt: str) -> str:
-        """Build a full prompt with context for Kiro CLI (legacy method)."""
-        # If prompt is empty or very generic, default to health check
-        if not prompt or prompt.lower() in ["help", "status", "check"]:
-            prompt = "check docker health"
-        
-        context = f"""DevOps Health Bot - IRC Channel: {channel}
-User: {user}
-Query: {prompt}
-
-You are an automated DevOps assistant. Your PRIMARY task is to check Docker container health.
-
-When invoked:
-1. Automatically discover and inspect Docker containers
-2. Assess their health status (running, healthy, restart counts, etc.)
-3. Report a concise summary suitable for IRC
-
-Use the /ai command which will:
-- Default to docker health checks for most queries
-- Parse environment hints (prod, staging, dev)
-- Parse service hints (web, api, db, worker)
-- Return formatted health reports
-
-IMPORTANT:
-- Be concise (IRC has line limits)
-- Use emojis for quick status (✅ 🟡 ❌)
-- Suggest actionable next steps only if issues found
-- NEVER run destructive commands
-- Read-only operations only
-
-Respond in plain text suitable for IRC."""
-        
-        return context
-    
     def _format_response(self, response: dict) -> str:
         """Format Kiro's JSON response for IRC."""
         # Extract the main message from Kiro's response
@@ -315,8 +481,7 @@ Respond in plain text suitable for IRC."""
     
     def run(self):
         """Run the bridge (blocking)."""
-        self.connect()
-        # miniirc handles the event loop
+        asyncio.run(self.serve())
 
 
 def load_config(config_path: str = "kiro_bridge_config.json") -> dict:
@@ -340,6 +505,20 @@ def load_config(config_path: str = "kiro_bridge_config.json") -> dict:
             "command_prefix": "!ai ",
             "kiro": {
                 "agent": "ops-ai"
+            },
+            "workers": 4,
+            "queue": {
+                "max": 50,
+                "per_user": 3
+            },
+            "stats_interval": 60,
+            "backend": {
+                "file_tools": False
+            },
+            "context": {
+                "max_bytes": 4000,
+                "ttl": 3600,
+                "snapshot": ".phosphor/bridge_context.json"
             }
         }
         
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Stub Kiro worker - a stand-in for a long-lived AI worker process.
+
+Speaks the WorkerPool line-delimited JSON protocol (see
+src/core/worker_pool.py) on stdin/stdout: prints {"type": "ready"} after
+a simulated agent start-up, answers pings, and answers each request with
+a canned message after --latency seconds. --crash-after and --hang-after
+make it misbehave after N requests to exercise the pool's recycling and
+timeouts.
+
+Usage, in kiro_bridge_config.json:
+
+    "kiro": {"worker_command": ["python", "demo/stub_kiro_worker.py", "--startup", "1.5"],
+             "workers": 2}
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def send(message: dict):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub worker for the Kiro bridge worker pool")
+    parser.add_argument("--startup", type=float, default=1.0, help="seconds of simulated agent start-up")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds each request takes")
+    parser.add_argument("--crash-after", type=int, default=0, help="exit after this many requests")
+    parser.add_argument("--hang-after", type=int, default=0, help="stop answering after this many requests")
+    args = parser.parse_args()
+
+    print(f"stub worker {os.getpid()} starting", flush=True)  # Not JSON: ignored by the pool
+    time.sleep(args.startup)
+    send({"type": "ready"})
+
+    served = 0
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if message.get("type") == "ping":
+            send({"id": message.get("id"), "type": "pong"})
+            continue
+        if message.get("type") != "request":
+            send({"id": message.get("id"), "type": "error", "error": f"unknown type {message.get('type')!r}"})
+            continue
+        served += 1
+        if args.crash_after and served >= args.crash_after:
+            os._exit(3)
+        if args.hang_after and served >= args.hang_after:
+            time.sleep(3600)
+        time.sleep(args.latency)
+        send({
+            "id": message.get("id"),
+            "type": "response",
+            "message": f"VISIBILITY: public\n\nstub answer #{served} from pid {os.getpid()} for: {message.get('prompt', '')[:80]}",
+        })
+
+
+if __name__ == "__main__":
+    main()
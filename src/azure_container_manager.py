@@ -11,13 +11,18 @@ from datetime import datetime, timedelta
 from azure.identity import ClientSecretCredential
 from azure.mgmt.containerinstance import ContainerInstanceManagementClient
 from azure.mgmt.resource import ResourceManagementClient
+from src.core.rate_limit import RateLimited, RateLimiter
+
+# One budget for ARM calls per process, however many callers flood us (ARM allows ~12k reads/hour)
+ARM_BUDGET = RateLimiter(rate=1.0, burst=30, name="azure-arm")
 
 
 class AzureContainerManager:
     """Manages Azure container queries with caching and health checks"""
     
     def __init__(self, subscription_id: str, client_id: str, 
-                 client_secret: str, tenant_id: str, resource_group: str):
+                 client_secret: str, tenant_id: str, resource_group: str,
+                 api_budget: Optional[RateLimiter] = None):
         """
         Initialize Azure Container Manager
         
@@ -27,9 +32,11 @@ class AzureContainerManager:
             client_secret: Service Principal secret
             tenant_id: Azure AD tenant ID
             resource_group: Resource group containing containers
+            api_budget: Limiter for ARM API calls (defaults to the shared ARM_BUDGET)
         """
         self.subscription_id = subscription_id
         self.resource_group = resource_group
+        self.api_budget = api_budget or ARM_BUDGET
         
         # Authenticate with Service Principal
         self.credential = ClientSecretCredential(
@@ -53,7 +60,7 @@ class AzureContainerManager:
         """Check if cache is still valid"""
         if self.last_cache_time is None:
             return False
-        return (datetime.now() - self.last_cache_time).seconds < self.cache_ttl
+        return (datetime.now() - self.last_cache_time).total_seconds() < self.cache_ttl
     
     def get_all_containers(self, force_refresh: bool = False) -> List[Dict]:
         """
@@ -69,6 +76,14 @@ class AzureContainerManager:
         if not force_refresh and self._is_cache_valid() and self.cache:
             return self.cache.get('containers', [])
         
+        # Out of API budget: stale data beats no data
+        wait = self.api_budget.acquire(self.subscription_id)
+        if wait:
+            if 'containers' in self.cache:
+                print("Azure API budget used up, serving cached containers")
+                return self.cache['containers']
+            raise RateLimited("Azure API budget used up", wait)
+        
         try:
             containers = []
             container_groups = self.container_client.container_groups.list_by_resource_group(
@@ -78,6 +93,7 @@ class AzureContainerManager:
             for group in container_groups:
                 # Get detailed container group info with instance view
                 try:
+                    self.api_budget.check(self.subscription_id)
                     group_detail = self.container_client.container_groups.get(
                         self.resource_group,
                         group.name
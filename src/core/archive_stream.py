@@ -0,0 +1,420 @@
+"""Streaming tar archives for sending directories and globs.
+
+The sender never writes an archive to disk. ``ArchiveStream`` runs tar
+(and an optional compressor) on a background thread and hands out
+chunks through a small bounded queue, so reading files, compressing and
+sending overlap and memory stays at a few chunks. The codec is picked
+by compressing a sample of the input: zstd when the ``zstandard``
+package is installed, otherwise gzip at its fastest level, or none at
+all for data that does not shrink (media, archives, build artifacts
+that are already compressed).
+
+Each regular file is followed by a small member named
+``.phosphor-sha256/<path>`` holding its SHA-256. ``extract_stream``
+unpacks while data arrives, hashing each file as it is written to a
+``.part`` file, and only renames it into place once its checksum member
+has matched, so a corrupted file is caught the moment it ends rather
+than after the whole archive.
+"""
+
+import glob
+import hashlib
+import io
+import os
+import queue
+import tarfile
+import threading
+import zlib
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+CHUNK = 1024 * 1024
+CHECKSUM_PREFIX = ".phosphor-sha256/"
+SUFFIXES = {"none": ".tar", "gzip": ".tar.gz", "zstd": ".tar.zst"}
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def expand(spec: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Files and directories named by a path or glob, as ``(path, arcname)`` pairs.
+
+    A directory contributes itself and everything under it; a glob
+    contributes its matches, relative to the directory they share. Either
+    way arcnames start with the archive name, so the archive unpacks into
+    one directory. Returns ``(archive name, entries)``.
+    """
+    spec = os.path.expanduser(spec)
+    if os.path.isdir(spec):
+        root = os.path.normpath(spec)
+        base = os.path.dirname(root)
+        matches = [root]
+        name = os.path.basename(root) or "archive"
+    else:
+        matches = sorted(glob.glob(spec, recursive=True))
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(m)) for m in matches]) if matches else "."
+        name = os.path.basename(base) or "archive"
+    prefix = "" if os.path.isdir(spec) else name  # Globs unpack into one directory too
+    entries, seen = [], set()
+    for match in matches:
+        for path in _walk(match):
+            arcname = os.path.join(prefix, os.path.relpath(os.path.abspath(path), os.path.abspath(base)))
+            if arcname not in seen:  # A glob may match a directory and files inside it
+                seen.add(arcname)
+                entries.append((path, arcname))
+    return name, entries
+
+
+def _walk(path: str) -> Iterator[str]:
+    yield path
+    if os.path.isdir(path) and not os.path.islink(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in dirs:
+                yield os.path.join(root, name)
+            for name in sorted(files):
+                yield os.path.join(root, name)
+
+
+def choose_codec(entries: List[Tuple[str, str]], sample: int = 64 * 1024, max_files: int = 16) -> str:
+    """"zstd" or "gzip" if the archive is likely to shrink enough to pay off, else "none".
+
+    Samples the largest files and weights each one's ratio by its size,
+    so a few big incompressible files outvote many small text files.
+    gzip is several times slower than zstd, so it has to save more.
+    """
+    sizes = {path: os.path.getsize(path) for path, _ in entries if os.path.isfile(path)}
+    largest = sorted(sizes, key=sizes.get, reverse=True)[:max_files]
+    weight = packed = 0.0
+    for path in largest:
+        try:
+            with open(path, "rb") as f:
+                data = f.read(sample)
+        except OSError:
+            continue
+        if data:
+            weight += sizes[path]
+            packed += sizes[path] * len(zlib.compress(data, 1)) / len(data)
+    ratio = packed / weight if weight else 1.0
+    try:
+        import zstandard  # noqa: F401
+        return "zstd" if ratio < 0.9 else "none"
+    except ImportError:
+        return "gzip" if ratio < 0.6 else "none"
+
+
+class _Compressor:
+    def __init__(self, codec: str):
+        if codec == "zstd":
+            import zstandard
+            self._obj = zstandard.ZstdCompressor(level=3, threads=-1).compressobj()
+        elif codec == "gzip":
+            self._obj = zlib.compressobj(1, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        else:
+            self._obj = None
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) if self._obj else data
+
+    def flush(self) -> bytes:
+        return self._obj.flush() if self._obj else b""
+
+
+class _HashingReader:
+    """File wrapper that hashes what tarfile reads and counts it."""
+
+    def __init__(self, f, on_read: Callable[[int], None]):
+        self._f = f
+        self._on_read = on_read
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self.sha256.update(data)
+        self._on_read(len(data))
+        return data
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class ArchiveStream:
+    """Iterate to get the (compressed) tar stream of ``entries`` in chunks.
+
+    Attributes:
+        name: Suggested file name, with the codec's suffix
+        total: Bytes of file data to archive
+        done: Bytes of file data archived so far
+    """
+
+    def __init__(self, name: str, entries: List[Tuple[str, str]], codec: Optional[str] = None,
+                 depth: int = 8):
+        """
+        Args:
+            name: Archive name without suffix
+            entries: ``(path, arcname)`` pairs, e.g. from expand()
+            codec: "zstd", "gzip" or "none" (default: choose_codec())
+            depth: Chunks buffered between the tar thread and the reader
+        """
+        self.entries = entries
+        self.codec = codec or choose_codec(entries)
+        self.name = name + SUFFIXES[self.codec]
+        self.total = sum(os.path.getsize(path) for path, _ in entries if os.path.isfile(path))
+        self.done = 0
+        self.skipped: List[str] = []  # Links, devices and unreadable files
+        self._queue: "queue.Queue" = queue.Queue(maxsize=depth)
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.start()
+        while True:
+            chunk = self.next_chunk()
+            if chunk is None:
+                return
+            yield chunk
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._produce, name="archive-stream", daemon=True)
+            self._thread.start()
+
+    def next_chunk(self) -> Optional[bytes]:
+        """Next chunk (blocking), or None at the end; re-raises errors from the tar thread."""
+        item = self._queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def cancel(self):
+        """Stop the tar thread (it exits at its next chunk)."""
+        self._cancelled.set()
+        try:
+            while True:
+                self._queue.get_nowait()  # Unblock a producer waiting on a full queue
+        except queue.Empty:
+            pass
+        try:
+            self._queue.put_nowait(None)  # ...and a reader waiting on an empty one
+        except queue.Full:
+            pass
+
+    def _put(self, item):
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _Cancelled()
+
+    def _produce(self):
+        try:
+            sink = _ChunkSink(_Compressor(self.codec), self._put)
+            with tarfile.open(fileobj=sink, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                for path, arcname in self.entries:
+                    self._add(tar, path, arcname)
+            sink.close()
+            self._put(None)
+        except _Cancelled:
+            return
+        except Exception as e:
+            try:
+                self._put(e)
+            except _Cancelled:
+                pass
+
+    def _add(self, tar: tarfile.TarFile, path: str, arcname: str):
+        try:
+            info = tar.gettarinfo(path, arcname)
+        except OSError:
+            self.skipped.append(arcname)
+            return
+        if info.isdir():
+            tar.addfile(info)
+        elif info.isfile():
+            try:
+                f = open(path, "rb")
+            except OSError:
+                self.skipped.append(arcname)  # Nothing written for it yet, so the stream stays consistent
+                return
+            with f:
+                reader = _HashingReader(f, self._advance)
+                tar.addfile(info, reader)
+            digest = reader.sha256.hexdigest().encode("ascii")
+            checksum = tarfile.TarInfo(CHECKSUM_PREFIX + info.name)
+            checksum.size = len(digest)
+            checksum.mtime = info.mtime
+            tar.addfile(checksum, io.BytesIO(digest))
+        else:
+            self.skipped.append(arcname)
+
+    def _advance(self, count: int):
+        self.done += count
+        if self._cancelled.is_set():
+            raise _Cancelled()
+
+
+class _ChunkSink:
+    """Write target for tarfile: compresses and emits CHUNK-sized pieces."""
+
+    def __init__(self, compressor: _Compressor, emit: Callable[[bytes], None]):
+        self._compressor = compressor
+        self._emit = emit
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += self._compressor.compress(data)
+        while len(self._buffer) >= CHUNK:
+            self._emit(bytes(self._buffer[:CHUNK]))
+            del self._buffer[:CHUNK]
+        return len(data)
+
+    def close(self):
+        self._buffer += self._compressor.flush()
+        if self._buffer:
+            self._emit(bytes(self._buffer))
+            self._buffer.clear()
+
+
+class _DecompressingReader:
+    """Readable over a ``read_chunk()`` source, detecting the codec from its magic bytes."""
+
+    def __init__(self, read_chunk: Callable[[], bytes]):
+        self._read_chunk = read_chunk
+        self._buffer = b""
+        self._pos = 0
+        self._eof = False
+        self._decompress: Optional[Callable[[bytes], bytes]] = None
+        self.received = 0  # Bytes on the wire
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False  # The source is not asked again after it ended
+        chunk = self._read_chunk()
+        if not chunk:
+            self._eof = True
+            return False
+        self.received += len(chunk)
+        if self._decompress is None:
+            if chunk.startswith(_ZSTD_MAGIC):
+                import zstandard
+                self._decompress = zstandard.ZstdDecompressor().decompressobj().decompress
+            elif chunk.startswith(_GZIP_MAGIC):
+                self._decompress = zlib.decompressobj(47).decompress  # wbits 47: gzip or zlib header
+            else:
+                self._decompress = bytes  # No copy for bytes
+        self._buffer = self._decompress(chunk)
+        self._pos = 0
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        parts = []
+        while size:
+            if self._pos >= len(self._buffer) and not self._fill():
+                break
+            take = len(self._buffer) - self._pos if size < 0 else min(len(self._buffer) - self._pos, size)
+            # Whole chunks are handed on as they are; tarfile mostly asks for exactly that much
+            parts.append(self._buffer if take == len(self._buffer) else self._buffer[self._pos:self._pos + take])
+            self._pos += take
+            if size > 0:
+                size -= take
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+
+class ExtractResult(NamedTuple):
+    files: int  # Verified and moved into place
+    bytes: int
+    failed: List[str]  # Checksum mismatches, missing checksums, unsafe or unwritable paths
+
+
+def _safe_path(dest: str, name: str) -> Optional[str]:
+    """Where a member goes under dest, or None if it would land outside it."""
+    name = name.replace("\\", "/")
+    if name.startswith("/") or any(part == ".." for part in name.split("/")):
+        return None
+    path = os.path.normpath(os.path.join(dest, name))
+    if os.path.commonpath([os.path.abspath(dest), os.path.abspath(path)]) != os.path.abspath(dest):
+        return None
+    return path
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def extract_stream(read_chunk: Callable[[], bytes], dest: str,
+                   on_progress: Optional[Callable[[int], None]] = None) -> ExtractResult:
+    """Unpack an ArchiveStream as it arrives (blocking; run it on a thread).
+
+    Args:
+        read_chunk: Returns the next bytes received, or b"" at the end
+        dest: Directory to unpack into
+        on_progress: Called with the file bytes written so far
+    """
+    os.makedirs(dest, exist_ok=True)
+    reader = _DecompressingReader(read_chunk)
+    files = written = 0
+    failed: List[str] = []
+    pending: Optional[Tuple[str, str, str]] = None  # (name, .part path, sha256) awaiting its checksum
+    try:
+        with tarfile.open(fileobj=reader, mode="r|", bufsize=CHUNK) as tar:
+            for member in tar:
+                if member.name.startswith(CHECKSUM_PREFIX):
+                    expected = tar.extractfile(member).read().decode("ascii", "replace").strip()
+                    name = member.name[len(CHECKSUM_PREFIX):]
+                    if pending and pending[0] == name:
+                        _, part, digest = pending
+                        pending = None
+                        if digest == expected:
+                            os.replace(part, part[:-len(".part")])
+                            files += 1
+                        else:
+                            os.remove(part)
+                            failed.append(name)
+                    continue
+                if pending:  # A file whose checksum never came
+                    _remove(pending[1])
+                    failed.append(pending[0])
+                    pending = None
+                path = _safe_path(dest, member.name)
+                if path is None:
+                    failed.append(member.name)
+                    continue
+                if member.isdir():
+                    os.makedirs(path, exist_ok=True)
+                elif member.isfile():
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    sha256 = hashlib.sha256()
+                    source = tar.extractfile(member)
+                    try:
+                        with open(path + ".part", "wb") as f:
+                            while True:
+                                data = source.read(CHUNK)
+                                if not data:
+                                    break
+                                sha256.update(data)
+                                f.write(data)
+                                written += len(data)
+                                if on_progress:
+                                    on_progress(written)
+                    except BaseException as e:
+                        _remove(path + ".part")  # Never leave a partial file behind
+                        if not isinstance(e, OSError):
+                            raise
+                        failed.append(member.name)  # Unwritable here; the rest may still work
+                        continue
+                    os.utime(path + ".part", (member.mtime, member.mtime))
+                    pending = (member.name, path + ".part", sha256.hexdigest())
+                # Links and devices are never created: they could point outside dest
+    except BaseException:
+        if pending:
+            _remove(pending[1])  # Unverified
+        raise
+    if pending:
+        _remove(pending[1])
+        failed.append(pending[0])
+    return ExtractResult(files, written, failed)
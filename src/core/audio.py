@@ -2,12 +2,18 @@
 
 import io
 import os
+import shutil
 import struct
 import subprocess
 import threading
 import wave
 from typing import Optional
 
+from src.core import metrics
+
+AUDIO_PLAYS = metrics.counter("phosphor_audio_plays_total", "Sounds handed to the audio player", ("sound",))
+AUDIO_DROPS = metrics.counter("phosphor_audio_drops_total", "Sounds skipped or failed", ("sound", "reason"))
+
 
 class AudioEngine:
     """Audio feedback for log events using system audio players."""
@@ -25,19 +31,11 @@ class AudioEngine:
             self.enabled = False
     
     def _find_player(self) -> Optional[str]:
-        """Find an available audio player on the system."""
+        """Find an available audio player on the system (PATH lookup, no fork)."""
         players = ['paplay', 'aplay', 'afplay']  # paplay=PulseAudio, aplay=ALSA, afplay=macOS
         for player in players:
-            try:
-                result = subprocess.run(
-                    ['which', player],
-                    capture_output=True,
-                    timeout=2
-                )
-                if result.returncode == 0:
-                    return player
-            except Exception:
-                continue
+            if shutil.which(player):
+                return player
         return None
     
     def _generate_wav(self, samples: list[int], sample_rate: int = 22050) -> bytes:
@@ -96,14 +94,16 @@ class AudioEngine:
             samples.append(sample)
         return samples
     
-    def _play_samples(self, samples: list[int], sample_rate: int = 22050):
+    def _play_samples(self, samples: list[int], sample_rate: int = 22050, sound: str = "tone"):
         """Play samples using system audio player."""
         if not self.enabled or not self._player:
             return
         
         # Non-blocking lock - skip if already playing
         if not self._audio_lock.acquire(blocking=False):
+            AUDIO_DROPS.inc(sound=sound, reason="busy")
             return
+        AUDIO_PLAYS.inc(sound=sound)
         
         def play():
             try:
@@ -118,7 +118,7 @@ class AudioEngine:
                 )
                 proc.communicate(input=wav_data, timeout=3)
             except Exception:
-                pass
+                AUDIO_DROPS.inc(sound=sound, reason="error")
             finally:
                 self._audio_lock.release()
         
@@ -130,21 +130,21 @@ class AudioEngine:
         if not self.enabled:
             return
         samples = self._generate_soft_tone(440, 0.05)
-        self._play_samples(samples)
+        self._play_samples(samples, sound="tick")
     
     def play_error(self):
         """Play a soft low tone for errors."""
         if not self.enabled:
             return
         samples = self._generate_soft_tone(220, 0.1)
-        self._play_samples(samples)
+        self._play_samples(samples, sound="error")
     
     def play_critical(self):
         """Play a gentle alert for critical errors."""
         if not self.enabled:
             return
         samples = self._generate_chime(330, 0.15)  # E4 - lower, attention-getting
-        self._play_samples(samples)
+        self._play_samples(samples, sound="critical")
     
     def play_notification(self):
         """Play a soft, soothing notification chime for new messages."""
@@ -156,7 +156,7 @@ class AudioEngine:
         # Using musical intervals (perfect fifth) for pleasing sound
         samples = self._generate_chime(523, 0.15, sample_rate)  # C5
         
-        self._play_samples(samples, sample_rate)
+        self._play_samples(samples, sample_rate, sound="notification")
     
     def play_dm_notification(self):
         """Play a gentle ascending chime for DM notifications."""
@@ -170,7 +170,7 @@ class AudioEngine:
         samples.extend([0] * int(sample_rate * 0.05))  # Small gap
         samples.extend(self._generate_chime(554, 0.18, sample_rate))  # C#5
         
-        self._play_samples(samples, sample_rate)
+        self._play_samples(samples, sample_rate, sound="dm_notification")
     
     def process_log(self, message: str):
         """Process a log message and play appropriate sound."""
@@ -0,0 +1,57 @@
+"""Tab completion of nicknames, ranked by how recently people spoke."""
+
+import time
+from typing import Dict, List, Optional
+
+from src.core.fuzzy import FuzzyIndex, match_tier, normalize
+
+
+class NickCompleter:
+    """Complete nicks from a channel's member list.
+
+    Matches are ordered by match tier (prefix first), then by who spoke most
+    recently in the channel, then alphabetically.
+    """
+
+    def __init__(self, max_speakers: int = 200):
+        self.max_speakers = max_speakers  # Per-channel recency memory
+        self._spoke: Dict[str, Dict[str, float]] = {}  # channel -> {nick: last spoke}
+        self._indexes: Dict[str, tuple] = {}  # channel -> (members list, its length, index, member set)
+
+    def note_spoke(self, channel: str, nick: str, ts: Optional[float] = None):
+        """Record that ``nick`` just said something in ``channel``."""
+        speakers = self._spoke.setdefault(channel, {})
+        speakers.pop(nick, None)  # Re-insert so dict order stays oldest -> newest
+        speakers[nick] = ts if ts is not None else time.time()
+        if len(speakers) > self.max_speakers:
+            del speakers[next(iter(speakers))]
+
+    def complete(self, channel: str, members: List[str], word: str,
+                 exclude: Optional[str] = None, limit: int = 20) -> List[str]:
+        """Return completion candidates for ``word``, best first."""
+        q = normalize(word)
+        if not q:
+            return []
+        index, member_set = self._index_for(channel, members)
+
+        tiers = {index.items[i]: tier for tier, i in index.search_scored(word, limit)}
+        # Recent speakers are few; check them all so a lively nick isn't cut by the limit
+        speakers = self._spoke.get(channel, {})
+        for nick in speakers:
+            if nick in member_set and nick not in tiers:
+                tier = match_tier(nick.lower(), q)
+                if tier is not None:
+                    tiers[nick] = tier
+        tiers.pop(exclude, None)
+
+        return sorted(tiers, key=lambda nick: (tiers[nick], -speakers.get(nick, 0.0), nick.lower()))[:limit]
+
+    def _index_for(self, channel: str, members: List[str]):
+        """Fuzzy index over a channel's members, rebuilt when the list changes."""
+        cached = self._indexes.get(channel)
+        if cached and cached[0] is members and cached[1] == len(members):
+            return cached[2], cached[3]
+        index = FuzzyIndex(sorted(members, key=str.lower))
+        member_set = set(members)
+        self._indexes[channel] = (members, len(members), index, member_set)
+        return index, member_set
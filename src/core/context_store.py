@@ -0,0 +1,167 @@
+"""Bounded conversation context for the AI bridge.
+
+Sessions are keyed by ``(network, channel, user)``. Each holds recent
+turns within a byte budget (roughly 4 bytes per token): adding a turn
+drops the oldest ones until the session fits again, so the cost is
+proportional to what is trimmed, never to the history. Sessions idle
+longer than the TTL expire, and beyond ``max_sessions`` the least
+recently used go first. Sessions are kept in last-used order, so both
+checks only look at the oldest entries.
+
+Optionally the store is snapshotted to a JSON file, so a restarted
+bridge picks up where it left off.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Deque, List, NamedTuple, Optional, Tuple
+
+SessionKey = Tuple[str, str, str]  # (network, channel, user)
+
+
+class Turn(NamedTuple):
+    role: str  # "user" or "assistant"
+    text: str
+    at: float
+
+
+class _Session:
+    __slots__ = ("turns", "size", "last_used")
+
+    def __init__(self):
+        self.turns: Deque[Turn] = deque()
+        self.size = 0
+        self.last_used = time.time()
+
+
+def _cost(turn: Turn) -> int:
+    return len(turn.text.encode("utf-8")) + len(turn.role) + 2
+
+
+class ContextStore:
+    """Per-(network, channel, user) turn history with size and age limits."""
+
+    def __init__(self, max_bytes: int = 4000, ttl: float = 3600.0, max_sessions: int = 1000,
+                 snapshot_path: Optional[str] = None):
+        """
+        Args:
+            max_bytes: Budget per session (about 4 bytes per token)
+            ttl: Seconds of inactivity before a session is dropped
+            max_sessions: Least recently used sessions beyond this are dropped
+            snapshot_path: JSON file for snapshot()/load(), or None
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._sessions: "OrderedDict[SessionKey, _Session]" = OrderedDict()
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def add(self, key: SessionKey, role: str, text: str):
+        """Append a turn, trimming the session's oldest turns to fit the budget."""
+        self.expire()
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = _Session()
+        turn = Turn(role, text, time.time())
+        if _cost(turn) > self.max_bytes:
+            # Keep the newest part of an oversized turn
+            budget = max(self.max_bytes - len(role) - 2, 0)
+            turn = turn._replace(text=turn.text.encode("utf-8")[-budget:].decode("utf-8", "ignore"))
+        session.turns.append(turn)
+        session.size += _cost(turn)
+        while session.size > self.max_bytes and session.turns:
+            session.size -= _cost(session.turns.popleft())
+        self._touch(key, session)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        self._dirty = True
+
+    def turns(self, key: SessionKey) -> List[Turn]:
+        """Turns of a session, oldest first (empty if none or expired)."""
+        self.expire()
+        session = self._sessions.get(key)
+        if session is None:
+            return []
+        self._touch(key, session)
+        return list(session.turns)
+
+    def render(self, key: SessionKey) -> str:
+        """The session as ``role: text`` lines for a prompt."""
+        return "\n".join(f"{turn.role}: {turn.text}" for turn in self.turns(key))
+
+    def clear(self, key: SessionKey):
+        if self._sessions.pop(key, None) is not None:
+            self._dirty = True
+
+    def _touch(self, key: SessionKey, session: _Session):
+        session.last_used = time.time()
+        self._sessions.move_to_end(key)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop sessions idle longer than the TTL; returns how many."""
+        now = time.time() if now is None else now
+        expired = 0
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.ttl:
+                break
+            del self._sessions[key]
+            expired += 1
+        if expired:
+            self._dirty = True
+        return expired
+
+    def snapshot(self):
+        """Write all sessions to snapshot_path (atomically) if anything changed."""
+        if not self.snapshot_path or not self._dirty:
+            return
+        self.expire()
+        data = {
+            "saved_at": time.time(),
+            "sessions": [
+                {"key": list(key), "last_used": session.last_used, "turns": [list(turn) for turn in session.turns]}
+                for key, session in self._sessions.items()
+            ],
+        }
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.snapshot_path)
+            self._dirty = False
+        except OSError as e:
+            print(f"[CONTEXT] Failed to save snapshot: {e}")
+
+    def load(self) -> int:
+        """Restore sessions from snapshot_path, skipping expired ones; returns how many."""
+        if not self.snapshot_path:
+            return 0
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        now = time.time()
+        for entry in sorted(data.get("sessions", []), key=lambda e: e.get("last_used", 0)):
+            if now - entry.get("last_used", 0) > self.ttl:
+                continue
+            session = _Session()
+            for role, text, at in entry.get("turns", []):
+                turn = Turn(role, text, at)
+                session.turns.append(turn)
+                session.size += _cost(turn)
+            while session.size > self.max_bytes and session.turns:
+                session.size -= _cost(session.turns.popleft())  # Budget may have shrunk
+            session.last_used = entry["last_used"]
+            self._sessions[tuple(entry["key"])] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return len(self._sessions)
@@ -4,6 +4,10 @@ import asyncio
 import json
 from typing import Dict, List, Any, Optional
 
+from src.core import metrics, tracing
+
+HEALTH_CHECK = metrics.histogram("phosphor_health_check_seconds", "DevOps health check latency", buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+
 
 class ContainerHealth:
     """Container health assessment."""
@@ -92,6 +96,8 @@ class DevOpsHealthBot:
         """Initialize with MCP tools."""
         self.mcp_tools = mcp_tools or {}
     
+    @HEALTH_CHECK.timed()
+    @tracing.traced("health.check", "health")
     async def check_health(self, user_prompt: str = "") -> str:
         """
         Main entry point for health checks.
@@ -150,15 +156,15 @@ See FIX_DOCKER_PERMISSIONS.md for details."""
             available = ", ".join(available_names) if available_names else "none"
             return f"No containers matched your query.\n\nAvailable: {available}"
         
-        # Step 3: Inspect each container's health
-        health_results = []
-        for container in filtered:
-            health = await self._inspect_container_health(container)
-            health_results.append(health)
+        # Step 3: Inspect each container's health (MCP calls are pipelined)
+        health_results = list(await asyncio.gather(
+            *(self._inspect_container_health(container) for container in filtered)
+        ))
         
         # Step 4: Format IRC-friendly response
         return self._format_health_report(health_results, user_prompt)
     
+    @tracing.traced("health.discover_containers", "health")
     async def _discover_containers(self) -> List[Dict[str, Any]]:
         """Discover Docker containers using MCP tool."""
         if "list_containers" not in self.mcp_tools:
@@ -255,6 +261,7 @@ See FIX_DOCKER_PERMISSIONS.md for details."""
         
         return filtered
     
+    @tracing.traced("health.inspect_container_health", "health")
     async def _inspect_container_health(self, container: Dict[str, Any]) -> ContainerHealth:
         """Inspect a single container's health."""
         container_id = container.get("ID", container.get("id", ""))
@@ -0,0 +1,92 @@
+"""Bounded asyncio queue that is fair across channels and the users in them.
+
+Items are kept per (channel, user). ``get`` rotates round-robin over
+channels, and within a channel over its users, so one user firing off a
+burst of commands (or one busy channel) cannot starve everybody else:
+each waiting user gets a turn before anyone gets a second one.
+
+The queue is bounded overall and per user; ``put_nowait`` raises
+``asyncio.QueueFull`` when either limit is hit so callers can shed load.
+Depth, queue wait and shed requests are recorded in the metrics registry,
+labelled with the queue's name.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Hashable, Tuple
+
+from src.core import metrics
+
+QUEUE_DEPTH = metrics.gauge("phosphor_queue_depth", "Items waiting in a fair queue", ("queue",))
+QUEUE_WAIT = metrics.histogram("phosphor_queue_wait_seconds", "Time items spent queued", ("queue",))
+QUEUE_SHED = metrics.counter("phosphor_queue_shed_total", "Items refused by a full queue", ("queue", "reason"))
+
+
+class FairQueue:
+    """Round-robin over channels, then users, with overall and per-user bounds."""
+
+    def __init__(self, name: str = "default", maxsize: int = 100, max_per_user: int = 5):
+        """
+        Args:
+            name: Metrics label
+            maxsize: Items queued in total before put_nowait refuses
+            max_per_user: Items one user may have queued at once
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.max_per_user = max_per_user
+        self._channels: "OrderedDict[Hashable, OrderedDict[Hashable, Deque[Tuple[Any, float]]]]" = OrderedDict()
+        self._size = 0
+        self._items = asyncio.Semaphore(0)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def pending(self, channel: Hashable, user: Hashable) -> int:
+        """Items a user currently has queued in a channel."""
+        users = self._channels.get(channel)
+        return len(users.get(user, ())) if users else 0
+
+    def put_nowait(self, item: Any, channel: Hashable, user: Hashable) -> int:
+        """Queue an item; returns its position (1 = next out, ignoring fairness).
+
+        Raises:
+            asyncio.QueueFull: the queue or this user's share of it is full
+                (``args[0]`` is "full" or "user")
+        """
+        if self._size >= self.maxsize:
+            QUEUE_SHED.inc(queue=self.name, reason="full")
+            raise asyncio.QueueFull("full")
+        users = self._channels.setdefault(channel, OrderedDict())
+        items = users.setdefault(user, deque())
+        if len(items) >= self.max_per_user:
+            QUEUE_SHED.inc(queue=self.name, reason="user")
+            if not items:
+                del users[user]
+            raise asyncio.QueueFull("user")
+        items.append((item, time.monotonic()))
+        self._size += 1
+        QUEUE_DEPTH.set(self._size, queue=self.name)
+        self._items.release()
+        return self._size
+
+    async def get(self) -> Any:
+        """Next item in fair order (waits while empty)."""
+        await self._items.acquire()
+        channel, users = next(iter(self._channels.items()))
+        user, items = next(iter(users.items()))
+        item, queued_at = items.popleft()
+        # Whoever was served moves to the back of the rotation
+        if items:
+            users.move_to_end(user)
+        else:
+            del users[user]
+        if users:
+            self._channels.move_to_end(channel)
+        else:
+            del self._channels[channel]
+        self._size -= 1
+        QUEUE_DEPTH.set(self._size, queue=self.name)
+        QUEUE_WAIT.observe(time.monotonic() - queued_at, queue=self.name)
+        return item
@@ -0,0 +1,518 @@
+"""Background index of the working directory for the AI file tools.
+
+FileIndex keeps, for every directory it has scanned, each entry's size,
+mtime and type, plus a trigram index over file names, so ``/ai
+search-files``, ``list-files`` and ``read-file`` answer from memory in
+time proportional to the matches instead of the tree. The same ignore
+rules as file_search apply: ignored entries are listed but not indexed
+or descended into.
+
+The index is built once on a background thread, persisted to
+``.phosphor/file_index.json`` (so the next start is usable immediately and
+only reconciles directories whose mtime changed), and kept current with
+inotify on Linux. Where inotify is unavailable or runs out of watches it
+falls back to polling directory mtimes.
+"""
+
+import ctypes
+import json
+import os
+import re
+import select
+import stat
+import struct
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from src.core.file_search import IGNORE_FILES, SKIP_DIRS, compile_glob, is_ignored, parse_ignore_file
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+STRUCTURE_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+INDEX_VERSION = 1
+
+
+class IndexEntry(NamedTuple):
+    size: int
+    mtime: float
+    is_dir: bool
+    ignored: bool = False
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _parent(rel_path: str) -> str:
+    return rel_path.rpartition("/")[0]
+
+
+class _Inotify:
+    """Minimal inotify binding over ctypes (Linux only)."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify not available")
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """Pending events as ``(wd, mask, name)``, waiting up to timeout."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileIndex:
+    """In-memory, persisted and self-updating index of one directory tree."""
+
+    def __init__(self, root: str = ".", path: str = ".phosphor/file_index.json",
+                 poll_interval: float = 5.0, save_interval: float = 60.0, batch_delay: float = 0.2):
+        """
+        Args:
+            root: Tree to index
+            path: Where the index is persisted
+            poll_interval: Seconds between directory mtime sweeps when inotify is unavailable
+            save_interval: Seconds between saves while there are unsaved changes
+            batch_delay: Events are coalesced for this long before being applied
+        """
+        self.root = os.path.abspath(root)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.save_interval = save_interval
+        self.batch_delay = batch_delay
+        self.ready = threading.Event()  # Set once queries can be answered
+        self.mode = "starting"  # "inotify", "polling" or "stopped"
+        self._lock = threading.RLock()
+        self._dirs: Dict[str, Dict[str, IndexEntry]] = {}  # Scanned dir -> entries
+        self._dir_mtimes: Dict[str, int] = {}
+        self._pruned: Set[str] = set()  # Directories listed but not descended into
+        self._by_name: Dict[str, Set[str]] = {}  # Indexed name -> paths
+        self._grams: Dict[str, Set[str]] = {}  # Trigram -> names
+        self._rules: Dict[str, tuple] = {}  # Dir -> ignore rules in effect inside it
+        self._watches: Dict[int, str] = {}  # inotify watch descriptor -> dir
+        self._watched: Set[str] = set()
+        self._inotify: Optional[_Inotify] = None
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- Lifecycle ----
+
+    def start(self):
+        """Load or build the index and keep it current, on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="file-index", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop watching and save."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        started = time.monotonic()
+        if self._load():
+            self.ready.set()
+            self._reconcile()
+            print(f"[FILE INDEX] Loaded {self.file_count()} entries in {time.monotonic() - started:.2f}s")
+        else:
+            self._refresh_dir("")
+            self.ready.set()
+            print(f"[FILE INDEX] Indexed {self.file_count()} entries in {time.monotonic() - started:.2f}s")
+        self.save()
+        try:
+            self._inotify = _Inotify()
+            self.mode = "inotify"
+            for rel_dir in list(self._dirs):
+                self._watch(rel_dir)
+            self._reconcile()  # Catch changes made while the watches were being added
+        except OSError as e:
+            self._fall_back(e)
+        last_save = time.monotonic()
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                self._process_events()
+            else:
+                self._stop.wait(self.poll_interval)
+                self._reconcile()
+            if self._dirty and time.monotonic() - last_save > self.save_interval:
+                self.save()
+                last_save = time.monotonic()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self.save()
+        self.mode = "stopped"
+
+    def _fall_back(self, error: OSError):
+        print(f"[FILE INDEX] inotify unavailable ({error}), polling every {self.poll_interval:.0f}s")
+        if self._inotify is not None:
+            self._inotify.close()
+        self._inotify = None
+        self._watches.clear()
+        self._watched.clear()
+        self.mode = "polling"
+
+    # ---- Scanning ----
+
+    def _full(self, rel_path: str) -> str:
+        return os.path.join(self.root, rel_path) if rel_path else self.root
+
+    def _rules_in(self, rel_dir: str, names: Optional[Set[str]] = None) -> tuple:
+        """Ignore rules in effect inside a directory (its ancestors' plus its own)."""
+        rules = self._rules.get(rel_dir)
+        if rules is None:
+            rules = self._rules_in(_parent(rel_dir)) if rel_dir else ()
+            for ignore_file in IGNORE_FILES:
+                candidate = os.path.join(self._full(rel_dir), ignore_file)
+                if ignore_file in names if names is not None else os.path.isfile(candidate):
+                    rules = rules + tuple(parse_ignore_file(candidate, rel_dir))
+            self._rules[rel_dir] = rules
+        return rules
+
+    def _refresh_dir(self, rel_dir: str):
+        """Rescan a directory, and any new subdirectories below it, into the index."""
+        queue = [rel_dir]
+        while queue and not self._stop.is_set():
+            current = queue.pop()
+            full = self._full(current)
+            try:
+                dir_mtime = os.stat(full).st_mtime_ns
+                with os.scandir(full) as it:
+                    listing = list(it)
+            except OSError:
+                with self._lock:
+                    self._remove_dir(current)
+                continue
+            names = {entry.name for entry in listing}
+            if current and "pyvenv.cfg" in names:
+                with self._lock:
+                    self._remove_dir(current)
+                    self._pruned.add(current)
+                continue
+            rules = self._rules_in(current, names)
+            entries: Dict[str, IndexEntry] = {}
+            for entry in listing:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                name = entry.name
+                rel_path = f"{current}/{name}" if current else name
+                is_dir = stat.S_ISDIR(st.st_mode)
+                ignored = (is_dir and name in SKIP_DIRS) or bool(rules) and is_ignored(rules, rel_path, name, is_dir)
+                entries[name] = IndexEntry(st.st_size, st.st_mtime, is_dir, ignored)
+            with self._lock:
+                old = self._dirs.get(current, {})
+                for name, entry in old.items():
+                    new = entries.get(name)
+                    if new is None or new.is_dir != entry.is_dir or new.ignored != entry.ignored:
+                        self._remove_entry(f"{current}/{name}" if current else name, entry)
+                for name, entry in entries.items():
+                    rel_path = f"{current}/{name}" if current else name
+                    previous = old.get(name)
+                    if previous is not None and previous.is_dir == entry.is_dir and previous.ignored == entry.ignored:
+                        continue
+                    if entry.ignored:
+                        if entry.is_dir:
+                            self._pruned.add(rel_path)
+                        continue
+                    self._add_name(name, rel_path)
+                    if entry.is_dir and rel_path not in self._dirs:
+                        queue.append(rel_path)
+                self._dirs[current] = entries
+                self._dir_mtimes[current] = dir_mtime
+                self._dirty = True
+            if self._inotify is not None:
+                self._watch(current)
+
+    def _refresh_file(self, rel_path: str):
+        """Update one file's size and mtime after it was written."""
+        rel_dir, _, name = rel_path.rpartition("/")
+        with self._lock:
+            entries = self._dirs.get(rel_dir)
+            entry = entries.get(name) if entries else None
+            if entry is None or entry.is_dir:
+                return
+            try:
+                st = os.stat(self._full(rel_path), follow_symlinks=False)
+            except OSError:
+                return  # A delete event follows
+            entries[name] = entry._replace(size=st.st_size, mtime=st.st_mtime)
+            self._dirty = True
+
+    def _reconcile(self):
+        """Rescan every directory whose mtime changed (entries added, removed or renamed)."""
+        for rel_dir in list(self._dirs):
+            if self._stop.is_set():
+                return
+            if rel_dir not in self._dirs:
+                continue  # Removed while reconciling
+            try:
+                changed = os.stat(self._full(rel_dir)).st_mtime_ns != self._dir_mtimes.get(rel_dir)
+            except OSError:
+                changed = True
+            if changed:
+                self._refresh_dir(rel_dir)
+
+    def _forget_rules(self, rel_dir: str):
+        prefix = rel_dir + "/"
+        for key in [k for k in self._rules if k == rel_dir or k.startswith(prefix) or not rel_dir]:
+            del self._rules[key]
+
+    # ---- Index maintenance (call with the lock held) ----
+
+    def _add_name(self, name: str, rel_path: str):
+        paths = self._by_name.get(name)
+        if paths is None:
+            paths = self._by_name[name] = set()
+            for gram in _trigrams(name):
+                self._grams.setdefault(gram, set()).add(name)
+        paths.add(rel_path)
+
+    def _remove_entry(self, rel_path: str, entry: IndexEntry):
+        if entry.ignored:
+            self._pruned.discard(rel_path)
+            return
+        name = rel_path.rpartition("/")[2]
+        paths = self._by_name.get(name)
+        if paths is not None:
+            paths.discard(rel_path)
+            if not paths:
+                del self._by_name[name]
+                for gram in _trigrams(name):
+                    names = self._grams.get(gram)
+                    if names is not None:
+                        names.discard(name)
+                        if not names:
+                            del self._grams[gram]
+        if entry.is_dir:
+            self._remove_dir(rel_path)
+
+    def _remove_dir(self, rel_dir: str):
+        """Drop a scanned directory and everything below it."""
+        self._pruned.discard(rel_dir)
+        entries = self._dirs.pop(rel_dir, None)
+        self._dir_mtimes.pop(rel_dir, None)
+        self._rules.pop(rel_dir, None)
+        for name, entry in (entries or {}).items():
+            self._remove_entry(f"{rel_dir}/{name}" if rel_dir else name, entry)
+        self._dirty = True
+
+    # ---- Watching ----
+
+    def _watch(self, rel_dir: str):
+        if self._inotify is None or rel_dir not in self._dirs or rel_dir in self._watched:
+            return
+        try:
+            self._watches[self._inotify.add_watch(self._full(rel_dir))] = rel_dir
+            self._watched.add(rel_dir)
+        except OSError as e:
+            if e.errno == 28:  # ENOSPC: out of inotify watches
+                self._fall_back(e)
+
+    def _process_events(self):
+        events = self._inotify.read(1.0)
+        if not events:
+            return
+        time.sleep(self.batch_delay)  # Let a burst (git checkout, build) finish
+        events += self._inotify.read(0)
+        dirs, files, overflow = set(), set(), False
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            rel_dir = self._watches.get(wd)
+            if mask & IN_IGNORED:
+                self._watched.discard(self._watches.pop(wd, None))
+                continue
+            if rel_dir is None or rel_dir not in self._dirs:
+                continue  # Removed from the index (e.g. newly ignored)
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                dirs.add(_parent(rel_dir) if rel_dir else "")
+            elif name in IGNORE_FILES:
+                # Ignore rules changed: re-evaluate everything below
+                self._forget_rules(rel_dir)
+                prefix = rel_dir + "/"
+                dirs.update(d for d in self._dirs if d == rel_dir or d.startswith(prefix) or not rel_dir)
+            elif mask & STRUCTURE_EVENTS:
+                dirs.add(rel_dir)
+            elif name:
+                files.add(f"{rel_dir}/{name}" if rel_dir else name)
+        if overflow:
+            self._reconcile()
+        for rel_dir in sorted(dirs):
+            if rel_dir == "" or rel_dir in self._dirs:  # Not dropped by a parent's refresh
+                self._refresh_dir(rel_dir)
+        for rel_path in files:
+            self._refresh_file(rel_path)
+
+    # ---- Persistence ----
+
+    def _load(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return False
+        with self._lock:
+            for rel_dir, (dir_mtime, entries) in data.get("dirs", {}).items():
+                self._dirs[rel_dir] = {name: IndexEntry(*values) for name, values in entries.items()}
+                self._dir_mtimes[rel_dir] = dir_mtime
+                for name, entry in self._dirs[rel_dir].items():
+                    rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                    if entry.ignored:
+                        if entry.is_dir:
+                            self._pruned.add(rel_path)
+                    else:
+                        self._add_name(name, rel_path)
+            self._pruned.update(data.get("pruned", []))
+        return True
+
+    def save(self):
+        """Write the index to disk (atomically) if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": INDEX_VERSION,
+                "root": self.root,
+                "saved_at": time.time(),
+                "dirs": {
+                    rel_dir: [self._dir_mtimes.get(rel_dir, 0), {name: list(e) for name, e in entries.items()}]
+                    for rel_dir, entries in self._dirs.items()
+                },
+                "pruned": sorted(self._pruned),
+            }
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[FILE INDEX] Failed to save: {e}")
+
+    # ---- Queries ----
+
+    def relative(self, path: str) -> Optional[str]:
+        """Path relative to the indexed root, or None if it lies outside it."""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel == ".":
+            return ""
+        if rel == ".." or rel.startswith("../"):
+            return None
+        return rel.replace(os.sep, "/")
+
+    def covers(self, path: str) -> bool:
+        """True if the index can answer for this path (its directory was scanned)."""
+        rel = self.relative(path)
+        if rel is None or not self.ready.is_set():
+            return False
+        with self._lock:
+            return rel in self._dirs or _parent(rel) in self._dirs and rel not in self._pruned
+
+    def stat(self, path: str) -> Optional[IndexEntry]:
+        """Indexed entry for a path, or None if unknown (check covers() to tell missing from unindexed)."""
+        rel = self.relative(path)
+        if rel is None:
+            return None
+        if rel == "":
+            return IndexEntry(0, 0, True)
+        rel_dir, _, name = rel.rpartition("/")
+        with self._lock:
+            entries = self._dirs.get(rel_dir)
+            return entries.get(name) if entries else None
+
+    def listdir(self, path: str) -> Optional[List[Tuple[str, IndexEntry]]]:
+        """Sorted ``(name, entry)`` pairs of a directory, or None if it was not scanned."""
+        rel = self.relative(path)
+        with self._lock:
+            entries = self._dirs.get(rel) if rel is not None else None
+            return sorted(entries.items()) if entries is not None else None
+
+    def glob(self, pattern: str, limit: Optional[int] = None, include_dirs: bool = True) -> List[str]:
+        """Indexed paths matching a glob, like file_search.walk but from memory.
+
+        Literal runs of three or more characters in the pattern's last
+        component narrow the candidates through the trigram index first.
+        """
+        regex, on_path = compile_glob(pattern)
+        last = pattern.strip("/").rpartition("/")[2]
+        grams = set()
+        for literal in re.split(r"[*?]|\[[^\]]*\]", last):
+            grams |= _trigrams(literal)
+        results = []
+        with self._lock:
+            if grams:
+                postings = sorted((self._grams.get(g, set()) for g in grams), key=len)
+                names = set(postings[0]).intersection(*postings[1:])
+            else:
+                names = self._by_name.keys()
+            for name in sorted(names):
+                if not on_path and not regex.match(name):
+                    continue
+                for rel_path in sorted(self._by_name.get(name, ())):
+                    if on_path and not regex.match(rel_path):
+                        continue
+                    if not include_dirs:
+                        entry = self._dirs.get(_parent(rel_path), {}).get(name)
+                        if entry is None or entry.is_dir:
+                            continue
+                    results.append(rel_path)
+                    if limit is not None and len(results) >= limit:
+                        return results
+        return results
+
+    def file_count(self) -> int:
+        with self._lock:
+            return sum(len(paths) for paths in self._by_name.values())
@@ -0,0 +1,326 @@
+"""Streaming file search for the AI tools (``/ai search-files``).
+
+``walk`` scans the tree with ``os.scandir``, fanning directories out across
+a small thread pool (scandir releases the GIL while it waits on the disk),
+skips VCS/dependency/virtualenv directories and anything matched by
+``.gitignore``/``.ignore`` files, and yields matches as they are found so
+callers can stop at a limit without touching the rest of the tree.
+``grep`` searches file bodies in parallel on top of it. ``confine``
+checks a path asked for by a (possibly remote) user before the tools
+touch it.
+"""
+
+import concurrent.futures
+import fnmatch
+import os
+import queue
+import re
+import threading
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Never worth descending into
+SKIP_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".phosphor",
+})
+IGNORE_FILES = (".gitignore", ".ignore")
+
+
+class _Rule(NamedTuple):
+    base: str  # Directory (relative to the search root) the ignore file lives in
+    pattern: str
+    negate: bool
+    dir_only: bool
+    anchored: bool
+
+
+class PathRefused(ValueError):
+    """A path the file tools will not serve: outside the root, hidden, or ignored."""
+
+
+class GrepMatch(NamedTuple):
+    path: str
+    line_number: int
+    line: str
+
+
+def parse_ignore_file(path: str, base: str) -> List[_Rule]:
+    """Read gitignore-style rules (``!``, trailing ``/``, leading ``/``, ``**``)."""
+    rules = []
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if line.startswith("**/"):
+            line, anchored = line[3:], "/" in line[3:]
+        if line:
+            rules.append(_Rule(base, line, negate, dir_only, anchored))
+    return rules
+
+
+def is_ignored(rules: Tuple[_Rule, ...], rel_path: str, name: str, is_dir: bool) -> bool:
+    """Apply rules in order; the last one that matches decides."""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.anchored:
+            if rule.base:
+                if not rel_path.startswith(rule.base + "/"):
+                    continue
+                target = rel_path[len(rule.base) + 1:]
+            else:
+                target = rel_path
+            matched = fnmatch.fnmatchcase(target, rule.pattern)
+        else:
+            matched = fnmatch.fnmatchcase(name, rule.pattern)
+        if matched:
+            ignored = not rule.negate
+    return ignored
+
+
+def is_hidden(rel_path: str) -> bool:
+    """True if any component of a relative path is a dotfile or dot-directory (.env, .ssh/...)."""
+    return any(part.startswith(".") and part not in (".", "..") for part in rel_path.split("/"))
+
+
+def ignore_rules(root: str, rel_dir: str) -> Tuple[_Rule, ...]:
+    """Ignore rules in effect inside ``rel_dir``: its own ignore files and its parents'."""
+    rules: Tuple[_Rule, ...] = ()
+    current = ""
+    for name in [""] + (rel_dir.split("/") if rel_dir else []):
+        current = f"{current}/{name}" if current else name
+        for ignore_file in IGNORE_FILES:
+            rules += tuple(parse_ignore_file(os.path.join(root, current, ignore_file), current))
+    return rules
+
+
+def confine(root: str, path: str, check_ignored: bool = True) -> str:
+    """The path relative to ``root`` ('' for root itself), if the file tools may serve it.
+
+    Refuses absolute paths, ``..``, symlinks that resolve outside the root,
+    hidden files and directories, and (with check_ignored) anything a
+    walk would skip: VCS/dependency directories and ignore-file matches.
+
+    Args:
+        root: Directory the tools are confined to
+        path: Path as the user gave it, relative to root
+        check_ignored: Also refuse ignored paths (walk results already are not)
+
+    Raises:
+        PathRefused: with the reason, suitable to show the user
+    """
+    if os.path.isabs(path) or path.startswith("~"):
+        raise PathRefused(f"{path}: only paths inside the working tree are allowed")
+    parts = [part for part in path.replace("\\", "/").split("/") if part not in ("", ".")]
+    if ".." in parts:
+        raise PathRefused(f"{path}: '..' is not allowed")
+    real_root = os.path.realpath(root)
+    real = os.path.realpath(os.path.join(real_root, *parts))
+    if real != real_root and not real.startswith(real_root + os.sep):
+        raise PathRefused(f"{path}: resolves outside the working tree")
+    rel = os.path.relpath(real, real_root).replace(os.sep, "/")
+    rel = "" if rel == "." else rel
+    if is_hidden("/".join(parts)) or is_hidden(rel):
+        raise PathRefused(f"{path}: hidden files are not available")
+    if check_ignored and rel:
+        # Ignored if the path or any directory above it is, as in a walk
+        names = rel.split("/")
+        is_dir = os.path.isdir(real)
+        rules: Tuple[_Rule, ...] = ()
+        prefix = ""
+        for depth, name in enumerate(names):
+            for ignore_file in IGNORE_FILES:
+                rules += tuple(parse_ignore_file(os.path.join(real_root, prefix, ignore_file), prefix))
+            prefix = f"{prefix}/{name}" if prefix else name
+            name_is_dir = is_dir or depth < len(names) - 1
+            if (name_is_dir and name in SKIP_DIRS) or (rules and is_ignored(rules, prefix, name, name_is_dir)):
+                raise PathRefused(f"{path}: ignored")
+    return rel
+
+
+def _scan(root: str, rel_dir: str, rules: Tuple[_Rule, ...]):
+    """List one directory: ``(entries, subdirs)`` after ignore rules.
+
+    entries are ``(rel_path, name, is_dir)``; subdirs are ``(rel_dir, rules)``
+    work items for the next level. A virtualenv (has ``pyvenv.cfg``) lists
+    as empty.
+    """
+    full_dir = os.path.join(root, rel_dir) if rel_dir else root
+    try:
+        with os.scandir(full_dir) as it:
+            listing = list(it)
+    except OSError:
+        return [], []  # Vanished or unreadable directory
+    names = {entry.name for entry in listing}
+    if rel_dir and "pyvenv.cfg" in names:
+        return [], []
+    for ignore_file in IGNORE_FILES:
+        if ignore_file in names:
+            rules = rules + tuple(parse_ignore_file(os.path.join(full_dir, ignore_file), rel_dir))
+    entries, subdirs = [], []
+    for entry in listing:
+        name = entry.name
+        rel_path = f"{rel_dir}/{name}" if rel_dir else name
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir and name in SKIP_DIRS:
+            continue
+        if rules and is_ignored(rules, rel_path, name, is_dir):
+            continue
+        entries.append((rel_path, name, is_dir))
+        if is_dir:
+            subdirs.append((rel_path, rules))
+    entries.sort()
+    return entries, subdirs
+
+
+def compile_glob(pattern: str) -> Tuple["re.Pattern[str]", bool]:
+    """rglob-style match: plain patterns test the name, patterns with '/' the relative path.
+
+    Returns ``(regex, match_on_path)``.
+    """
+    if "/" in pattern:
+        return re.compile(fnmatch.translate(pattern.strip("/"))), True
+    return re.compile(fnmatch.translate(pattern)), False
+
+
+def _scan_worker(root: str, work: queue.SimpleQueue, results: queue.SimpleQueue, stop: threading.Event):
+    while True:
+        item = work.get()
+        if item is None:
+            return
+        results.put(([], []) if stop.is_set() else _scan(root, *item))
+
+
+def walk(root: str = ".", pattern: str = "*", limit: Optional[int] = None,
+         workers: int = 4, include_dirs: bool = True, include_hidden: bool = True) -> Iterator[str]:
+    """Yield paths (relative to root) matching a glob, as they are found.
+
+    Args:
+        root: Directory to search
+        pattern: Glob for the file name (or for the relative path if it contains '/')
+        limit: Stop after this many matches; queued directory scans are abandoned
+        workers: Threads scanning directories concurrently (1 = scan inline)
+        include_dirs: Also yield matching directories (rglob does)
+        include_hidden: Also yield dotfiles and descend into dot-directories
+    """
+    if limit is not None and limit <= 0:
+        return
+    regex, on_path = compile_glob(pattern)
+    work: queue.SimpleQueue = queue.SimpleQueue()
+    results: queue.SimpleQueue = queue.SimpleQueue()
+    stop = threading.Event()
+    threads = []
+    if workers > 1:
+        threads = [
+            threading.Thread(target=_scan_worker, args=(root, work, results, stop),
+                             name=f"file-search-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        next_result = results.get
+    else:
+        def next_result():
+            return _scan(root, *work.get())
+    found = 0
+    work.put(("", ()))
+    outstanding = 1
+    try:
+        while outstanding:
+            entries, subdirs = next_result()
+            outstanding -= 1
+            for subdir in subdirs:
+                if include_hidden or not subdir[0].rpartition("/")[2].startswith("."):
+                    work.put(subdir)
+                    outstanding += 1
+            for rel_path, name, is_dir in entries:
+                if not include_hidden and name.startswith("."):
+                    continue
+                if (include_dirs or not is_dir) and regex.match(rel_path if on_path else name):
+                    yield rel_path
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+    finally:
+        stop.set()
+        for _ in threads:
+            work.put(None)
+
+
+def _grep_file(root: str, rel_path: str, regex: "re.Pattern[bytes]",
+               max_size: int, per_file: int) -> List[GrepMatch]:
+    """Matching lines of one file (skips large and binary files)."""
+    path = os.path.join(root, rel_path)
+    try:
+        if os.path.getsize(path) > max_size:
+            return []
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    if b"\0" in data[:8192] or not regex.search(data):
+        return []  # Binary, or no match anywhere: skip splitting lines
+    results = []
+    for number, line in enumerate(data.splitlines(), 1):
+        if regex.search(line):
+            results.append(GrepMatch(rel_path, number, line.decode("utf-8", "replace").strip()))
+            if len(results) >= per_file:
+                break
+    return results
+
+
+def grep(paths: Iterable[str], pattern: str, root: str = ".", limit: Optional[int] = None,
+         workers: int = 8, ignore_case: bool = False, max_size: int = 8 * 1024 * 1024,
+         per_file: int = 20) -> Iterator[GrepMatch]:
+    """Search file bodies for a regex in parallel, yielding matches as files finish.
+
+    Args:
+        paths: Relative paths to search (e.g. from walk); consumed lazily
+        pattern: Regular expression (matched against UTF-8 bytes)
+        limit: Stop after this many matching lines
+        workers: Files read and searched concurrently
+        ignore_case: Case-insensitive match
+        max_size: Skip files larger than this
+        per_file: At most this many lines reported per file
+    """
+    regex = re.compile(pattern.encode("utf-8"), re.IGNORECASE if ignore_case else 0)
+    paths = iter(paths)
+    window = max(1, workers) * 4  # Bound files in flight so an early stop wastes little
+    found = 0
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="file-grep")
+    pending = set()
+    try:
+        while True:
+            for rel_path in paths:
+                pending.add(pool.submit(_grep_file, root, rel_path, regex, max_size, per_file))
+                if len(pending) >= window:
+                    break
+            if not pending:
+                return
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                for match in future.result():
+                    yield match
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,212 @@
+"""Indexed fuzzy matching for search boxes and completion."""
+
+import bisect
+import heapq
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Match tiers, best first
+TIER_PREFIX = 0  # "pyt" -> "python"
+TIER_WORD = 1  # "dev" -> "python-dev" (starts at a word boundary)
+TIER_SUBSTRING = 2  # "tho" -> "python"
+TIER_SUBSEQUENCE = 3  # "pydv" -> "python-dev"
+
+_WORD_BREAKS = frozenset(" -_./#&:")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and drop channel sigils so '#py' and 'py' match the same way."""
+    return text.lower().lstrip("#&")
+
+
+def match_tier(text: str, q: str) -> Optional[int]:
+    """Tier of a single normalized ``text`` for normalized query ``q``, or None."""
+    pos = text.find(q)
+    if pos == 0:
+        return TIER_PREFIX
+    if pos > 0:
+        return TIER_WORD if text[pos - 1] in _WORD_BREAKS else TIER_SUBSTRING
+    chars = iter(text)
+    if all(c in chars for c in q):
+        return TIER_SUBSEQUENCE
+    return None
+
+
+class FuzzyIndex:
+    """Ranked fuzzy matcher over a set of items.
+
+    Items are stored in rank order (best first), so ids double as rank and
+    every scan visits the best candidates first. Results are ordered by
+    match tier, then rank:
+
+    - prefix matches come straight from a sorted key list (plus a table of
+      1-2 character prefixes), so they are exact and need no scan
+    - substring matches scan the shortest bigram posting list for the query;
+      when the query only grows, the previous match list is refined instead
+    - subsequence matches are a fallback that scans at most ``scan_budget``
+      candidates from the shortest character posting list
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Any] = (),
+        key: Callable[[Any], str] = str,
+        rank: Optional[Callable[[Any], float]] = None,
+        scan_budget: int = 1000,
+    ):
+        """
+        Args:
+            items: Things to search
+            key: Text to match against for an item
+            rank: Static score, higher is better; defaults to the given order
+            scan_budget: Max candidates verified per scan once enough results
+                are in hand
+        """
+        self.key = key
+        self.rank = rank
+        self.scan_budget = scan_budget
+        self.items: List[Any] = []
+        self.keys: List[str] = []
+        self.rebuild(items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def rebuild(self, items: Iterable[Any]):
+        """Replace the indexed items."""
+        items = list(items)
+        if self.rank:
+            items.sort(key=self.rank, reverse=True)
+        self.items = []
+        self.keys = []
+        self._sorted_keys: List[Tuple[str, int]] = []
+        self._short_prefixes: Dict[str, List[int]] = {}  # 1-2 char prefix -> ids
+        self._chars: Dict[str, List[int]] = {}  # char -> ids containing it
+        self._bigrams: Dict[str, List[int]] = {}  # bigram -> ids containing it
+        self._last: Optional[Tuple[str, List[int]]] = None  # (query, all substring matches)
+        self._append(items)
+
+    def extend(self, items: Iterable[Any]):
+        """Add items at the end, after everything already indexed.
+
+        Cheaper than rebuild() for streamed input, but new items rank below
+        existing ones until the next rebuild.
+        """
+        self._append(list(items))
+
+    def _append(self, items: List[Any]):
+        start = len(self.items)
+        chars, bigrams, short = self._chars, self._bigrams, self._short_prefixes
+        new_keys = []
+        for offset, item in enumerate(items):
+            i = start + offset
+            text = normalize(self.key(item))
+            self.items.append(item)
+            self.keys.append(text)
+            new_keys.append((text, i))
+            for char in set(text):
+                chars.setdefault(char, []).append(i)
+            for gram in {text[j:j + 2] for j in range(len(text) - 1)}:
+                bigrams.setdefault(gram, []).append(i)
+            short.setdefault(text[:1], []).append(i)
+            if len(text) > 1:
+                short.setdefault(text[:2], []).append(i)
+        if new_keys:
+            if start:
+                self._sorted_keys = sorted(self._sorted_keys + new_keys)
+            else:
+                self._sorted_keys = sorted(new_keys)
+        self._last = None
+
+    def search(self, query: str, limit: int = 8) -> List[Any]:
+        """Return up to ``limit`` best matches for ``query``."""
+        return [self.items[i] for _, i in self.search_scored(query, limit)]
+
+    def search_scored(self, query: str, limit: int = 8) -> List[Tuple[int, int]]:
+        """Return ``(tier, id)`` pairs for the best matches, best first."""
+        q = normalize(query)
+        if not q:
+            return [(TIER_PREFIX, i) for i in range(min(limit, len(self.items)))]
+
+        prefix = self._prefix_matches(q, limit)
+        results = [(TIER_PREFIX, i) for i in prefix]
+        if len(results) >= limit:
+            return results
+
+        word, substring = self._substring_matches(q, limit)
+        results += [(TIER_WORD, i) for i in word]
+        results += [(TIER_SUBSTRING, i) for i in substring]
+        if len(results) >= limit:
+            return results[:limit]
+
+        seen = {i for _, i in results}
+        results += [(TIER_SUBSEQUENCE, i) for i in self._subsequence_matches(q, limit - len(results), seen)]
+        return results
+
+    def _prefix_matches(self, q: str, limit: int) -> List[int]:
+        """Best-ranked ids whose key starts with ``q``."""
+        if len(q) <= 2:
+            return self._short_prefixes.get(q, [])[:limit]
+        lo = bisect.bisect_left(self._sorted_keys, (q,))
+        hi = bisect.bisect_left(self._sorted_keys, (q + "\uffff",), lo)
+        return heapq.nsmallest(limit, (i for _, i in self._sorted_keys[lo:hi]))
+
+    def _substring_matches(self, q: str, limit: int) -> Tuple[List[int], List[int]]:
+        """Non-prefix substring matches, split into word-start and mid-word."""
+        if self._last and q.startswith(self._last[0]):
+            # The query only grew: every match is among the previous ones
+            source = self._last[1]
+        elif len(q) == 1:
+            source = self._chars.get(q, [])
+        else:
+            source = self._shortest(self._bigrams, [q[j:j + 2] for j in range(len(q) - 1)])
+
+        keys = self.keys
+        word: List[int] = []
+        substring: List[int] = []
+        matched = []
+        complete = True
+        for scanned, i in enumerate(source, 1):
+            text = keys[i]
+            pos = text.find(q)
+            if pos < 0:
+                continue
+            matched.append(i)
+            if pos == 0:
+                continue  # Already counted as a prefix match
+            if text[pos - 1] in _WORD_BREAKS:
+                if len(word) < limit:
+                    word.append(i)
+            elif len(substring) < limit:
+                substring.append(i)
+            if len(word) >= limit or (scanned >= self.scan_budget and len(word) + len(substring) >= limit):
+                complete = False  # Nothing later can outrank what we have (or we're out of budget)
+                break
+        self._last = (q, matched) if complete else None
+        return word, substring
+
+    def _subsequence_matches(self, q: str, limit: int, seen: set) -> List[int]:
+        """Ids whose key contains the query's characters in order."""
+        source = self._shortest(self._chars, set(q))
+        # "[^a]*a[^b]*b..." can't backtrack, unlike "a.*?b.*?"
+        search = re.compile("".join(f"[^{re.escape(c)}]*{re.escape(c)}" for c in q)).match
+        keys = self.keys
+        found = []
+        for i in source[:self.scan_budget // 2]:
+            if i not in seen and search(keys[i]):
+                found.append(i)
+                if len(found) >= limit:
+                    break
+        return found
+
+    @staticmethod
+    def _shortest(postings: Dict[str, List[int]], grams) -> List[int]:
+        """Shortest posting list among ``grams`` (empty if any gram is missing)."""
+        best = None
+        for gram in grams:
+            bucket = postings.get(gram)
+            if bucket is None:
+                return []
+            if best is None or len(bucket) < len(best):
+                best = bucket
+        return best or []
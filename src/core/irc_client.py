@@ -1,9 +1,38 @@
 """IRC client wrapper using miniirc library."""
 
 import asyncio
+import fnmatch
 import miniirc
 from typing import Callable, Optional
 import threading
+import time
+
+from src.core import metrics, tracing
+from src.core.dcc import DccRequest, parse_ctcp
+from src.core.ircv3 import CapabilityNegotiator, format_server_time, parse_server_time
+from src.core.storm import StormBuffer
+
+IRC_LINES = metrics.counter("phosphor_irc_lines_total", "IRC lines received, by command", ("command",))
+MEMBER_APPLY = metrics.histogram("phosphor_member_apply_seconds", "Time to apply a window of membership events")
+MEMBER_EVENTS = metrics.counter("phosphor_member_events_total", "JOIN/PART/QUIT/NICK events applied", ("kind",))
+
+
+class _NegotiatingIRC(miniirc.IRC):
+    """miniirc.IRC without its built-in CAP negotiation.
+    
+    miniirc's global CAP handler sends its own CAP REQ and CAP END, which
+    would race CapabilityNegotiator's. CAP replies go only to this
+    client's own handlers; everything else is dispatched as usual.
+    """
+    
+    def _handle(self, cmd, hostmask, tags, args):
+        if str(cmd).upper() != 'CAP':
+            return super()._handle(cmd, hostmask, tags, args)
+        hostmask = tuple(hostmask)
+        handled = self._start_handler(self.handlers.get('CAP', []), 'CAP', hostmask, tags, args)
+        if None in self.handlers:
+            self._start_handler(self.handlers[None], 'CAP', hostmask, tags, args)
+        return handled
 
 
 class IRCClient:
@@ -20,20 +49,42 @@ class IRCClient:
         self.channel_list_callback: Optional[Callable] = None
         self.join_callback: Optional[Callable] = None  # Callback for successful joins
         self.nick_callback: Optional[Callable] = None  # Callback for nickname changes/confirmation
+        self.history_callback: Optional[Callable] = None  # Callback for CHATHISTORY pages
+        self.summary_callback: Optional[Callable] = None  # Callback for aggregated split/join lines
+        self.dcc_callback: Optional[Callable] = None  # Callback for DCC SEND/RESUME/ACCEPT requests
+        self.user_hosts = {}  # nick (lowercase) -> host from their last PRIVMSG, for DCC reachability
         self.channel_members = {}  # Track members per channel
         self._names_in_progress = set()  # Track which channels are receiving NAMES
-        self._channel_list = []  # Store channel list from LIST command
+        self._channel_list = []  # LIST entries not yet delivered to channel_list_callback
+        self._list_filter = None  # (mask, min_users) still to check client-side, or None
+        self.list_chunk_size = 250  # Deliver LIST results in chunks of this many entries
         self.client = None
         self._thread = None
         self._nick_attempt = 0  # Track nickname attempts
         self._nick_confirmed = False  # Track if nick is confirmed
         self._max_nick_attempts = 99  # Max number suffix to try
+        self.caps = CapabilityNegotiator(send=self._send_raw)
+        self.away_users = {}  # nick -> away message (kept current by away-notify)
+        self.member_prefixes = {}  # channel -> {nick: prefixes} (all of them with multi-prefix)
+        self._batches = {}  # Open IRCv3 batches: ref -> {'type', 'params', 'messages'}
+        self.isupport = {}  # RPL_ISUPPORT (005) tokens: name -> value
+        self._history_requests = {}  # channel -> {'direction', 'limit', 'pages', 'since'} for CHATHISTORY paging
+        self.history_page_size = 100
+        self.history_max_pages = 10  # Cap on how far back a gap fetch pages from the newest message
+        # JOIN/PART/QUIT/NICK are buffered and applied in windows so netsplits
+        # don't rebuild member lists once per line
+        self._members_lock = threading.RLock()
+        self.storm = StormBuffer(apply=self._apply_membership, summary=self._emit_summary)
         
     async def connect(self):
         """Connect to IRC server."""
+        self.caps.reset()
+        self._batches.clear()
+        self.storm.cancel()
+        
         # miniirc runs in its own thread
         def run_client():
-            client = miniirc.IRC(
+            client = _NegotiatingIRC(
                 ip=self.host,
                 port=self.port,
                 nick=self.nick,
@@ -43,6 +94,7 @@ class IRCClient:
                 ns_identity=None,
                 connect_modes=None,
                 quit_message="Goodbye!",
+                ircv3_caps=set(),  # Unused: _NegotiatingIRC leaves CAP to CapabilityNegotiator
                 auto_connect=False  # Don't auto-connect, we'll do it explicitly
             )
             
@@ -50,16 +102,104 @@ class IRCClient:
             self.client = client
             
             # Set up handlers
-            @client.Handler('PRIVMSG')
-            def handle_privmsg(irc, hostmask, args):
+            @client.CmdHandler(colon=False)  # No events: every line
+            def count_lines(irc, command, hostmask, args):
+                IRC_LINES.inc(command=command)
+            
+            @client.Handler('PRIVMSG', ircv3=True)
+            @tracing.traced("irc.PRIVMSG", "irc")
+            def handle_privmsg(irc, hostmask, tags, args):
                 # Strip any IRC protocol artifacts (leading colons)
                 nick = hostmask[0].lstrip(':')
                 target = args[0].lstrip(':')
                 message = args[1].lstrip(':') if len(args) > 1 else ""
+                batch = self._batch_for(tags)
+                if batch is not None and batch['type'] in ('chathistory', 'draft/chathistory'):
+                    # Backlog, not live traffic - deliver as one page when the batch closes
+                    batch['messages'].append({
+                        'nick': nick,
+                        'text': message,
+                        'ts': parse_server_time(tags),
+                        'msgid': tags.get('msgid') if tags else None,
+                    })
+                    return
+                if len(hostmask) > 2:
+                    self.user_hosts[nick.lower()] = hostmask[2]
+                if message.startswith('\x01DCC ') and not target.startswith(('#', '&')):
+                    # CTCP DCC goes to the transfer manager, not the chat (nor our own, echoed back)
+                    request = parse_ctcp(message)
+                    if request and self.dcc_callback and nick != self.get_confirmed_nick():
+                        self.dcc_callback(nick, request)
+                    return
                 if self.message_callback:
-                    self.message_callback(nick, target, message)
+                    self.message_callback(nick, target, message, parse_server_time(tags),
+                                          tags.get('msgid') if tags else None)
+            
+            @client.Handler('CAP', colon=False)
+            @tracing.traced("irc.CAP", "irc")
+            def handle_cap(irc, hostmask, args):
+                self.caps.handle(args)
+                # miniirc only sends message tags if it sees message-tags enabled
+                irc.active_caps = set(self.caps.enabled)
+            
+            @client.Handler('BATCH', colon=False, ircv3=True)
+            @tracing.traced("irc.BATCH", "irc")
+            def handle_batch(irc, hostmask, tags, args):
+                """Track IRCv3 batches so grouped events are handled as one unit."""
+                if not args or len(args[0]) < 2:
+                    return
+                ref = args[0][1:]
+                if args[0].startswith('+'):
+                    batch_type = args[1] if len(args) > 1 else ""
+                    self._batches[ref] = {
+                        'type': batch_type,
+                        'params': args[2:],
+                        'messages': [],
+                    }
+                    if batch_type in ('netsplit', 'netjoin'):
+                        self.storm.hold()
+                elif args[0].startswith('-'):
+                    batch = self._batches.pop(ref, None)
+                    if not batch:
+                        return
+                    if batch['type'] in ('netsplit', 'netjoin'):
+                        # params are the two servers either side of the split
+                        self.storm.release(" ↔ ".join(batch['params'][:2]) or None)
+                    elif batch['type'] in ('chathistory', 'draft/chathistory') and batch['params']:
+                        self._finish_history_page(batch['params'][0], batch['messages'])
+            
+            @client.Handler('005', colon=False)  # RPL_ISUPPORT
+            @tracing.traced("irc.005", "irc")
+            def handle_isupport(irc, hostmask, args):
+                # args: [nick, 'TOKEN=value', ..., 'are supported by this server']
+                for token in args[1:-1]:
+                    name, _, value = token.partition('=')
+                    if name.startswith('-'):
+                        self.isupport.pop(name[1:], None)
+                    else:
+                        self.isupport[name] = value
+            
+            @client.Handler('FAIL', colon=False)
+            @tracing.traced("irc.FAIL", "irc")
+            def handle_fail(irc, hostmask, args):
+                # FAIL CHATHISTORY <code> [target] :description
+                if args and args[0] == 'CHATHISTORY':
+                    print(f"[IRC DEBUG] CHATHISTORY failed: {args}")
+                    if len(args) >= 3:
+                        self._history_requests.pop(args[2], None)
+            
+            @client.Handler('AWAY', colon=False)
+            @tracing.traced("irc.AWAY", "irc")
+            def handle_away(irc, hostmask, args):
+                """away-notify: keep away state current without WHO polling."""
+                nick = hostmask[0].lstrip(':')
+                if args and args[-1]:
+                    self.away_users[nick] = args[-1]
+                else:
+                    self.away_users.pop(nick, None)
             
             @client.Handler('353', colon=False)  # RPL_NAMREPLY
+            @tracing.traced("irc.353", "irc")
             def handle_names(irc, hostmask, args):
                 # miniirc format: args = ['yournick', '=', '#channel', 'nick1 nick2 nick3']
                 if len(args) >= 4:
@@ -69,11 +209,7 @@ class IRCClient:
                     # Strip IRC prefixes (@, +, etc.) and any remaining colons
                     clean_names = [name.lstrip('@+%&~:') for name in names]
                     
-                    if channel not in self._names_in_progress:
-                        self._names_in_progress.add(channel)
-                        self.channel_members[channel] = []
-                    
-                    self.channel_members[channel].extend(clean_names)
+                    self._add_names(channel, clean_names, names)
                 elif len(args) >= 3:
                     channel = args[1] if args[0] in ('=', '*', '@') else args[0]
                     names_str = args[-1].lstrip(':')  # Strip IRC protocol colon
@@ -81,17 +217,15 @@ class IRCClient:
                     # Strip IRC prefixes (@, +, etc.) and any remaining colons
                     clean_names = [name.lstrip('@+%&~:') for name in names]
                     
-                    if channel not in self._names_in_progress:
-                        self._names_in_progress.add(channel)
-                        self.channel_members[channel] = []
-                    
-                    self.channel_members[channel].extend(clean_names)
+                    self._add_names(channel, clean_names, names)
             
             @client.Handler('366', colon=False)  # RPL_ENDOFNAMES
+            @tracing.traced("irc.366", "irc")
             def handle_names_end(irc, hostmask, args):
                 if len(args) >= 2:
                     channel = args[1]
-                    self._names_in_progress.discard(channel)
+                    with self._members_lock:
+                        self._names_in_progress.discard(channel)
                     if self.members_callback and channel in self.channel_members:
                         self.members_callback(channel, self.channel_members[channel])
                     # Notify that channel join is complete
@@ -99,77 +233,64 @@ class IRCClient:
                         self.join_callback(channel, True)
             
             @client.Handler('JOIN')
+            @tracing.traced("irc.JOIN", "irc")
             def handle_join(irc, hostmask, args):
-                nick = hostmask[0].lstrip(':')
-                channel = args[0].lstrip(':')
-                if channel not in self.channel_members:
-                    self.channel_members[channel] = []
-                if nick not in self.channel_members[channel]:
-                    self.channel_members[channel].append(nick)
-                    if self.members_callback:
-                        self.members_callback(channel, self.channel_members[channel])
+                self.storm.push('join', hostmask[0].lstrip(':'), args[0].lstrip(':'))
             
             @client.Handler('PART')
+            @tracing.traced("irc.PART", "irc")
             def handle_part(irc, hostmask, args):
-                nick = hostmask[0].lstrip(':')
-                channel = args[0].lstrip(':')
-                if channel in self.channel_members and nick in self.channel_members[channel]:
-                    self.channel_members[channel].remove(nick)
-                    if self.members_callback:
-                        self.members_callback(channel, self.channel_members[channel])
+                self.storm.push('part', hostmask[0].lstrip(':'), args[0].lstrip(':'))
             
             @client.Handler('QUIT')
+            @tracing.traced("irc.QUIT", "irc")
             def handle_quit(irc, hostmask, args):
-                nick = hostmask[0].lstrip(':')
-                # Remove from all channels
-                for channel in self.channel_members:
-                    if nick in self.channel_members[channel]:
-                        self.channel_members[channel].remove(nick)
-                if self.members_callback:
-                    for channel in self.channel_members:
-                        self.members_callback(channel, self.channel_members[channel])
+                reason = args[0].lstrip(':') if args else ""
+                self.storm.push('quit', hostmask[0].lstrip(':'), detail=reason)
             
             @client.Handler('322')  # RPL_LIST
+            @tracing.traced("irc.322", "irc")
             def handle_list(irc, hostmask, args):
-                """Handle channel list entry."""
-                print(f"[IRC DEBUG] RPL_LIST received: {args}")
+                """Handle channel list entry, delivering results in chunks."""
                 # args: [nick, '#channel', 'user_count', ':topic']
                 if len(args) >= 4:
                     channel = args[1]
                     user_count = int(args[2]) if args[2].isdigit() else 0
-                    topic = args[3].lstrip(':') if len(args) > 3 else ""
+                    if not self._list_matches(channel, user_count):
+                        return
                     self._channel_list.append({
                         'name': channel,
                         'users': user_count,
-                        'topic': topic
+                        'topic': args[3].lstrip(':'),
                     })
-                    print(f"[IRC DEBUG] Added channel: {channel} ({user_count} users)")
+                    if len(self._channel_list) >= self.list_chunk_size:
+                        self._deliver_list(done=False)
             
             @client.Handler('323')  # RPL_LISTEND
+            @tracing.traced("irc.323", "irc")
             def handle_list_end(irc, hostmask, args):
                 """Handle end of channel list."""
-                print(f"[IRC DEBUG] RPL_LISTEND received, {len(self._channel_list)} channels total")
-                if self.channel_list_callback:
-                    print(f"[IRC DEBUG] Calling callback with {len(self._channel_list)} channels")
-                    self.channel_list_callback(self._channel_list.copy())
-                else:
-                    print("[IRC DEBUG] No callback set!")
-                self._channel_list.clear()
+                self._deliver_list(done=True)
+                self._list_filter = None
             
             # Debug: catch LIST-related errors
             @client.Handler('263')  # RPL_TRYAGAIN
+            @tracing.traced("irc.263", "irc")
             def handle_try_again(irc, hostmask, args):
                 print(f"[IRC DEBUG] Server says try again: {args}")
             
             @client.Handler('481')  # ERR_NOPRIVILEGES  
+            @tracing.traced("irc.481", "irc")
             def handle_no_privileges(irc, hostmask, args):
                 print(f"[IRC DEBUG] No privileges error: {args}")
             
             @client.Handler('421')  # ERR_UNKNOWNCOMMAND
+            @tracing.traced("irc.421", "irc")
             def handle_unknown_command(irc, hostmask, args):
                 print(f"[IRC DEBUG] Unknown command error: {args}")
             
             @client.Handler('433')  # ERR_NICKNAMEINUSE
+            @tracing.traced("irc.433", "irc")
             def handle_nick_in_use(irc, hostmask, args):
                 """Handle nickname already in use - try with new random suffix."""
                 import random
@@ -185,6 +306,7 @@ class IRCClient:
                 irc.quote('NICK', new_nick, force=True)
             
             @client.Handler('001')  # RPL_WELCOME - nickname confirmed
+            @tracing.traced("irc.001", "irc")
             def handle_welcome(irc, hostmask, args):
                 """Handle welcome message - nickname is now confirmed."""
                 # The first arg after our nick in 001 is usually the welcome message
@@ -198,11 +320,18 @@ class IRCClient:
                 self.nick = confirmed_nick
                 self._nick_confirmed = True
                 
+                # Registration is over; if the server never answered CAP LS
+                # during it, negotiate now (CAP REQ is valid after 001 too)
+                self.caps.registered = True
+                if self.caps.state == "idle":
+                    self.caps.start()
+                
                 if self.nick_callback:
                     changed = confirmed_nick != self.original_nick
                     self.nick_callback(confirmed_nick, True, "connected" if not changed else f"nickname changed to {confirmed_nick}")
             
             @client.Handler('NICK')
+            @tracing.traced("irc.NICK", "irc")
             def handle_nick_change(irc, hostmask, args):
                 """Handle nickname changes (including our own)."""
                 old_nick = hostmask[0].lstrip(':')
@@ -213,16 +342,12 @@ class IRCClient:
                     self.nick = new_nick
                     if self.nick_callback:
                         self.nick_callback(new_nick, True, f"nickname changed to {new_nick}")
-                # Update in channel member lists
-                for channel in self.channel_members:
-                    if old_nick in self.channel_members[channel]:
-                        self.channel_members[channel].remove(old_nick)
-                        self.channel_members[channel].append(new_nick)
-                        if self.members_callback:
-                            self.members_callback(channel, self.channel_members[channel])
+                # Member lists are updated with the rest of the membership window
+                self.storm.push('nick', old_nick, detail=new_nick)
             
             # Sync our nick property with miniirc's current_nick periodically
             @client.Handler('PING')
+            @tracing.traced("irc.PING", "irc")
             def handle_ping_sync(irc, hostmask, args):
                 """Sync nick on PING to ensure we stay in sync with server."""
                 if hasattr(irc, 'current_nick') and irc.current_nick and irc.current_nick != self.nick:
@@ -239,6 +364,195 @@ class IRCClient:
         # Don't block here - let the app poll for client readiness
         await asyncio.sleep(0.1)
     
+    def _send_raw(self, line: str):
+        """Send a raw protocol line, bypassing miniirc's pre-registration queue."""
+        if self.client:
+            self.client.quote(line, force=True)
+    
+    def _batch_for(self, tags: Optional[dict]) -> Optional[dict]:
+        """Return the open batch an event belongs to, if any."""
+        ref = tags.get('batch') if tags else None
+        return self._batches.get(ref) if ref else None
+    
+    def _add_names(self, channel: str, clean_names: list[str], names: list[str]):
+        """Collect one RPL_NAMREPLY line; the first line of a reply resets the list."""
+        with self._members_lock:
+            first = channel not in self._names_in_progress
+        if first:
+            # NAMES is authoritative - apply anything older first. Not under
+            # _members_lock: a timer flush holds the storm's flush lock while
+            # it waits for ours in _apply_membership
+            self.storm.flush()
+        with self._members_lock:
+            if channel not in self._names_in_progress:
+                self._names_in_progress.add(channel)
+                self.channel_members[channel] = []
+                self.member_prefixes[channel] = {}
+            self.channel_members[channel].extend(clean_names)
+            self._record_prefixes(channel, names)
+    
+    @tracing.traced("irc.apply_membership", "irc")
+    def _apply_membership(self, events: list) -> dict:
+        """Apply a window of JOIN/PART/QUIT/NICK events in one pass.
+        
+        Each touched channel's list is turned into an ordered dict once, so
+        every event is O(1) no matter how large the channel is, and
+        members_callback fires once per changed channel.
+        
+        Returns:
+            Mapping of channel -> number of membership changes
+        """
+        changed = {}
+        started = time.perf_counter()
+        with self._members_lock:
+            working = {}  # channel -> ordered {nick: None}
+            
+            def members(channel):
+                if channel not in working:
+                    working[channel] = dict.fromkeys(self.channel_members.get(channel, ()))
+                return working[channel]
+            
+            for event in events:
+                nick = event.nick
+                MEMBER_EVENTS.inc(kind=event.kind)
+                if event.kind == 'join':
+                    current = members(event.channel)
+                    if nick not in current:
+                        current[nick] = None
+                        changed[event.channel] = changed.get(event.channel, 0) + 1
+                elif event.kind == 'part':
+                    if event.channel in self.channel_members and nick in members(event.channel):
+                        del working[event.channel][nick]
+                        self.member_prefixes.get(event.channel, {}).pop(nick, None)
+                        changed[event.channel] = changed.get(event.channel, 0) + 1
+                elif event.kind == 'quit':
+                    self.away_users.pop(nick, None)
+                    for channel in self.channel_members:
+                        current = members(channel)
+                        if nick in current:
+                            del current[nick]
+                            self.member_prefixes.get(channel, {}).pop(nick, None)
+                            changed[channel] = changed.get(channel, 0) + 1
+                elif event.kind == 'nick':
+                    new_nick = event.detail
+                    if nick in self.away_users:
+                        self.away_users[new_nick] = self.away_users.pop(nick)
+                    for channel in self.channel_members:
+                        current = members(channel)
+                        if nick in current:
+                            del current[nick]
+                            current[new_nick] = None
+                            prefixes = self.member_prefixes.get(channel, {})
+                            if nick in prefixes:
+                                prefixes[new_nick] = prefixes.pop(nick)
+                            changed[channel] = changed.get(channel, 0) + 1
+            
+            for channel in changed:
+                self.channel_members[channel] = list(working[channel])
+        MEMBER_APPLY.observe(time.perf_counter() - started)
+        self._notify_members(changed)
+        return changed
+    
+    def _emit_summary(self, channels: list[str], text: str):
+        """Forward an aggregated membership line from the storm buffer."""
+        if self.summary_callback:
+            self.summary_callback(channels, text)
+    
+    def _notify_members(self, channels):
+        """Fire members_callback for changed channels."""
+        if self.members_callback:
+            for channel in channels:
+                if channel in self.channel_members:
+                    self.members_callback(channel, self.channel_members[channel])
+    
+    def _record_prefixes(self, channel: str, names: list[str]):
+        """Remember membership prefixes from NAMES (stacked with multi-prefix)."""
+        prefixes = self.member_prefixes.setdefault(channel, {})
+        for name in names:
+            name = name.lstrip(':')
+            nick = name.lstrip('@+%&~')
+            if nick != name:
+                prefixes[nick] = name[:len(name) - len(nick)]
+    
+    @property
+    def supports_history(self) -> bool:
+        """True when the server offers CHATHISTORY backlog."""
+        return self.caps.has('draft/chathistory') and self.caps.has('batch')
+    
+    def request_history(self, channel: str, after: Optional[dict] = None):
+        """Fetch backlog for a channel via CHATHISTORY.
+        
+        With ``after`` (a record carrying 'msgid' and/or 'ts') only the gap
+        since that message is fetched, newest first: a LATEST page bounded
+        by it, then BETWEEN pages walking back down to it, at most
+        ``history_max_pages`` pages. If the cap leaves part of the gap
+        unfetched, the last page is delivered with truncated=True. Without
+        ``after`` a single LATEST page is fetched.
+        """
+        if not self.client or not self.supports_history:
+            return
+        limit = self._history_limit()
+        if after:
+            since = self._history_ref(after)
+            self._history_requests[channel] = {'direction': 'GAP', 'limit': limit, 'pages': 1, 'since': since}
+            self._send_raw(f"CHATHISTORY LATEST {channel} {since} {limit}")
+        else:
+            self._history_requests[channel] = {'direction': 'LATEST', 'limit': limit, 'pages': 1}
+            self._send_raw(f"CHATHISTORY LATEST {channel} * {limit}")
+    
+    def request_history_before(self, channel: str, before: dict):
+        """Fetch one page of older backlog ending just before ``before``."""
+        if not self.client or not self.supports_history:
+            return
+        limit = self._history_limit()
+        self._history_requests[channel] = {'direction': 'BEFORE', 'limit': limit, 'pages': 1}
+        self._send_raw(f"CHATHISTORY BEFORE {channel} {self._history_ref(before)} {limit}")
+    
+    def _history_limit(self) -> int:
+        """Page size, clamped to the server's advertised CHATHISTORY maximum."""
+        server_max = self.isupport.get('CHATHISTORY', '')
+        if server_max.isdigit() and int(server_max) > 0:
+            return min(self.history_page_size, int(server_max))
+        return self.history_page_size
+    
+    @staticmethod
+    def _history_ref(record: dict) -> str:
+        """Build a CHATHISTORY message reference, preferring msgid."""
+        if record.get('msgid'):
+            return f"msgid={record['msgid']}"
+        return f"timestamp={format_server_time(record['ts'])}"
+    
+    def _finish_history_page(self, channel: str, messages: list):
+        """Deliver a CHATHISTORY page and request the next (older) one if the gap is still open."""
+        request = self._history_requests.get(channel)
+        # Pages are oldest first; a full page means the gap may reach further back
+        more = bool(
+            request and request['direction'] == 'GAP' and len(messages) >= request['limit']
+            and (messages[0].get('msgid') or messages[0].get('ts'))
+        )
+        truncated = more and request['pages'] >= self.history_max_pages
+        if more and not truncated:
+            request['pages'] += 1
+            self._send_raw(f"CHATHISTORY BETWEEN {channel} {self._history_ref(messages[0])} "
+                           f"{request['since']} {request['limit']}")
+        else:
+            self._history_requests.pop(channel, None)
+        if (messages or truncated) and self.history_callback:
+            self.history_callback(channel, messages, truncated)
+    
+    def has_cap(self, cap: str) -> bool:
+        """Check if an IRCv3 capability was negotiated."""
+        return self.caps.has(cap)
+    
+    @property
+    def echoes_own_messages(self) -> bool:
+        """True when the server sends our own messages back (echo-message)."""
+        return self.caps.has('echo-message')
+    
+    def is_away(self, nick: str) -> bool:
+        """Check if a user is marked away."""
+        return nick in self.away_users
+    
     def join_channel(self, channel: str):
         """Join a channel."""
         if self.client:
@@ -250,16 +564,61 @@ class IRCClient:
         if self.client:
             self.client.msg(target, message)
     
+    def send_dcc(self, target: str, request: DccRequest):
+        """Send a DCC SEND, RESUME or ACCEPT to a user as CTCP."""
+        if self.client:
+            self.client.msg(target, f"\x01{request.to_ctcp()}\x01")
+    
+    def host_of(self, nick: str) -> Optional[str]:
+        """A user's host as last seen in a message from them, if any."""
+        return self.user_hosts.get(nick.lower())
+    
     def set_message_callback(self, callback: Callable):
-        """Set callback for incoming messages."""
+        """Set callback for incoming messages.
+        
+        Callback signature: callback(nick, target, message, server_time, msgid)
+        - server_time: Unix timestamp from the server-time tag, or None
+        - msgid: Server-assigned message id (message-tags), or None
+        """
         self.message_callback = callback
     
+    def set_dcc_callback(self, callback: Callable):
+        """Set callback for DCC requests sent to us.
+        
+        Callback signature: callback(nick, request)
+        - request: DccRequest (SEND offer, or RESUME/ACCEPT for a transfer in progress)
+        """
+        self.dcc_callback = callback
+    
+    def set_history_callback(self, callback: Callable):
+        """Set callback for CHATHISTORY backlog pages.
+        
+        Callback signature: callback(channel, messages, truncated)
+        - messages: list of {'nick', 'text', 'ts', 'msgid'} dicts, oldest first
+        - truncated: True on the last page of a gap fetch that stopped at
+          history_max_pages before reaching the last message seen
+        """
+        self.history_callback = callback
+    
     def set_members_callback(self, callback: Callable):
         """Set callback for member list updates."""
         self.members_callback = callback
     
+    def set_summary_callback(self, callback: Callable):
+        """Set callback for aggregated netsplit/netjoin/flood lines.
+        
+        Callback signature: callback(channels, text)
+        - channels: channels whose membership the summarized events changed
+        """
+        self.summary_callback = callback
+    
     def set_channel_list_callback(self, callback: Callable):
-        """Set callback for channel list updates."""
+        """Set callback for channel list updates.
+        
+        Callback signature: callback(channels, done)
+        - channels: chunk of {'name', 'users', 'topic'} dicts
+        - done: True for the last chunk (RPL_LISTEND)
+        """
         self.channel_list_callback = callback
     
     def set_join_callback(self, callback: Callable):
@@ -299,27 +658,67 @@ class IRCClient:
         """Get list of members in a channel."""
         return self.channel_members.get(channel, [])
     
-    def list_channels(self, pattern: str = None):
-        """Request channel list from server."""
-        print(f"[IRC DEBUG] list_channels called with pattern: {pattern}")
-        if self.client:
-            try:
-                if pattern:
-                    print(f"[IRC DEBUG] Sending LIST with pattern: {pattern}")
-                    # Try different formats for LIST command
-                    self.client.send('LIST', pattern)
-                else:
-                    print("[IRC DEBUG] Sending LIST command (no pattern)")
-                    # Send LIST without any parameters
-                    self.client.send('LIST')
-                print("[IRC DEBUG] LIST command sent successfully")
-            except Exception as e:
-                print(f"[IRC DEBUG] Error sending LIST: {e}")
-        else:
+    @property
+    def elist(self) -> str:
+        """ELIST extensions the server advertised (e.g. 'MU'), uppercased."""
+        return self.isupport.get('ELIST', '').upper()
+    
+    def list_channels(self, pattern: str = None, min_users: int = None):
+        """Request the channel list, filtered server-side where ELIST allows.
+        
+        Args:
+            pattern: Channel mask such as ``*python*`` (ELIST M)
+            min_users: Only list channels with at least this many users (ELIST U)
+        
+        Whatever the server can't filter is filtered as RPL_LIST entries arrive.
+        Results reach channel_list_callback in chunks while LIST is streaming.
+        """
+        if not self.client:
             print("[IRC DEBUG] No client available")
+            return
+        
+        conditions = []
+        client_mask = client_min = None
+        if pattern:
+            if 'M' in self.elist or not any(c in pattern for c in '*?'):
+                # Plain channel names are valid LIST targets everywhere
+                conditions.append(pattern)
+            else:
+                client_mask = pattern.lower()
+        if min_users and min_users > 1:
+            if 'U' in self.elist:
+                conditions.append(f">{min_users - 1}")
+            else:
+                client_min = min_users
+        
+        self._channel_list = []
+        self._list_filter = (client_mask, client_min) if (client_mask or client_min) else None
+        try:
+            if conditions:
+                self.client.send('LIST', ','.join(conditions))
+            else:
+                self.client.send('LIST')
+        except Exception as e:
+            print(f"[IRC DEBUG] Error sending LIST: {e}")
+    
+    def _list_matches(self, channel: str, users: int) -> bool:
+        """Apply the part of a LIST filter the server couldn't."""
+        if not self._list_filter:
+            return True
+        mask, min_users = self._list_filter
+        if min_users and users < min_users:
+            return False
+        return not mask or fnmatch.fnmatchcase(channel.lower(), mask)
+    
+    def _deliver_list(self, done: bool):
+        """Hand buffered LIST entries to the callback."""
+        chunk, self._channel_list = self._channel_list, []
+        if self.channel_list_callback:
+            self.channel_list_callback(chunk, done)
     
     async def disconnect(self):
         """Disconnect from IRC server."""
+        self.storm.cancel()
         if self.client:
             try:
                 self.client.disconnect()
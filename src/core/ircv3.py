@@ -0,0 +1,175 @@
+"""IRCv3 capability negotiation and message-tag helpers."""
+
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Optional, Set
+
+
+# Capabilities phosphor knows how to use, in the order they are requested
+SUPPORTED_CAPS = (
+    "server-time",
+    "message-tags",
+    "multi-prefix",
+    "away-notify",
+    "echo-message",
+    "batch",
+    "draft/chathistory",
+)
+
+
+class CapabilityNegotiator:
+    """CAP LS/REQ/ACK state machine.
+
+    States move ``idle`` -> ``listing`` (CAP LS replies arriving) ->
+    ``requesting`` (CAP REQ sent, waiting for ACK/NAK) -> ``done``.
+    CAP NEW/DEL from cap-notify servers are handled in any state.
+    """
+
+    def __init__(self, send: Callable[[str], None], wanted: Iterable[str] = SUPPORTED_CAPS):
+        self.send = send
+        self.wanted = list(wanted)
+        self.state = "idle"
+        self.available: Dict[str, str] = {}  # cap -> advertised value ("" if none)
+        self.enabled: Set[str] = set()
+        self.registered = False  # Set once 001 arrives; CAP END is pointless after that
+        self._pending: Set[str] = set()
+        self._handlers: Dict[str, list[Callable[[bool], None]]] = {}
+
+    def on_change(self, cap: str, handler: Callable[[bool], None]):
+        """Register a handler called with True/False when ``cap`` is enabled/disabled."""
+        self._handlers.setdefault(cap, []).append(handler)
+
+    def has(self, cap: str) -> bool:
+        """Check if a capability is currently enabled."""
+        return cap in self.enabled
+
+    def start(self):
+        """Begin negotiation by asking the server for its capabilities."""
+        self.state = "listing"
+        self.available.clear()
+        self.send("CAP LS 302")
+
+    def reset(self):
+        """Forget all negotiated state (used on reconnect)."""
+        for cap in list(self.enabled):
+            self._set_enabled(cap, False)
+        self.state = "idle"
+        self.available.clear()
+        self._pending.clear()
+        self.registered = False
+
+    def handle(self, args: list[str]):
+        """Feed the arguments of a CAP reply: ``[target, subcommand, ...]``."""
+        if len(args) < 3:
+            return
+        subcommand = args[1].upper()
+        # Multiline LS/LIST replies carry a '*' continuation marker before the caps
+        more = len(args) > 3 and args[2] == "*"
+        caps = args[-1].lstrip(":").split()
+
+        if subcommand == "LS":
+            self._handle_ls(caps, final=not more)
+        elif subcommand == "ACK":
+            self._handle_ack(caps)
+        elif subcommand == "NAK":
+            self._handle_nak(caps)
+        elif subcommand == "NEW":
+            self._handle_new(caps)
+        elif subcommand == "DEL":
+            self._handle_del(caps)
+
+    def _handle_ls(self, caps: list[str], final: bool):
+        """Collect advertised caps; request the wanted ones after the last line."""
+        self.state = "listing"
+        self.available.update(self._parse_caps(caps))
+        if final:
+            self._request([cap for cap in self.wanted if cap in self.available])
+
+    def _handle_ack(self, caps: list[str]):
+        """Enable acknowledged caps (a leading '-' means disabled)."""
+        for cap in caps:
+            if cap.startswith("-"):
+                self._set_enabled(cap[1:], False)
+                self._pending.discard(cap[1:])
+            else:
+                self._set_enabled(cap, True)
+                self._pending.discard(cap)
+        self._maybe_end()
+
+    def _handle_nak(self, caps: list[str]):
+        """A NAK rejects the whole REQ; nothing from it is enabled."""
+        for cap in caps:
+            self._pending.discard(cap)
+        self._maybe_end()
+
+    def _handle_new(self, caps: list[str]):
+        """Request newly advertised caps we want (cap-notify)."""
+        new = self._parse_caps(caps)
+        self.available.update(new)
+        self._request([cap for cap in self.wanted if cap in new and cap not in self.enabled])
+
+    def _handle_del(self, caps: list[str]):
+        """Drop caps the server no longer offers."""
+        for cap in caps:
+            self.available.pop(cap, None)
+            self._set_enabled(cap, False)
+
+    def _request(self, caps: list[str]):
+        """Send a CAP REQ for ``caps``, or finish if there is nothing to ask for."""
+        if not caps:
+            self._maybe_end()
+            return
+        self.state = "requesting"
+        self._pending.update(caps)
+        self.send(f"CAP REQ :{' '.join(caps)}")
+
+    def _maybe_end(self):
+        """Send CAP END once every outstanding request has been answered."""
+        if self._pending or self.state == "done":
+            return
+        self.state = "done"
+        if not self.registered:
+            self.send("CAP END")
+
+    def _set_enabled(self, cap: str, enabled: bool):
+        """Update the enabled set and run change handlers on transitions."""
+        if enabled == (cap in self.enabled):
+            return
+        if enabled:
+            self.enabled.add(cap)
+        else:
+            self.enabled.discard(cap)
+        for handler in self._handlers.get(cap, []):
+            try:
+                handler(enabled)
+            except Exception as e:
+                print(f"[IRC DEBUG] CAP handler for {cap} failed: {e}")
+
+    @staticmethod
+    def _parse_caps(caps: list[str]) -> Dict[str, str]:
+        """Split ``name=value`` tokens into a dict."""
+        parsed = {}
+        for token in caps:
+            name, _, value = token.partition("=")
+            if name:
+                parsed[name] = value
+        return parsed
+
+
+def format_server_time(ts: float) -> str:
+    """Format a Unix timestamp the way server-time/CHATHISTORY expect."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + \
+        f"{int(ts * 1000) % 1000:03d}Z"
+
+
+def parse_server_time(tags: Optional[dict]) -> Optional[float]:
+    """Return the ``time`` tag as a Unix timestamp, or None if absent/invalid."""
+    if not tags:
+        return None
+    value = tags.get("time")
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        # Format: 2011-10-19T16:40:51.620Z
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
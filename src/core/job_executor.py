@@ -0,0 +1,167 @@
+"""Bounded thread-pool job runner for IRC handlers.
+
+miniirc calls handlers on its own threads, so a slow answer (an Azure
+refresh, say) blocks whichever thread delivered the message. JobExecutor
+moves that work onto a fixed pool of threads so concurrent users are
+served in parallel, while bounding both running and waiting jobs.
+
+Each job has an owner (a nick) and a channel, so a user's jobs can be
+cancelled when they part or quit. A job that overruns its timeout is
+reported as such straight away; Python threads cannot be interrupted, so
+the work itself finishes in the background and its result is dropped.
+Every job ends in exactly one callback: ``on_done``, ``on_error`` or
+``on_timeout`` (cancelled jobs end silently).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.core import metrics
+
+JOB_RUNS = metrics.counter("phosphor_jobs_total", "Background jobs by outcome", ("executor", "result"))
+JOB_SECONDS = metrics.histogram("phosphor_job_seconds", "Background job run time", ("executor",))
+
+
+class Job:
+    """One submitted call; ``state`` is pending, running, done, failed, timeout or cancelled."""
+
+    def __init__(self, owner: str, channel: str, fn: Callable, args: tuple,
+                 on_done: Callable[[Any], None], on_error: Optional[Callable[[Exception], None]],
+                 on_timeout: Optional[Callable[[], None]]):
+        self.owner = owner
+        self.channel = channel
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_timeout = on_timeout
+        self.state = "pending"
+        self.future = None
+        self.timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def _finish(self, state: str) -> bool:
+        """Move to a final state; False if the job had already ended."""
+        with self._lock:
+            if self.state not in ("pending", "running"):
+                return False
+            self.state = state
+        if self.timer:
+            self.timer.cancel()
+        return True
+
+
+class JobExecutor:
+    """Runs jobs on ``max_workers`` threads with timeouts and per-user cancellation."""
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 20, timeout: float = 60.0,
+                 name: str = "jobs"):
+        """
+        Args:
+            max_workers: Jobs running at once
+            max_pending: Jobs running or waiting before submit() refuses more
+            timeout: Seconds from submission before a job is reported as timed out
+            name: Metrics label and thread name prefix
+        """
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs: List[Job] = []
+        self._lock = threading.Lock()
+
+    def submit(self, owner: str, channel: str, fn: Callable, *args: Any,
+               on_done: Callable[[Any], None], on_error: Optional[Callable[[Exception], None]] = None,
+               on_timeout: Optional[Callable[[], None]] = None) -> Optional[Job]:
+        """Queue ``fn(*args)``; returns the job, or None if the executor is full.
+
+        Callbacks run on a worker (or timer) thread and must not block for long.
+        """
+        job = Job(owner, channel, fn, args, on_done, on_error, on_timeout)
+        with self._lock:
+            if len(self._jobs) >= self.max_pending:
+                JOB_RUNS.inc(executor=self.name, result="rejected")
+                return None
+            self._jobs.append(job)
+        job.future = self._pool.submit(self._run, job)
+        if self.timeout:
+            job.timer = threading.Timer(self.timeout, self._expire, (job,))
+            job.timer.daemon = True
+            job.timer.start()
+        return job
+
+    def pending(self, owner: str) -> int:
+        """Jobs an owner has waiting or running."""
+        with self._lock:
+            return sum(1 for job in self._jobs if job.owner == owner)
+
+    def _run(self, job: Job):
+        with job._lock:
+            if job.state != "pending":
+                return  # Cancelled or timed out while queued
+            job.state = "running"
+        started = time.monotonic()
+        try:
+            result = job.fn(*job.args)
+        except Exception as e:
+            if job._finish("failed"):
+                JOB_RUNS.inc(executor=self.name, result="failed")
+                if job.on_error:
+                    job.on_error(e)
+            return
+        finally:
+            JOB_SECONDS.observe(time.monotonic() - started, executor=self.name)
+            self._forget(job)
+        if job._finish("done"):
+            JOB_RUNS.inc(executor=self.name, result="done")
+            job.on_done(result)
+
+    def _expire(self, job: Job):
+        if job._finish("timeout"):
+            JOB_RUNS.inc(executor=self.name, result="timeout")
+            job.future.cancel()  # Only helps if it never started
+            self._forget(job)
+            if job.on_timeout:
+                job.on_timeout()
+
+    def _forget(self, job: Job):
+        with self._lock:
+            if job in self._jobs:
+                self._jobs.remove(job)
+
+    def cancel(self, owner: str, channel: Optional[str] = None) -> int:
+        """Cancel an owner's jobs (in one channel, or everywhere); returns how many."""
+        with self._lock:
+            jobs = [job for job in self._jobs
+                    if job.owner == owner and (channel is None or job.channel == channel)]
+        cancelled = 0
+        for job in jobs:
+            if job._finish("cancelled"):
+                JOB_RUNS.inc(executor=self.name, result="cancelled")
+                job.future.cancel()
+                self._forget(job)
+                cancelled += 1
+        return cancelled
+
+    def rename(self, old: str, new: str):
+        """Follow a nick change so later cancellation still finds the jobs."""
+        with self._lock:
+            for job in self._jobs:
+                if job.owner == old:
+                    job.owner = new
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            running = sum(1 for job in self._jobs if job.state == "running")
+            return {"running": running, "waiting": len(self._jobs) - running}
+
+    def shutdown(self):
+        """Cancel everything queued and stop accepting work (running jobs are not awaited)."""
+        with self._lock:
+            jobs = list(self._jobs)
+        for job in jobs:
+            if job._finish("cancelled"):
+                job.future.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
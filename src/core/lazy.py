@@ -0,0 +1,91 @@
+"""Lazily imported and initialized subsystems (AI, Azure, wormhole, audio)."""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class LazySubsystem:
+    """A subsystem built by ``factory`` on first use, exactly once.
+
+    Factories do their own imports, so nothing heavy is loaded until the
+    subsystem is first needed (or warmed in the background).
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.instance: Any = None
+        self.error: Optional[Exception] = None
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    def get(self) -> Any:
+        """Return the instance, building it now if nobody has yet."""
+        if self._loaded.is_set():
+            if self.error:
+                raise self.error
+            return self.instance
+        with self._lock:
+            if not self._loaded.is_set():
+                try:
+                    self.instance = self.factory()
+                except Exception as e:
+                    self.error = e
+                finally:
+                    self._loaded.set()
+        if self.error:
+            raise self.error
+        return self.instance
+
+    def peek(self) -> Any:
+        """Return the instance if it is already built, else None (never builds)."""
+        return self.instance if self._loaded.is_set() else None
+
+
+class Subsystems:
+    """Registry of lazy subsystems, with optional background warm-up."""
+
+    def __init__(self):
+        self._entries: Dict[str, LazySubsystem] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> LazySubsystem:
+        """Add (or replace, if not built yet) a subsystem."""
+        entry = self._entries.get(name)
+        if entry is None or not entry.loaded:
+            entry = LazySubsystem(name, factory)
+            self._entries[name] = entry
+        return entry
+
+    def get(self, name: str) -> Any:
+        return self._entries[name].get()
+
+    def peek(self, name: str) -> Any:
+        entry = self._entries.get(name)
+        return entry.peek() if entry else None
+
+    def loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return bool(entry and entry.loaded)
+
+    def warm(self, names: Optional[Iterable[str]] = None, on_error: Optional[Callable[[str, Exception], None]] = None):
+        """Build subsystems on a background thread.
+
+        Args:
+            names: Which ones (default: all registered)
+            on_error: Called with ``(name, exception)`` if a factory fails
+        """
+        entries = [self._entries[n] for n in names] if names is not None else list(self._entries.values())
+
+        def run():
+            for entry in entries:
+                try:
+                    entry.get()
+                except Exception as e:
+                    if on_error:
+                        on_error(entry.name, e)
+
+        threading.Thread(target=run, name="subsystem-warmup", daemon=True).start()
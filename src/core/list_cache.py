@@ -0,0 +1,54 @@
+"""Disk cache for IRC channel LIST results, stored under .phosphor/list_cache."""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class ChannelListCache:
+    """One JSON file per network holding the last complete LIST reply.
+
+    Entries are the ``{'name', 'users', 'topic'}`` dicts IRCClient delivers.
+    """
+
+    def __init__(self, root: str = ".phosphor/list_cache", ttl: float = 6 * 3600):
+        self.root = Path(root)
+        self.ttl = ttl
+
+    def _path(self, network: str) -> Path:
+        """Map a network (host:port) to a safe file name."""
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", network.lower())
+        return self.root / f"{safe}.json"
+
+    def load(self, network: str) -> Tuple[List[dict], bool]:
+        """Return ``(channels, fresh)``; channels is empty when nothing is cached."""
+        try:
+            with open(self._path(network), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return [], False
+        channels = data.get("channels", [])
+        fresh = time.time() - data.get("saved_at", 0) < self.ttl
+        return channels, fresh
+
+    def age(self, network: str) -> Optional[float]:
+        """Seconds since the cache for a network was written, or None."""
+        try:
+            return time.time() - self._path(network).stat().st_mtime
+        except OSError:
+            return None
+
+    def save(self, network: str, channels: List[dict]):
+        """Replace the cached LIST for a network (written atomically)."""
+        path = self._path(network)
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"saved_at": time.time(), "channels": channels}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[LIST CACHE] Failed to save {network}: {e}")
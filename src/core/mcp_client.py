@@ -1,19 +1,37 @@
 """MCP (Model Context Protocol) client for AI integration."""
 
 import asyncio
+import itertools
 import json
+import os
+import re
+import shlex
 import subprocess
+import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
+from src.core import file_search, tracing
 from src.core.devops_health_bot import DevOpsHealthBot
-from src.core.azure_bot_client import AzureBotClient
+from src.core.mcp_session import MCPSessionManager
+from src.core.ranged_reader import MappedFile
+from src.core.tool_cache import ToolCache
+
+FILE_TOOLS = ("list-files", "read-file", "search-files")
 
 
 class MCPClient:
     """Client for executing MCP commands."""
     
-    def __init__(self):
+    def __init__(self, config_path: str = "mcp.json", cache_ttls: Optional[Dict[str, float]] = None,
+                 file_index: bool = False, file_tools: bool = True):
+        """
+        Args:
+            config_path: MCP server config (mcp.json)
+            cache_ttls: Seconds each tool's results are reused, by tool name
+            file_index: Keep an in-memory index of the working tree for the file tools
+            file_tools: Offer list-files/read-file/search-files (confined to the working tree)
+        """
         self.tools = {
             "analyze-db": self._analyze_db,
             "docker-stats": self._docker_stats,
@@ -24,26 +42,106 @@ class MCPClient:
             "read-file": self._read_file,
             "search-files": self._search_files,
         }
+        if not file_tools:
+            for tool in FILE_TOOLS:
+                del self.tools[tool]
+        self.file_root = "."
         
-        # Initialize DevOps Health Bot
-        self.health_bot = DevOpsHealthBot(mcp_tools={})
+        # MCP servers from mcp.json, spawned on first use and kept running
+        self.sessions = MCPSessionManager.from_file(config_path)
         
-        # Initialize Azure Bot Client
-        self.azure_client = AzureBotClient()
+        # Repeat queries within a tool's TTL (and identical concurrent ones) share one run
+        self.cache = ToolCache(cache_ttls)
         
-        # Print Azure status
-        if self.azure_client.is_available():
-            print(f"🔵 Azure integration: {self.azure_client.get_status()}")
-        else:
-            print("⚪ Azure integration: Not configured (using Docker fallback)")
+        # Optional in-memory index of the working directory for the file tools
+        self.file_index = None
+        if file_index and file_tools:
+            from src.core.file_index import FileIndex
+            self.file_index = FileIndex(self.file_root)
+            self.file_index.start()
+        
+        # Initialize DevOps Health Bot (MCP tools are injected on first use)
+        self.health_bot = DevOpsHealthBot(mcp_tools={})
+        
+        # Azure client (dotenv, Azure SDK) is only loaded on the first query
+        self._azure_client = None
+        self._azure_lock = threading.Lock()
+    
+    @property
+    def azure_client(self):
+        """Azure Bot Client, created on first access (blocking: use _azure() on the event loop)."""
+        with self._azure_lock:
+            if self._azure_client is None:
+                from src.core.azure_bot_client import AzureBotClient
+                self._azure_client = AzureBotClient()
+        return self._azure_client
+    
+    async def _azure(self):
+        """The Azure Bot Client, built off the event loop the first time."""
+        if self._azure_client is None:
+            await asyncio.to_thread(lambda: self.azure_client)
+        return self._azure_client
+    
+    async def _ensure_mcp_tools(self):
+        """Start the configured MCP servers and hand their tools to the health bot."""
+        if self.health_bot.mcp_tools or not self.sessions.sessions:
+            return
+        self.health_bot.mcp_tools.update(await self.sessions.tool_functions())
+    
+    async def start(self):
+        """Warm up before the first query.
+
+        Builds the Azure client (credential setup) off the event loop and
+        starts the configured MCP servers, so long-lived callers pay for
+        neither on their first request.
+        """
+        await self._azure()
+        await self._ensure_mcp_tools()
     
+    async def close(self):
+        """Stop MCP servers and the file index."""
+        await self.sessions.close()
+        if self.file_index:
+            await asyncio.to_thread(self.file_index.stop)
+    
+    def _indexed(self, path: str):
+        """The file index, if it is ready and can answer for this path."""
+        if self.file_index and self.file_index.covers(path):
+            return self.file_index
+        return None
+    
+    def _confine(self, path: str) -> str:
+        """A user-supplied path checked against the working tree (see file_search.confine); '.' for the root."""
+        return file_search.confine(self.file_root, path) or "."
+    
+    def _servable(self, rel_path: str) -> bool:
+        """Whether a search hit may be shown (walk already skips ignored and hidden paths, not symlink escapes)."""
+        if not os.path.islink(os.path.join(self.file_root, rel_path)):
+            return True
+        try:
+            file_search.confine(self.file_root, rel_path, check_ignored=False)
+        except file_search.PathRefused:
+            return False
+        return True
+    
+    @staticmethod
+    def _tool_argument(args: Dict[str, Any], *command_words: str) -> str:
+        """The text after the command word (e.g. the path in 'read-file README.md')."""
+        value = (args.get("path") or args.get("prompt") or "").strip()
+        return "" if value.lower() in command_words else value
+    
+    @tracing.traced("mcp.execute", "mcp")
     async def execute(self, prompt: str, args: Dict[str, Any] = None) -> Dict[str, Any]:
         """Execute an MCP command based on natural language prompt."""
         # Parse the prompt to determine which tool to use
         prompt_lower = prompt.lower().strip()
         
+        if prompt_lower == "cache":
+            return {"message": self._cache_stats_text()}
+        
         # PRIORITY 1: If Azure is configured, use it for container queries
-        if self.azure_client.is_available():
+        azure = await self._azure()
+        if azure.is_available():
             # Check if this is a container-related query
             container_keywords = ["container", "list", "ip", "port", "status", "running", 
                                 "health", "check", "show", "what", "region", "location",
@@ -52,14 +150,19 @@ class MCPClient:
             # If empty prompt or contains container keywords, use Azure
             if not prompt_lower or any(keyword in prompt_lower for keyword in container_keywords):
                 # Route to Azure
-                return await self.azure_client.query(prompt)
+                with tracing.span("mcp.azure", "mcp"):
+                    return await self.cache.get_or_run(
+                        "azure", {"prompt": prompt}, lambda: azure.query(prompt)
+                    )
         
         # FALLBACK: If Azure not configured or query is not container-related
         
         # If empty prompt or generic health check, default to docker health
         if not prompt_lower or prompt_lower in ["health", "check", "status"]:
             # Default behavior: check Docker health (fallback)
-            return await self._docker_health({"prompt": prompt_lower})
+            return await self.cache.get_or_run(
+                "docker-health", {"prompt": prompt_lower}, lambda: self._docker_health({"prompt": prompt_lower})
+            )
         
         # Check if this is a question (starts with what, why, how, explain, etc.)
         question_words = ["what", "why", "how", "explain", "tell me", "show me", "describe", "when", "where", "who"]
@@ -96,6 +199,8 @@ class MCPClient:
             # For ambiguous queries, provide guidance instead of defaulting
             return self._handle_ambiguous_query(prompt)
         
+        if tool in FILE_TOOLS and tool not in self.tools:
+            return {"error": "File tools are turned off here."}
         if tool not in self.tools:
             return {
                 "error": f"I don't understand '{prompt}'. Try: /ai help"
@@ -111,7 +216,8 @@ class MCPClient:
                 args = args or {}
                 args["prompt"] = prompt_lower
             
-            result = await self.tools[tool](args or {})
+            with tracing.span(f"mcp.{tool}", "mcp"):
+                result = await self.cache.get_or_run(tool, args, lambda: self.tools[tool](args))
             # Add a friendly message
             if "error" not in result:
                 result["command"] = tool
@@ -119,6 +225,17 @@ class MCPClient:
         except Exception as e:
             return {"error": str(e)}
     
+    def _cache_stats_text(self) -> str:
+        """Per-tool cache hit rates."""
+        stats = self.cache.stats()
+        if not stats:
+            return "**Tool cache:** no lookups yet"
+        lines = [
+            f"• {tool}: {s['hit_rate'] * 100:.0f}% hits ({s['hits']} hits, {s['misses']} misses)"
+            for tool, s in stats.items()
+        ]
+        return "**Tool cache:**\n" + "\n".join(lines)
+    
     def _handle_question(self, prompt: str, prompt_lower: str) -> Dict[str, Any]:
         """Handle question-type queries with helpful responses."""
         # Docker health-related questions
@@ -347,11 +464,14 @@ docker restart <container-name>
 **File Operations:**
 • /ai list-files [path] - List directory contents
 • /ai read-file <path> - Read file contents
+• /ai read-file <path> --tail N | --head N | --lines A:B | --grep PATTERN
 • /ai search-files <pattern> - Search for files
+• /ai search-files <pattern> --grep <regex> - Search file contents
 
 **Other Tools:**
 • /ai docker-stats - Raw Docker statistics
 • /ai system-info - System information
+• /ai cache - Tool cache hit rates
 
 **Examples:**
 • /ai list containers (Azure if configured, Docker otherwise)
@@ -373,12 +493,14 @@ docker restart <container-name>
     async def _azure_containers(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Query Azure Container Instances."""
         prompt = args.get("prompt", "list containers")
-        return await self.azure_client.query(prompt)
+        azure = await self._azure()
+        return await azure.query(prompt)
     
     async def _docker_health(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Check Docker container health using DevOps Health Bot."""
         user_prompt = args.get("prompt", "")
         try:
+            await self._ensure_mcp_tools()
             health_report = await self.health_bot.check_health(user_prompt)
             return {"message": health_report}
         except Exception as e:
@@ -417,25 +539,45 @@ docker restart <container-name>
             return {"error": str(e)}
     
     async def _list_files(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """List files in a directory using filesystem."""
-        path = args.get("path", ".")
+        """List files in a directory using filesystem (or the file index)."""
+        path = self._tool_argument(args, "list-files", "list", "ls", "dir") or "."
         try:
-            target_path = Path(path)
-            if not target_path.exists():
-                return {"error": f"Path not found: {path}"}
-            
-            if target_path.is_file():
-                return {"error": f"{path} is a file, not a directory"}
+            path = self._confine(path)
+        except file_search.PathRefused as e:
+            return {"error": f"Cannot list {e}"}
+        try:
+            index = self._indexed(path)
+            if index:
+                listing = index.listdir(path)
+                if listing is None:
+                    entry = index.stat(path)
+                    if entry is None:
+                        return {"error": f"Path not found: {path}"}
+                    return {"error": f"{path} is a file, not a directory"}
+                items = [(name, entry.is_dir, entry.size) for name, entry in listing
+                         if not entry.ignored and not name.startswith(".")]
+            else:
+                target_path = Path(self.file_root, path)
+                if not target_path.exists():
+                    return {"error": f"Path not found: {path}"}
+                
+                if target_path.is_file():
+                    return {"error": f"{path} is a file, not a directory"}
+                
+                rel_dir = "" if path == "." else path
+                rules = file_search.ignore_rules(self.file_root, rel_dir)
+                items = []
+                for item in sorted(target_path.iterdir()):
+                    is_dir = item.is_dir()
+                    rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                    if item.name.startswith(".") or (is_dir and item.name in file_search.SKIP_DIRS):
+                        continue
+                    if rules and file_search.is_ignored(rules, rel_path, item.name, is_dir):
+                        continue
+                    items.append((item.name, is_dir, 0 if is_dir else item.stat().st_size))
             
-            files = []
-            dirs = []
-            for item in sorted(target_path.iterdir()):
-                if item.is_dir():
-                    dirs.append(f"📁 {item.name}/")
-                else:
-                    size = item.stat().st_size
-                    size_str = self._format_size(size)
-                    files.append(f"📄 {item.name} ({size_str})")
+            dirs = [f"📁 {name}/" for name, is_dir, _ in items if is_dir]
+            files = [f"📄 {name} ({self._format_size(size)})" for name, is_dir, size in items if not is_dir]
             
             result = {
                 "path": str(path),
@@ -456,23 +598,60 @@ docker restart <container-name>
             return {"error": f"Failed to list files: {str(e)}"}
     
     async def _read_file(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Read file contents using filesystem."""
-        path = args.get("path")
+        """Read file contents using filesystem.
+
+        ``/ai read-file <path> [--head N | --tail N | --lines A:B | --grep PATTERN [-i]]``
+        """
+        query = self._tool_argument(args, "read-file", "read", "cat")
+        try:
+            words = shlex.split(query)
+        except ValueError:
+            words = query.split()
+        path, ranged = "", {}
+        while words:
+            word = words.pop(0)
+            if word in ("--head", "--tail", "--lines", "--grep") and words:
+                ranged[word[2:]] = words.pop(0)
+            elif word in ("-i", "--ignore-case"):
+                ranged["ignore_case"] = True
+            elif not path:
+                path = word
         if not path:
             return {"error": "Please specify a file path. Example: /ai read-file README.md"}
+        try:
+            path = self._confine(path)
+        except file_search.PathRefused as e:
+            return {"error": f"Cannot read {e}"}
         
         try:
-            file_path = Path(path)
-            if not file_path.exists():
-                return {"error": f"File not found: {path}"}
+            file_path = Path(self.file_root, path)
+            index = self._indexed(path)
+            if index:
+                entry = index.stat(path)
+                if entry is None:
+                    similar = [p for p in index.glob(f"*{file_path.name}*", include_dirs=False)
+                               if not file_search.is_hidden(p)][:5]
+                    hint = f". Did you mean: {', '.join(similar)}?" if similar else ""
+                    return {"error": f"File not found: {path}{hint}"}
+                is_dir = entry.is_dir
+                size = 0 if is_dir else file_path.stat().st_size
+            else:
+                if not file_path.exists():
+                    return {"error": f"File not found: {path}"}
+                is_dir = file_path.is_dir()
+                size = 0 if is_dir else file_path.stat().st_size
             
-            if file_path.is_dir():
+            if is_dir:
                 return {"error": f"{path} is a directory. Use list-files instead."}
             
+            if ranged.keys() - {"ignore_case"}:
+                return await asyncio.to_thread(self._read_range, str(file_path), ranged)
+            
             # Read file with size limit
             max_size = 50000  # 50KB limit for display
-            if file_path.stat().st_size > max_size:
-                return {"error": f"File too large ({self._format_size(file_path.stat().st_size)}). Max: 50KB"}
+            if size > max_size:
+                return {"error": f"File too large ({self._format_size(size)}). Max: 50KB. "
+                                 f"Try --tail 100, --head 100, --lines A:B or --grep PATTERN"}
             
             content = file_path.read_text(encoding='utf-8', errors='replace')
             
@@ -489,22 +668,114 @@ docker restart <container-name>
         except Exception as e:
             return {"error": f"Failed to read file: {str(e)}"}
     
+    def _read_range(self, path: str, ranged: Dict[str, Any]) -> Dict[str, Any]:
+        """Serve --head/--tail/--lines/--grep from a memory-mapped file."""
+        max_lines = 200
+        try:
+            with MappedFile(path) as f:
+                if f.is_binary():
+                    return {"error": f"Cannot read {path}: binary file"}
+                if "grep" in ranged:
+                    count = min(int(ranged.get("head", max_lines)), max_lines)
+                    lines = f.grep(ranged["grep"], count, ignore_case=ranged.get("ignore_case", False))
+                    title = f"lines matching /{ranged['grep']}/"
+                elif "tail" in ranged:
+                    count = min(int(ranged["tail"]), max_lines)
+                    lines = f.tail(count)
+                    title = f"last {count} lines"
+                elif "lines" in ranged:
+                    first, _, last = ranged["lines"].partition(":")
+                    first = int(first) if first else 1
+                    last = int(last) if last else first + max_lines - 1
+                    last = min(last, first + max_lines - 1)
+                    lines = f.lines(first, last)
+                    title = f"lines {first}-{last}"
+                else:
+                    count = min(int(ranged["head"]), max_lines)
+                    lines = f.head(count)
+                    title = f"first {count} lines"
+                size = f.size
+        except ValueError as e:
+            return {"error": f"Bad range: {e}. Example: /ai read-file app.log --lines 100:150"}
+        except re.error as e:
+            return {"error": f"Invalid --grep pattern: {e}"}
+        except OSError as e:
+            return {"error": f"Failed to read file: {e}"}
+        
+        if not lines:
+            return {"message": f"**File: {path}** ({self._format_size(size)}, {title})\n\nNo lines."}
+        width = len(str(max(number or 0 for number, _ in lines)))
+        content = "\n".join(
+            f"{number:>{width}} | {text}" if number else text for number, text in lines
+        )
+        return {
+            "message": f"**File: {path}** ({self._format_size(size)}, {title})\n\n```\n{content}\n```"
+        }
+    
     async def _search_files(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Search for files by pattern."""
-        pattern = args.get("path", "")
-        if not pattern:
+        """Search for files by pattern, optionally grepping their contents.
+
+        ``/ai search-files <pattern> [--grep <regex>] [-i]``
+        """
+        query = self._tool_argument(args, "search-files", "search", "find")
+        try:
+            words = shlex.split(query)
+        except ValueError:
+            words = query.split()
+        pattern, regex, ignore_case = "", None, False
+        while words:
+            word = words.pop(0)
+            if word == "--grep" and words:
+                regex = words.pop(0)
+            elif word in ("-i", "--ignore-case"):
+                ignore_case = True
+            elif not pattern:
+                pattern = word
+        if not pattern and not regex:
             return {"error": "Please specify a search pattern. Example: /ai search-files *.py"}
+        pattern = pattern or "*"
+        limit = 50
+        
+        index = self._indexed(self.file_root)
+        
+        def visible(paths):
+            """Hidden files and symlinks out of the tree are never shown or searched."""
+            return (p for p in paths if not file_search.is_hidden(p) and self._servable(p))
         
         try:
-            matches = list(Path(".").rglob(pattern))[:50]  # Limit to 50 results
+            if regex:
+                if index:
+                    paths = await asyncio.to_thread(index.glob, pattern, None, False)
+                else:
+                    paths = file_search.walk(self.file_root, pattern, include_dirs=False, include_hidden=False)
+                hits = await asyncio.to_thread(lambda: list(file_search.grep(
+                    visible(paths), regex, root=self.file_root, limit=limit, ignore_case=ignore_case,
+                )))
+                if not hits:
+                    return {"message": f"No matches for /{regex}/ in files matching: {pattern}"}
+                hits_str = "\n".join(f"📄 {h.path}:{h.line_number}: {h.line[:120]}" for h in hits)
+                more = " (first 50)" if len(hits) >= limit else ""
+                return {
+                    "message": f"**Found {len(hits)} lines matching /{regex}/ in '{pattern}'{more}:**\n\n{hits_str}"
+                }
+            
+            if index:
+                matches = list(itertools.islice(visible(index.glob(pattern)), limit))
+            else:
+                matches = await asyncio.to_thread(lambda: list(itertools.islice(visible(
+                    file_search.walk(self.file_root, pattern, include_hidden=False)
+                ), limit)))
             
             if not matches:
                 return {"message": f"No files found matching: {pattern}"}
             
             files_str = "\n".join([f"📄 {m}" for m in matches])
+            more = " (first 50)" if len(matches) >= limit else ""
             return {
-                "message": f"**Found {len(matches)} files matching '{pattern}':**\n\n{files_str}"
+                "message": f"**Found {len(matches)} files matching '{pattern}'{more}:**\n\n{files_str}"
             }
+        except re.error as e:
+            return {"error": f"Invalid --grep pattern: {e}"}
         except Exception as e:
             return {"error": f"Search failed: {str(e)}"}
     
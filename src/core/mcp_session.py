@@ -0,0 +1,264 @@
+"""MCP (Model Context Protocol) client sessions over stdio JSON-RPC.
+
+Servers listed in ``mcp.json`` (``{"mcpServers": {name: {command, args,
+env, disabled}}}``) are spawned once on first use and kept running.
+Requests are pipelined: each gets an id and a future, and a single reader
+task matches responses back, so concurrent ``tools/call`` requests share
+one stream without waiting on each other. ``tools/list`` is cached until
+the server sends ``notifications/tools/list_changed``, and a server that
+exits is restarted on the next call (with a cap on restarts per minute).
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROTOCOL_VERSION = "2024-11-05"
+CLIENT_INFO = {"name": "phosphor", "version": "1.0"}
+
+
+class MCPError(Exception):
+    """A server returned an error, exited, or could not be started."""
+
+
+class MCPSession:
+    """One running MCP server and its JSON-RPC stream."""
+
+    def __init__(self, name: str, command: str, args: List[str] = None, env: Dict[str, str] = None,
+                 timeout: float = 30.0, max_restarts: int = 5, restart_window: float = 60.0):
+        self.name = name
+        self.command = command
+        self.args = list(args or [])
+        self.env = dict(env or {})
+        self.timeout = timeout  # Per request
+        self.max_restarts = max_restarts  # Within restart_window, before giving up
+        self.restart_window = restart_window
+        self.server_info: Dict[str, Any] = {}
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._tools: Optional[List[dict]] = None  # Cached tools/list
+        self._starts: List[float] = []  # Start times, for the restart cap
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def ensure_started(self):
+        """Start the server if it is not running (restarting it after a crash)."""
+        if self.alive:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.alive:
+                return
+            now = time.monotonic()
+            self._starts = [t for t in self._starts if now - t < self.restart_window]
+            if len(self._starts) >= self.max_restarts:
+                raise MCPError(f"{self.name}: restarted {len(self._starts)} times in "
+                               f"{self.restart_window:.0f}s, giving up for now")
+            self._starts.append(now)
+            await self._spawn()
+
+    async def _spawn(self):
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                self.command, *self.args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                env={**os.environ, **self.env},
+                limit=16 * 1024 * 1024,  # Tool results can be large single lines
+            )
+        except OSError as e:
+            self._process = None
+            raise MCPError(f"{self.name}: cannot start {self.command}: {e}") from e
+        self._tools = None
+        self._reader = asyncio.create_task(self._read_loop(self._process))
+        result = await self.request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": CLIENT_INFO,
+        })
+        self.server_info = result.get("serverInfo", {})
+        await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def request(self, method: str, params: Optional[dict] = None) -> Any:
+        """Send a request and wait for its result."""
+        if not self.alive:
+            raise MCPError(f"{self.name}: server is not running")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        try:
+            await self._send(message)
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise MCPError(f"{self.name}: {method} timed out after {self.timeout:.0f}s")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _send(self, message: dict):
+        try:
+            self._process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+            await self._process.stdin.drain()
+        except (ConnectionError, AttributeError) as e:
+            raise MCPError(f"{self.name}: write failed: {e}") from e
+
+    async def _read_loop(self, process: asyncio.subprocess.Process):
+        """Route responses to their futures until the server exits."""
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue  # Stray log output
+                await self._dispatch(message)
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError) as e:
+            print(f"[MCP] {self.name}: read failed: {e}")
+        finally:
+            if process.returncode is None:
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+            await process.wait()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(MCPError(f"{self.name}: server exited (code {process.returncode})"))
+            self._pending.clear()
+
+    async def _dispatch(self, message: dict):
+        if "method" in message:
+            method = message["method"]
+            if method == "notifications/tools/list_changed":
+                self._tools = None
+            elif "id" in message:
+                # Server-to-client request: we only implement ping
+                if method == "ping":
+                    await self._send({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+                else:
+                    await self._send({"jsonrpc": "2.0", "id": message["id"],
+                                      "error": {"code": -32601, "message": f"Method not found: {method}"}})
+            return
+        future = self._pending.get(message.get("id"))
+        if future is None or future.done():
+            return
+        if "error" in message:
+            error = message["error"] or {}
+            future.set_exception(MCPError(f"{self.name}: {error.get('message', 'error')}"))
+        else:
+            future.set_result(message.get("result") or {})
+
+    async def list_tools(self) -> List[dict]:
+        """Tool descriptors from ``tools/list`` (cached)."""
+        await self.ensure_started()
+        if self._tools is None:
+            tools, cursor = [], None
+            while True:
+                result = await self.request("tools/list", {"cursor": cursor} if cursor else {})
+                tools.extend(result.get("tools", []))
+                cursor = result.get("nextCursor")
+                if not cursor:
+                    break
+            self._tools = tools
+        return self._tools
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None) -> Any:
+        """Run a tool and decode its result (see decode_tool_result)."""
+        await self.ensure_started()
+        result = await self.request("tools/call", {"name": name, "arguments": arguments or {}})
+        return decode_tool_result(self.name, name, result)
+
+    async def close(self):
+        """Stop the server."""
+        process, self._process = self._process, None
+        if process and process.returncode is None:
+            try:
+                process.stdin.close()
+                await asyncio.wait_for(process.wait(), 2)
+            except (asyncio.TimeoutError, ConnectionError):
+                process.kill()
+        if self._reader:
+            self._reader.cancel()
+            self._reader = None
+
+
+def decode_tool_result(server: str, tool: str, result: dict) -> Any:
+    """Turn a ``tools/call`` result into plain Python data.
+
+    Prefers ``structuredContent``; otherwise joins the text parts and parses
+    them as JSON when possible. Tool-level errors (``isError``) raise MCPError.
+    """
+    texts = [part.get("text", "") for part in result.get("content", []) if part.get("type") == "text"]
+    if result.get("isError"):
+        raise MCPError(f"{server}.{tool}: {' '.join(texts) or 'tool error'}")
+    if "structuredContent" in result:
+        return result["structuredContent"]
+    text = "\n".join(texts)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+class MCPSessionManager:
+    """All configured MCP servers, started lazily and kept warm."""
+
+    def __init__(self, servers: Dict[str, dict]):
+        self.sessions: Dict[str, MCPSession] = {
+            name: MCPSession(name, spec["command"], spec.get("args"), spec.get("env"))
+            for name, spec in servers.items()
+            if spec.get("command") and not spec.get("disabled")
+        }
+
+    @classmethod
+    def from_file(cls, path: str = "mcp.json") -> "MCPSessionManager":
+        """Load ``mcpServers`` from an MCP config file (missing file = no servers)."""
+        try:
+            with open(Path(path), encoding="utf-8") as f:
+                servers = json.load(f).get("mcpServers", {})
+        except (OSError, ValueError):
+            servers = {}
+        return cls(servers)
+
+    async def tool_functions(self) -> Dict[str, Callable]:
+        """Async callables for every tool of every server that starts, keyed by tool name.
+
+        Each is called with the tool's arguments as keyword arguments, e.g.
+        ``await tools["list_containers"](all=True)``.
+        """
+        functions: Dict[str, Callable] = {}
+        results = await asyncio.gather(
+            *(session.list_tools() for session in self.sessions.values()), return_exceptions=True
+        )
+        for session, tools in zip(self.sessions.values(), results):
+            if isinstance(tools, Exception):
+                print(f"[MCP] {session.name} unavailable: {tools}")
+                continue
+            for tool in tools:
+                functions.setdefault(tool["name"], _bind(session, tool["name"]))
+        return functions
+
+    async def close(self):
+        await asyncio.gather(*(session.close() for session in self.sessions.values()), return_exceptions=True)
+
+
+def _bind(session: MCPSession, tool: str) -> Callable:
+    async def call(**arguments):
+        return await session.call_tool(tool, arguments)
+    call.__name__ = tool
+    return call
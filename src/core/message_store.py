@@ -0,0 +1,166 @@
+"""Persistent per-channel message history stored under .phosphor/history."""
+
+import bisect
+import json
+import os
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class MessageStore:
+    """Append-only JSON-lines message log, one file per channel.
+
+    Each line is ``{"ts": float, "nick": str, "text": str, "msgid": str|null}``.
+    Only the tail of each file is ever read back, so startup cost does not
+    grow with the size of the log. A file is cut back to its newest
+    ``max_records`` lines once it holds twice that many, so each channel's
+    log stays bounded and compaction cost is spread over many appends.
+    """
+
+    def __init__(self, root: str = ".phosphor/history", keep_recent: int = 200,
+                 max_records: int = 5000, persist: bool = True):
+        """
+        Args:
+            root: Directory holding one .jsonl file per channel
+            keep_recent: Records per channel kept in memory
+            max_records: Records per channel kept on disk (at least keep_recent)
+            persist: False keeps history in memory only and writes nothing
+        """
+        self.root = Path(root)
+        self.keep_recent = keep_recent
+        self.max_records = max(max_records, keep_recent)
+        self.persist = persist
+        self._recent: Dict[str, deque] = {}  # channel -> recent records (oldest first)
+        self._files = {}  # channel -> open append handle
+        self._lines: Dict[str, int] = {}  # channel -> records in its file
+        self._lock = threading.Lock()
+
+    def _path(self, channel: str) -> Path:
+        """Map a channel name to a safe file name."""
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", channel.lower())
+        return self.root / f"{safe}.jsonl"
+
+    def _load(self, channel: str) -> deque:
+        """Load the tail of a channel's log into memory (once)."""
+        recent = self._recent.get(channel)
+        if recent is not None:
+            return recent
+
+        records = []
+        path = self._path(channel)
+        if self.persist and path.exists():
+            try:
+                with open(path, "rb") as f:
+                    # Read only the last chunk; records are short single lines
+                    f.seek(0, 2)
+                    size = f.tell()
+                    f.seek(max(0, size - self.keep_recent * 512))
+                    lines = f.read().splitlines()
+                if size > self.keep_recent * 512:
+                    lines = lines[1:]  # First line is probably cut in half
+                for line in lines:
+                    try:
+                        records.append(json.loads(line))
+                    except (ValueError, UnicodeDecodeError):
+                        continue
+            except OSError:
+                pass
+        # Backfilled history is appended after newer live messages; memory is kept in time order
+        records.sort(key=lambda r: r.get("ts") or 0)
+        recent = deque(records, maxlen=self.keep_recent)
+        self._recent[channel] = recent
+        return recent
+
+    def append(self, channel: str, nick: str, text: str, ts: float, msgid: Optional[str] = None) -> bool:
+        """Record a message. Returns False if it was already stored (same msgid)."""
+        record = {"ts": ts, "nick": nick, "text": text, "msgid": msgid}
+        with self._lock:
+            recent = self._load(channel)
+            if msgid and any(r.get("msgid") == msgid for r in recent):
+                return False
+            _insert_by_time(recent, record)
+            if not self.persist:
+                return True
+            try:
+                f = self._files.get(channel)
+                if f is None:
+                    self.root.mkdir(parents=True, exist_ok=True)
+                    path = self._path(channel)
+                    self._lines[channel] = _count_lines(path)
+                    f = open(path, "a", encoding="utf-8")
+                    self._files[channel] = f
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                self._lines[channel] += 1
+                if self._lines[channel] >= 2 * self.max_records:
+                    self._compact(channel)
+            except OSError as e:
+                print(f"[HISTORY] Failed to persist message for {channel}: {e}")
+        return True
+
+    def _compact(self, channel: str):
+        """Rewrite a channel's file with only its newest max_records lines (caller holds the lock)."""
+        path = self._path(channel)
+        self._files.pop(channel).close()
+        with open(path, "rb") as f:
+            keep = deque(f, maxlen=self.max_records)
+        tmp = path.with_suffix(".jsonl.tmp")
+        with open(tmp, "wb") as f:
+            f.writelines(keep)
+        os.replace(tmp, path)
+        self._lines[channel] = len(keep)
+        self._files[channel] = open(path, "a", encoding="utf-8")
+
+    def last_seen(self, channel: str) -> Optional[dict]:
+        """Return the newest stored record for a channel, or None."""
+        with self._lock:
+            recent = self._load(channel)
+            return dict(recent[-1]) if recent else None
+
+    def recent(self, channel: str, limit: int = 50) -> List[dict]:
+        """Return up to ``limit`` newest records, oldest first."""
+        with self._lock:
+            recent = self._load(channel)
+            return [dict(r) for r in list(recent)[-limit:]]
+
+    def close(self):
+        """Close all open log files."""
+        with self._lock:
+            for f in self._files.values():
+                try:
+                    f.close()
+                except OSError:
+                    pass
+            self._files.clear()
+
+
+def _insert_by_time(recent: deque, record: dict):
+    """Add a record to a bounded deque kept oldest first by ``ts``.
+
+    Live messages just append; backlog pages (fetched newest first) may be
+    older than what is already held and go in their place, or are dropped
+    from memory if they are older than everything a full deque keeps.
+    """
+    ts = record["ts"] or 0
+    if not recent or ts >= (recent[-1].get("ts") or 0):
+        recent.append(record)
+        return
+    index = bisect.bisect_right([r.get("ts") or 0 for r in recent], ts)
+    if len(recent) == recent.maxlen:
+        if not index:
+            return
+        recent.popleft()
+        index -= 1
+    recent.insert(index, record)
+
+
+def _count_lines(path: Path) -> int:
+    """Number of records in a log file (0 if it does not exist yet)."""
+    try:
+        with open(path, "rb") as f:
+            return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,234 @@
+"""On-demand CPU and memory profiling of a live session.
+
+CPU profiling runs cProfile on the event-loop thread (exact call counts,
+written as ``.pstats``) alongside a sampling profiler that reads every
+thread's stack from ``sys._current_frames()`` and writes collapsed stacks
+(``thread;outer;...;inner count``) for flamegraph tools.
+
+Memory profiling takes a tracemalloc snapshot at start and diffs it against
+one at stop, grouping the growth by subsystem so a slow leak can be pinned
+on the message store, widgets, member lists or audio buffers.
+"""
+
+import ast
+import cProfile
+import linecache
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# (subsystem, path suffix, function names or None for the whole file).
+# An allocation belongs to the first rule matching its innermost frame in our
+# own code; allocations with no frame in src/ fall back to LIBRARY_SUBSYSTEMS.
+SUBSYSTEM_RULES = [
+    ("message store", "src/core/message_store.py", None),
+    ("message store", "src/ui/widgets/chat_pane.py", {"add_message", "insert_history", "_store"}),
+    ("member lists", "src/core/irc_client.py", {"_apply_membership", "members", "_add_names", "_record_prefixes",
+                                                 "handle_names", "handle_names_end", "get_channel_members"}),
+    ("member lists", "src/core/storm.py", None),
+    ("member lists", "src/core/completion.py", None),
+    ("member lists", "src/ui/widgets/sidebar.py", {"update_members", "show_loading"}),
+    ("audio buffers", "src/core/audio.py", None),
+    ("widgets", "src/ui/", None),
+    ("irc", "src/core/irc_client.py", None),
+    ("irc", "src/core/ircv3.py", None),
+    ("diagnostics", "src/core/metrics.py", None),
+    ("diagnostics", "src/core/tracing.py", None),
+    ("diagnostics", "src/core/watchdog.py", None),
+]
+LIBRARY_SUBSYSTEMS = [
+    ("widgets", ("/textual/", "/rich/")),
+    ("irc", ("/miniirc",)),
+]
+
+
+class SessionProfiler:
+    """Start/stop CPU and memory profiles, writing results to ``out_dir``."""
+
+    def __init__(self, out_dir: str = ".phosphor/diagnostics", sample_interval: float = 0.005,
+                 trace_frames: int = 16):
+        self.out_dir = Path(out_dir)
+        self.sample_interval = sample_interval  # Seconds between stack samples
+        self.trace_frames = trace_frames  # tracemalloc traceback depth
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._samples: Counter = Counter()
+        self._sampler_stop: Optional[threading.Event] = None
+        self._cpu_started = 0.0
+        self._mem_baseline: Optional[tracemalloc.Snapshot] = None
+        self._mem_started_tracing = False
+        self._mem_started = 0.0
+        self._functions: Dict[str, List[Tuple[int, int, str]]] = {}  # file -> (start, end, name)
+
+    @property
+    def cpu_running(self) -> bool:
+        return self._cprofile is not None
+
+    @property
+    def mem_running(self) -> bool:
+        return self._mem_baseline is not None
+
+    # CPU
+
+    def start_cpu(self):
+        """Profile the calling thread with cProfile and sample all threads."""
+        if self.cpu_running:
+            return
+        self._samples = Counter()
+        self._cpu_started = time.time()
+        self._sampler_stop = threading.Event()
+        threading.Thread(target=self._sample, args=(self._sampler_stop,), name="profile-sampler", daemon=True).start()
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def stop_cpu(self) -> List[Path]:
+        """Stop CPU profiling (from the thread that started it); returns written files."""
+        if not self.cpu_running:
+            return []
+        self._cprofile.disable()
+        self._sampler_stop.set()
+        profile, self._cprofile = self._cprofile, None
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self._cpu_started))
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+        pstats_path = self.out_dir / f"cpu-{stamp}.pstats"
+        profile.dump_stats(pstats_path)
+        collapsed_path = self.out_dir / f"cpu-{stamp}.collapsed"
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            for stack, count in self._samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return [pstats_path, collapsed_path]
+
+    def _sample(self, stop: threading.Event):
+        """Collect collapsed stacks of every other thread until stopped."""
+        me = threading.get_ident()
+        while not stop.wait(self.sample_interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                    frame = frame.f_back
+                parts.append(names.get(tid, str(tid)).replace(";", ":"))
+                self._samples[";".join(reversed(parts))] += 1
+
+    # Memory
+
+    def start_mem(self):
+        """Begin tracing allocations and take the baseline snapshot."""
+        if self.mem_running:
+            return
+        self._mem_started_tracing = not tracemalloc.is_tracing()
+        if self._mem_started_tracing:
+            tracemalloc.start(self.trace_frames)
+        self._mem_started = time.time()
+        self._mem_baseline = tracemalloc.take_snapshot()
+
+    def stop_mem(self, top: int = 5) -> Tuple[Optional[Path], List[str]]:
+        """Diff against the baseline, write a report and return ``(path, summary lines)``."""
+        if not self.mem_running:
+            return None, []
+        snapshot = tracemalloc.take_snapshot()
+        baseline, self._mem_baseline = self._mem_baseline, None
+        if self._mem_started_tracing:
+            tracemalloc.stop()
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+        diffs = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), "traceback")
+
+        by_subsystem: Dict[str, List[int]] = defaultdict(lambda: [0, 0])  # -> [size_diff, count_diff]
+        top_sites: Dict[str, Counter] = defaultdict(Counter)
+        for stat in diffs:
+            if not stat.size_diff:
+                continue
+            subsystem, site = self._classify(stat.traceback)
+            totals = by_subsystem[subsystem]
+            totals[0] += stat.size_diff
+            totals[1] += stat.count_diff
+            top_sites[subsystem][site] += stat.size_diff
+
+        ranked = sorted(by_subsystem.items(), key=lambda kv: kv[1][0], reverse=True)
+        elapsed = time.time() - self._mem_started
+        summary = [f"{name}: {_format_bytes(size)} ({count:+d} blocks)" for name, (size, count) in ranked[:top]]
+
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self._mem_started))
+        path = self.out_dir / f"mem-{stamp}.txt"
+        lines = [f"tracemalloc diff over {elapsed:.0f}s, by subsystem", ""]
+        for name, (size, count) in ranked:
+            lines.append(f"{name}: {_format_bytes(size)} ({count:+d} blocks)")
+            for site, site_size in top_sites[name].most_common(top):
+                lines.append(f"    {_format_bytes(site_size):>12}  {site}")
+            lines.append("")
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            path.write_text("\n".join(lines), encoding="utf-8")
+        except OSError as e:
+            print(f"[PROFILE] Failed to write {path}: {e}")
+            path = None
+        return path, summary
+
+    def _classify(self, tb: tracemalloc.Traceback) -> Tuple[str, str]:
+        """Subsystem and allocation site ('file:line in func') for a traceback."""
+        frames = list(tb)  # Most recent call first
+        for frame in frames:
+            filename = frame.filename.replace(os.sep, "/")
+            if "/src/" not in filename and not filename.startswith("src/"):
+                continue
+            func = self._function_at(frame.filename, frame.lineno)
+            site = f"{_short_path(filename)}:{frame.lineno} in {func}"
+            for subsystem, suffix, names in SUBSYSTEM_RULES:
+                if (filename.endswith(suffix) or suffix.endswith("/") and suffix in filename) \
+                        and (names is None or func in names):
+                    return subsystem, site
+            return "other", site
+        filename = frames[0].filename.replace(os.sep, "/") if frames else "?"
+        site = f"{_short_path(filename)}:{frames[0].lineno if frames else 0}"
+        for subsystem, markers in LIBRARY_SUBSYSTEMS:
+            if any(marker in filename for marker in markers):
+                return subsystem, site
+        return "other", site
+
+    def _function_at(self, filename: str, lineno: int) -> str:
+        """Name of the innermost function containing a line (cached per file)."""
+        ranges = self._functions.get(filename)
+        if ranges is None:
+            ranges = []
+            try:
+                tree = ast.parse("".join(linecache.getlines(filename)))
+                for node in ast.walk(tree):
+                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        ranges.append((node.lineno, node.end_lineno or node.lineno, node.name))
+            except (SyntaxError, ValueError):
+                pass
+            self._functions[filename] = ranges
+        best = "<module>"
+        best_start = -1
+        for start, end, name in ranges:
+            if start <= lineno <= end and start > best_start:
+                best, best_start = name, start
+        return best
+
+
+def _short_path(filename: str) -> str:
+    """Trim a path to something readable ('src/...' or the last two parts)."""
+    index = filename.find("src/")
+    if index >= 0:
+        return filename[index:]
+    return "/".join(filename.split("/")[-2:])
+
+
+def _format_bytes(size: int) -> str:
+    sign = "-" if size < 0 else "+"
+    size = abs(size)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{sign}{size:.0f}{unit}" if unit == "B" else f"{sign}{size:.1f}{unit}"
+        size /= 1024
+    return f"{sign}{size:.1f}GB"
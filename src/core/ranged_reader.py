@@ -0,0 +1,214 @@
+"""Ranged reads of large text files for ``/ai read-file``.
+
+Files are memory-mapped, so only the pages an answer touches are read.
+``head`` and ``tail`` walk newlines from either end and cost O(output).
+Line ranges and grep line numbers use a newline index: the number of
+newlines before each 64KB block, built lazily (only as far into the file
+as a request needs) and cached per file across calls. Locating a line
+is then a bisect plus a scan inside one block. An index survives the
+file growing (logs are appended to) and is rebuilt if it shrinks or is
+replaced.
+"""
+
+import bisect
+import mmap
+import os
+import re
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+BLOCK = 64 * 1024
+MAX_LINE = 1000  # Characters shown per line
+
+Line = Tuple[Optional[int], str]  # (1-based line number if known, text)
+
+
+class NewlineIndex:
+    """Newline counts per block of one file (valid for complete blocks only)."""
+
+    def __init__(self, signature: int):
+        self.signature = signature  # crc32 of the first block, to spot replaced files
+        self.cumulative = array("Q", [0])  # Newlines before block i
+
+    @property
+    def blocks(self) -> int:
+        return len(self.cumulative) - 1
+
+    def extend(self, mm, until_offset: Optional[int] = None, until_line: Optional[int] = None):
+        """Count complete blocks until the offset or (1-based) line is covered, or EOF."""
+        size = len(mm)
+        while (self.blocks + 1) * BLOCK <= size:
+            start = self.blocks * BLOCK
+            if until_offset is not None and start > until_offset:
+                return
+            if until_line is not None and self.cumulative[-1] >= until_line:
+                return
+            self.cumulative.append(self.cumulative[-1] + mm[start:start + BLOCK].count(b"\n"))
+
+    def newlines_before(self, mm, offset: int) -> int:
+        """Number of newlines in ``mm[:offset]``."""
+        self.extend(mm, until_offset=offset)
+        block = min(offset // BLOCK, self.blocks)
+        return self.cumulative[block] + mm[block * BLOCK:offset].count(b"\n")
+
+    def line_start(self, mm, line: int) -> Optional[int]:
+        """Byte offset where a 1-based line starts, or None past the end."""
+        if line <= 1:
+            return 0
+        target = line - 1  # Newlines that precede the line
+        self.extend(mm, until_line=target)
+        block = max(bisect.bisect_left(self.cumulative, target) - 1, 0)
+        position = block * BLOCK
+        remaining = target - self.cumulative[block]
+        while remaining:
+            newline = mm.find(b"\n", position)
+            if newline < 0:
+                return None
+            position = newline + 1
+            remaining -= 1
+        return position if position <= len(mm) else None
+
+
+_INDEXES: "OrderedDict[Tuple[int, int], NewlineIndex]" = OrderedDict()
+_MAX_INDEXES = 16
+
+
+def _index_for(st: os.stat_result, mm) -> NewlineIndex:
+    key = (st.st_dev, st.st_ino)
+    signature = zlib.crc32(mm[:BLOCK])
+    index = _INDEXES.get(key)
+    if index is None or (index.blocks and len(mm) < index.blocks * BLOCK) or (
+        len(mm) >= BLOCK and index.blocks and index.signature != signature
+    ):
+        index = NewlineIndex(signature)
+    index.signature = signature
+    _INDEXES[key] = index
+    _INDEXES.move_to_end(key)
+    while len(_INDEXES) > _MAX_INDEXES:
+        _INDEXES.popitem(last=False)
+    return index
+
+
+def _decode(raw: bytes) -> str:
+    text = raw.rstrip(b"\r\n").decode("utf-8", "replace")
+    return text if len(text) <= MAX_LINE else text[:MAX_LINE] + "…"
+
+
+class MappedFile:
+    """A read-only memory map of a file with line-oriented helpers.
+
+    Use as a context manager::
+
+        with MappedFile("app.log") as f:
+            lines = f.tail(50)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self.stat = os.fstat(self._file.fileno())
+        self.size = self.stat.st_size
+        # mmap cannot map an empty file; an empty bytes object behaves the same here
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._index: Optional[NewlineIndex] = None
+
+    def __enter__(self) -> "MappedFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self._file.close()
+
+    @property
+    def index(self) -> NewlineIndex:
+        if self._index is None:
+            self._index = _index_for(self.stat, self.mm)
+        return self._index
+
+    def is_binary(self) -> bool:
+        return b"\0" in self.mm[:8192]
+
+    def head(self, count: int) -> List[Line]:
+        """First ``count`` lines."""
+        lines, position = [], 0
+        while len(lines) < count and position < self.size:
+            end = self.mm.find(b"\n", position)
+            end = self.size if end < 0 else end + 1
+            lines.append((len(lines) + 1, _decode(self.mm[position:end])))
+            position = end
+        return lines
+
+    def tail(self, count: int) -> List[Line]:
+        """Last ``count`` lines.
+
+        Numbered when that is cheap: small files, or the newline index
+        already reaches the start of the tail.
+        """
+        if not self.size or count <= 0:
+            return []
+        end = self.size
+        if self.mm[end - 1:end] == b"\n":
+            end -= 1  # Trailing newline does not start another line
+        starts = []
+        position = end
+        while len(starts) < count:
+            newline = self.mm.rfind(b"\n", 0, position)
+            starts.append(newline + 1)
+            if newline < 0:
+                break
+            position = newline
+        starts.reverse()
+        lines = []
+        first = None
+        if self.size <= 16 * BLOCK or self._index_covers(starts[0]):
+            first = self.index.newlines_before(self.mm, starts[0]) + 1
+        for i, start in enumerate(starts):
+            stop = starts[i + 1] if i + 1 < len(starts) else self.size
+            lines.append((first + i if first else None, _decode(self.mm[start:stop])))
+        return lines
+
+    def _index_covers(self, offset: int) -> bool:
+        index = _INDEXES.get((self.stat.st_dev, self.stat.st_ino))
+        return index is not None and (index.blocks + 1) * BLOCK > offset
+
+    def lines(self, first: int, last: int) -> List[Line]:
+        """Lines ``first`` to ``last`` inclusive (1-based)."""
+        first = max(first, 1)
+        start = self.index.line_start(self.mm, first)
+        if start is None or start >= self.size:
+            return []
+        lines, position, number = [], start, first
+        while number <= last and position < self.size:
+            end = self.mm.find(b"\n", position)
+            end = self.size if end < 0 else end + 1
+            lines.append((number, _decode(self.mm[position:end])))
+            position, number = end, number + 1
+        return lines
+
+    def grep(self, pattern: str, limit: int, ignore_case: bool = False) -> List[Line]:
+        """First ``limit`` lines matching a regex, with line numbers."""
+        if not self.size:
+            return []
+        regex = re.compile(pattern.encode("utf-8"), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        lines, position = [], 0
+        while len(lines) < limit:
+            match = regex.search(self.mm, position)
+            if match is None:
+                break
+            start = self.mm.rfind(b"\n", 0, match.start()) + 1
+            if start >= self.size:
+                break  # Empty match after the final newline
+            end = self.mm.find(b"\n", match.end())
+            end = self.size if end < 0 else end + 1
+            number = self.index.newlines_before(self.mm, start) + 1
+            lines.append((number, _decode(self.mm[start:end])))
+            position = max(end, match.end() + 1)  # Next line (an empty match must still advance)
+            if position >= self.size:
+                break  # search() would clamp back to EOF and match the last line again
+        return lines
@@ -0,0 +1,136 @@
+"""Token-bucket rate limiting keyed by user, hostmask, channel or API.
+
+A bucket holds up to ``burst`` tokens and refills at ``rate`` tokens per
+second; each request spends one (or ``cost``). Users get a short burst
+and then a steady pace instead of a single fixed cooldown.
+
+A bucket left alone for ``burst / rate`` seconds is full again, which is
+exactly the state of a bucket that was never created, so it can simply
+be dropped. Every bucket in a limiter shares that refill time, so the
+least recently touched bucket always expires first: buckets are kept in
+touch order and expired from the front, O(1) amortized per request, and
+the limiter only ever holds keys that were active recently.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional, Tuple
+
+from src.core import metrics
+
+_ACQUIRE_LOCK = threading.Lock()  # Check-then-spend across limiters is one step
+
+RATE_LIMITED = metrics.counter("phosphor_rate_limited_total", "Requests refused by a rate limiter", ("limiter",))
+
+
+class RateLimited(Exception):
+    """A request was refused; ``retry_after`` is the wait in seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token buckets per key, with idle buckets expiring on their own."""
+
+    def __init__(self, rate: float, burst: float, name: str = "default"):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity (requests allowed back to back)
+            name: Metrics label
+        """
+        self.rate = rate
+        self.burst = burst
+        self.name = name
+        self.refill_time = burst / rate
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _tokens(self, key: Hashable, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.burst
+        tokens, updated = bucket
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def _expire(self, now: float):
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < self.refill_time:
+                break
+            del self._buckets[key]
+
+    def wait_time(self, key: Hashable, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """Seconds until ``cost`` tokens are available (0 if they are now); spends nothing."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            missing = cost - self._tokens(key, now)
+        return max(0.0, missing / self.rate)
+
+    def spend(self, key: Hashable, cost: float = 1.0, now: Optional[float] = None):
+        """Take ``cost`` tokens (after wait_time() said they are there)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            self._buckets[key] = (self._tokens(key, now) - cost, now)
+            self._buckets.move_to_end(key)
+
+    def refund(self, key: Hashable, cost: float = 1.0, now: Optional[float] = None):
+        """Give back ``cost`` tokens spent on a request that was not served."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if key in self._buckets:  # An expired bucket is already full
+                self._buckets[key] = (min(self.burst, self._tokens(key, now) + cost), now)
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> float:
+        """Spend ``cost`` tokens if available; returns 0, or the seconds to wait."""
+        return acquire_all([(self, key)], cost)
+
+    def check(self, key: Hashable, cost: float = 1.0):
+        """Like acquire(), but raises RateLimited instead of returning a wait."""
+        wait = self.acquire(key, cost)
+        if wait:
+            raise RateLimited(f"{self.name} rate limit reached", wait)
+
+
+def acquire_all(buckets: Iterable[Tuple[RateLimiter, Hashable]], cost: float = 1.0) -> float:
+    """Spend from every (limiter, key) only if all of them allow it.
+
+    Returns 0 when the tokens were spent, otherwise the longest wait; a
+    request refused by one bucket does not drain the others.
+    """
+    buckets = list(buckets)
+    with _ACQUIRE_LOCK:
+        now = time.monotonic()
+        wait = 0.0
+        for limiter, key in buckets:
+            limiter_wait = limiter.wait_time(key, cost, now)
+            if limiter_wait:
+                RATE_LIMITED.inc(limiter=limiter.name)
+                wait = max(wait, limiter_wait)
+        if wait:
+            return wait
+        for limiter, key in buckets:
+            limiter.spend(key, cost, now)
+        return 0.0
+
+
+def refund_all(buckets: Iterable[Tuple[RateLimiter, Hashable]], cost: float = 1.0):
+    """Undo a successful acquire_all() for a request that was then refused elsewhere."""
+    now = time.monotonic()
+    for limiter, key in buckets:
+        limiter.refund(key, cost, now)
+
+
+def format_wait(seconds: float) -> str:
+    """Whole seconds to wait, rounded up (at least 1s)."""
+    return f"{max(1, math.ceil(seconds))}s"
@@ -0,0 +1,169 @@
+"""Join/quit storm buffering for IRC membership events."""
+
+import re
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+# A netsplit QUIT reason is the two server names: "irc.a.net irc.b.net"
+# (or "*.net *.split" on networks that hide them)
+NETSPLIT_REASON = re.compile(r"^([\w*-]+(?:\.[\w*-]+)+) ([\w*-]+(?:\.[\w*-]+)+)$")
+
+
+class MembershipEvent:
+    """A single JOIN/PART/QUIT/NICK waiting to be applied."""
+
+    __slots__ = ("kind", "nick", "channel", "detail")
+
+    def __init__(self, kind: str, nick: str, channel: Optional[str] = None, detail: Optional[str] = None):
+        self.kind = kind  # 'join', 'part', 'quit' or 'nick'
+        self.nick = nick
+        self.channel = channel  # JOIN/PART only; QUIT/NICK affect every channel
+        self.detail = detail  # QUIT reason, or the new nick for NICK
+
+
+class StormBuffer:
+    """Collect membership events over a short window and apply them at once.
+
+    The first event of a quiet period arms a timer; everything that arrives
+    before it fires is handed to ``apply`` as one list, so a netsplit of
+    hundreds of QUITs costs one member-list rebuild per channel instead of
+    one per line. ``summary`` is called with ``(channels, text)`` for splits,
+    rejoins and floods large enough to be worth one aggregated line.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[List[MembershipEvent]], Dict[str, int]],
+        summary: Optional[Callable[[List[str], str], None]] = None,
+        window: float = 0.3,
+        threshold: int = 10,
+        split_memory: float = 900.0,
+    ):
+        self.apply = apply
+        self.summary = summary
+        self.window = window
+        self.threshold = threshold  # Plain join/part/quit floods below this stay silent
+        self.split_memory = split_memory  # How long split nicks are remembered for rejoin counts
+        self._events: List[MembershipEvent] = []
+        self._timer: Optional[threading.Timer] = None
+        self._holds = 0
+        self._split_nicks: Dict[str, Tuple[str, float]] = {}  # nick -> (servers, when)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Keeps timer and batch flushes in order
+
+    def push(self, kind: str, nick: str, channel: Optional[str] = None, detail: Optional[str] = None):
+        """Queue an event, arming the flush timer if this starts a new window."""
+        with self._lock:
+            self._events.append(MembershipEvent(kind, nick, channel, detail))
+            if self._timer is None and not self._holds:
+                self._arm()
+
+    def hold(self):
+        """Defer flushing (e.g. for the length of a netsplit/netjoin batch)."""
+        with self._lock:
+            self._holds += 1
+
+    def release(self, servers: Optional[str] = None):
+        """End a hold; flush immediately once no holds remain."""
+        with self._lock:
+            self._holds = max(0, self._holds - 1)
+            if self._holds:
+                return
+        self.flush(servers)
+
+    def cancel(self):
+        """Drop pending events and stop the timer (used on disconnect)."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            self._events.clear()
+            self._holds = 0
+
+    def flush(self, servers: Optional[str] = None):
+        """Apply buffered events and emit summaries.
+
+        Args:
+            servers: Split description from a netsplit/netjoin batch, used
+                instead of guessing it from QUIT reasons
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+                if self._holds:
+                    return
+                events, self._events = self._events, []
+            if not events:
+                return
+
+            channel_counts = self.apply(events)
+            lines = self._summarize(events, channel_counts, servers)
+        if self.summary:
+            for channels, text in lines:
+                self.summary(channels, text)
+
+    def _arm(self):
+        """Start the window timer (caller holds the lock)."""
+        self._timer = threading.Timer(self.window, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def _summarize(self, events: List[MembershipEvent], channel_counts: Dict[str, int],
+                   servers: Optional[str]) -> List[Tuple[List[str], str]]:
+        """Turn a window of events into aggregated lines."""
+        now = time.time()
+        self._split_nicks = {
+            nick: entry for nick, entry in self._split_nicks.items()
+            if now - entry[1] < self.split_memory
+        }
+
+        splits = Counter()
+        rejoins = Counter()
+        rejoined = set()
+        joins = parts = quits = 0
+        for event in events:
+            if event.kind == "quit":
+                match = NETSPLIT_REASON.match(event.detail or "")
+                if match or servers:
+                    label = servers or f"{match.group(1)} ↔ {match.group(2)}"
+                    splits[label] += 1
+                    self._split_nicks[event.nick] = (label, now)
+                else:
+                    quits += 1
+            elif event.kind == "join":
+                if event.nick in rejoined:
+                    continue  # Same user coming back into another channel
+                entry = self._split_nicks.pop(event.nick, None)
+                if entry or servers:
+                    rejoins[entry[0] if entry else servers] += 1
+                    rejoined.add(event.nick)
+                else:
+                    joins += 1
+            elif event.kind == "part":
+                parts += 1
+
+        channels = sorted(channel_counts)
+        lines = []
+        for label, count in splits.most_common():
+            lines.append((channels, f"⚡ Netsplit: {count} user{'s' if count != 1 else ''} split from {label}"))
+        for label, count in rejoins.most_common():
+            lines.append((channels, f"⚡ Netjoin: +{count} rejoined ({label})"))
+        if joins + parts + quits >= self.threshold:
+            counts = []
+            if joins:
+                counts.append(f"+{joins} joined")
+            if parts:
+                counts.append(f"-{parts} left")
+            if quits:
+                counts.append(f"-{quits} quit")
+            lines.append((channels, "👥 " + ", ".join(counts)))
+        return lines
@@ -0,0 +1,115 @@
+"""Background sampling of system and process stats for the dashboards."""
+
+import os
+import threading
+import time
+from typing import Optional
+
+
+class SystemSampler:
+    """Collect psutil stats on a worker thread into a shared snapshot.
+
+    Readers just look at ``snapshot`` (a dict that is replaced, never
+    mutated), so nothing on the event loop ever blocks on psutil. The thread
+    only runs while someone holds it via acquire()/release().
+    """
+
+    def __init__(self, interval: float = 1.0, disk_interval: float = 30.0):
+        self.interval = interval
+        self.disk_interval = disk_interval  # disk_usage is slow and changes slowly
+        self.available = True  # False if psutil is missing
+        self.snapshot: dict = self._empty()
+        self.version = 0  # Bumped whenever the snapshot's values change
+        self._users = 0
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None  # Stop flag of the running thread
+
+    @staticmethod
+    def _empty() -> dict:
+        return {
+            "cpu_percent": 0.0,
+            "memory_percent": 0.0,
+            "memory_used_gb": 0.0,
+            "memory_total_gb": 0.0,
+            "disk_usage_percent": 0.0,
+            "process_rss_mb": 0.0,
+            "process_cpu_percent": 0.0,
+            "net_sent_rate": 0.0,  # bytes/s
+            "net_recv_rate": 0.0,  # bytes/s
+            "net_sent_total_mb": 0.0,
+            "net_recv_total_mb": 0.0,
+            "sampled_at": 0.0,
+        }
+
+    def acquire(self):
+        """Start sampling (reference counted)."""
+        with self._lock:
+            self._users += 1
+            if self._users == 1:
+                # Fresh flag per thread, so a thread still winding down can't be revived
+                self._stop = threading.Event()
+                threading.Thread(target=self._run, args=(self._stop,), name="system-sampler", daemon=True).start()
+
+    def release(self):
+        """Stop sampling once the last user is gone."""
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0 and self._stop:
+                self._stop.set()
+
+    def _run(self, stop: threading.Event):
+        try:
+            import psutil
+        except ImportError:
+            self.available = False
+            return
+
+        process = psutil.Process(os.getpid())
+        psutil.cpu_percent(interval=None)  # First call only primes the counter
+        process.cpu_percent(interval=None)
+        last_net = psutil.net_io_counters()
+        last_time = time.monotonic()
+        disk_percent = 0.0
+        last_disk = 0.0
+
+        while not stop.wait(self.interval):
+            now = time.monotonic()
+            elapsed = max(now - last_time, 1e-6)
+            try:
+                mem = psutil.virtual_memory()
+                net = psutil.net_io_counters()
+                if now - last_disk >= self.disk_interval or not last_disk:
+                    disk_percent = psutil.disk_usage('/').percent
+                    last_disk = now
+                snapshot = {
+                    "cpu_percent": psutil.cpu_percent(interval=None),
+                    "memory_percent": mem.percent,
+                    "memory_used_gb": mem.used / (1024 ** 3),
+                    "memory_total_gb": mem.total / (1024 ** 3),
+                    "disk_usage_percent": disk_percent,
+                    "process_rss_mb": process.memory_info().rss / (1024 ** 2),
+                    "process_cpu_percent": process.cpu_percent(interval=None),
+                    "net_sent_rate": max(0, net.bytes_sent - last_net.bytes_sent) / elapsed,
+                    "net_recv_rate": max(0, net.bytes_recv - last_net.bytes_recv) / elapsed,
+                    "net_sent_total_mb": net.bytes_sent / (1024 ** 2),
+                    "net_recv_total_mb": net.bytes_recv / (1024 ** 2),
+                }
+            except Exception as e:
+                print(f"[SAMPLER] Sampling failed: {e}")
+                continue
+            last_net, last_time = net, now
+
+            changed = any(self.snapshot.get(k) != v for k, v in snapshot.items())
+            snapshot["sampled_at"] = time.time()
+            self.snapshot = snapshot
+            if changed:
+                self.version += 1
+
+
+def format_rate(bytes_per_sec: float) -> str:
+    """Human-readable transfer rate."""
+    for unit in ("B/s", "KB/s", "MB/s"):
+        if bytes_per_sec < 1024:
+            return f"{bytes_per_sec:.0f}{unit}" if unit == "B/s" else f"{bytes_per_sec:.1f}{unit}"
+        bytes_per_sec /= 1024
+    return f"{bytes_per_sec:.1f}GB/s"
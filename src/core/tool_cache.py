@@ -0,0 +1,163 @@
+"""Short-lived result cache for MCP tool calls.
+
+Several people in a channel tend to run the same ``/ai docker prod``
+within seconds of each other. ToolCache keys each call on the tool name
+plus its normalized arguments and keeps successful results for a per-tool
+TTL. Identical calls that arrive while one is still running await the
+same task instead of starting another, so the backend sees one query
+however many callers asked. The shared task outlives any one caller
+being cancelled and is only cancelled when nobody is waiting for it.
+"""
+
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.core import metrics
+
+CACHE_LOOKUPS = metrics.counter(
+    "phosphor_ai_cache_lookups_total", "AI tool cache lookups", ("tool", "result")
+)
+
+# tool -> (ttl seconds, argument normalization)
+#   "ignore": arguments do not change the answer
+#   "fold":   case- and whitespace-insensitive prompt
+#   "exact":  whitespace-insensitive only (paths, glob patterns)
+DEFAULT_POLICIES: Dict[str, Tuple[float, str]] = {
+    "docker-health": (10.0, "fold"),
+    "docker-stats": (5.0, "ignore"),
+    "azure": (15.0, "fold"),
+    "azure-containers": (15.0, "fold"),
+    "system-info": (300.0, "ignore"),
+    "analyze-db": (30.0, "ignore"),
+    "list-files": (5.0, "exact"),
+    "read-file": (5.0, "exact"),
+    "search-files": (10.0, "exact"),
+}
+
+
+class _Flight:
+    """A running call and how many callers are waiting for it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class ToolCache:
+    """TTL cache with in-flight sharing, keyed on ``(tool, normalized args)``.
+
+    Results carrying an ``"error"`` key are never stored, and tools without
+    a policy (or with a TTL of 0) always run.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 256):
+        """
+        Args:
+            ttls: Per-tool TTL overrides in seconds (0 disables caching for a tool)
+            max_entries: Least recently used entries beyond this are dropped
+        """
+        self.policies = dict(DEFAULT_POLICIES)
+        for tool, ttl in (ttls or {}).items():
+            mode = self.policies.get(tool, (0, "exact"))[1]
+            self.policies[tool] = (float(ttl), mode)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[float, dict]]" = OrderedDict()  # key -> (expires, result)
+        self._inflight: Dict[tuple, _Flight] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def key(self, tool: str, args: Optional[Dict[str, Any]]) -> Optional[tuple]:
+        """Cache key for a call, or None if the tool is not cached."""
+        ttl, mode = self.policies.get(tool, (0, "exact"))
+        if ttl <= 0:
+            return None
+        if mode == "ignore":
+            return (tool,)
+        normalized = {}
+        for name, value in (args or {}).items():
+            if isinstance(value, str):
+                value = re.sub(r"\s+", " ", value.strip())
+                if mode == "fold":
+                    value = value.lower()
+            normalized[name] = value
+        return (tool, json.dumps(normalized, sort_keys=True, default=str))
+
+    async def get_or_run(self, tool: str, args: Optional[Dict[str, Any]],
+                         run: Callable[[], Awaitable[dict]]) -> dict:
+        """Return a cached result for the call, or ``await run()`` and cache it.
+
+        Callers get their own shallow copy, so adding keys to the result
+        does not leak into the cache.
+        """
+        key = self.key(tool, args)
+        if key is None:
+            return await run()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(tool, "hit")
+                return dict(entry[1])
+            del self._entries[key]
+
+        flight = self._inflight.get(key)
+        if flight is not None and flight.task.get_loop() is asyncio.get_running_loop():
+            self._count(tool, "coalesced")
+        else:
+            self._count(tool, "miss")
+            flight = self._inflight[key] = _Flight(asyncio.ensure_future(self._run(tool, key, run)))
+        # Every caller, the one that started it included, only waits: cancelling one leaves the rest
+        flight.waiters += 1
+        try:
+            return dict(await asyncio.shield(flight.task))
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()  # Nobody is left to want the answer
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+
+    async def _run(self, tool: str, key: tuple, run: Callable[[], Awaitable[dict]]) -> dict:
+        try:
+            result = await run()
+        finally:
+            flight = self._inflight.get(key)
+            if flight is not None and flight.task is asyncio.current_task():
+                del self._inflight[key]
+        if isinstance(result, dict) and "error" not in result:
+            self._store(key, self.policies[tool][0], result)
+        return result
+
+    def _store(self, key: tuple, ttl: float, result: dict):
+        self._entries[key] = (time.monotonic() + ttl, dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _count(self, tool: str, result: str):
+        CACHE_LOOKUPS.inc(tool=tool, result=result)
+        if result == "miss":
+            self.misses[tool] = self.misses.get(tool, 0) + 1
+        else:
+            self.hits[tool] = self.hits.get(tool, 0) + 1
+
+    def invalidate(self, tool: Optional[str] = None):
+        """Drop cached results for one tool, or all of them."""
+        if tool is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == tool]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-tool ``{"hits", "misses", "hit_rate"}`` (coalesced calls count as hits)."""
+        stats = {}
+        for tool in sorted(set(self.hits) | set(self.misses)):
+            hits, misses = self.hits.get(tool, 0), self.misses.get(tool, 0)
+            stats[tool] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+        return stats
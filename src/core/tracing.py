@@ -0,0 +1,246 @@
+"""Sampled spans written as a Chrome trace (open in Perfetto or chrome://tracing).
+
+Usage::
+
+    with tracing.span("irc.PRIVMSG", target=channel):
+        ...
+
+    @tracing.traced("chat.add_message")
+    def add_message(...): ...
+
+A span opened with no enclosing span is a root; it is sampled with
+probability ``sample_rate`` and its children follow that decision, so a
+sampled message is traced end to end. Work handed to another thread
+carries the trace along with ``handoff()``/``resume()``, which also draws
+a flow arrow between the two in the viewer.
+
+When tracing is off, ``span()`` is an attribute check returning a shared
+no-op context manager.
+"""
+
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# 0 = inside an unsampled root, >0 = trace id of a sampled root, None = no span open
+_current: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("phosphor_trace", default=None)
+
+
+class _NoopSpan:
+    """Returned whenever nothing should be recorded."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Unsampled:
+    """Marks the context as 'not sampled' so child spans are skipped too."""
+
+    __slots__ = ("token",)
+
+    def __enter__(self):
+        self.token = _current.set(0)
+        return self
+
+    def __exit__(self, *exc):
+        _current.reset(self.token)
+        return False
+
+    def set(self, **args):
+        pass
+
+
+class Span:
+    """A timed, recorded section ('X' complete event)."""
+
+    __slots__ = ("tracer", "name", "cat", "args", "trace_id", "start", "token", "flow")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: dict, trace_id: int, flow: Optional[int] = None):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.trace_id = trace_id
+        self.flow = flow  # Incoming flow id from handoff(), if any
+
+    def set(self, **args):
+        """Attach extra arguments once they are known."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.token = _current.set(self.trace_id)
+        self.start = time.perf_counter_ns()
+        if self.flow is not None:
+            self.tracer._emit({"ph": "f", "bp": "e", "id": self.flow, "name": "handoff", "cat": "flow",
+                               "ts": self.start / 1000})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        _current.reset(self.token)
+        args = self.args
+        args["trace"] = self.trace_id
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+        self.tracer._emit({"ph": "X", "name": self.name, "cat": self.cat,
+                           "ts": self.start / 1000, "dur": (end - self.start) / 1000, "args": args})
+        return False
+
+
+class Tracer:
+    """Collects span events in memory and writes them out on stop()/flush()."""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.path: Optional[Path] = None
+        self.max_events = 200_000  # Later events are dropped (and counted) to bound memory
+        self.dropped = 0
+        self._events: list = []
+        self._threads: dict = {}  # tid -> thread name, for metadata events
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self, path: str = ".phosphor/diagnostics/trace.json", sample_rate: float = 1.0):
+        """Begin recording.
+
+        Args:
+            path: Where stop()/flush() write the trace
+            sample_rate: Fraction of root spans (and their children) to keep
+        """
+        with self._lock:
+            self.path = Path(path)
+            self.sample_rate = max(0.0, min(1.0, sample_rate))
+            self._events = []
+            self._threads = {}
+            self.dropped = 0
+            self.enabled = True
+
+    def stop(self) -> Optional[Path]:
+        """Stop recording and write the trace; returns its path."""
+        if not self.enabled:
+            return None
+        self.enabled = False
+        return self.flush()
+
+    def span(self, name: str, cat: str = "phosphor", **args):
+        """Context manager timing a section (no-op unless tracing and sampled)."""
+        if not self.enabled:
+            return _NOOP
+        trace_id = _current.get()
+        if trace_id is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return _Unsampled()
+            trace_id = next(self._ids)
+        elif trace_id == 0:
+            return _NOOP
+        return Span(self, name, cat, args, trace_id)
+
+    def handoff(self) -> Optional[tuple]:
+        """Capture the current trace so another thread can continue it."""
+        if not self.enabled:
+            return None
+        trace_id = _current.get()
+        if trace_id is None:
+            return None
+        if trace_id == 0:
+            return 0, None  # Keep the far side unsampled as well
+        flow = next(self._ids)
+        self._emit({"ph": "s", "id": flow, "name": "handoff", "cat": "flow", "ts": time.perf_counter_ns() / 1000})
+        return trace_id, flow
+
+    def resume(self, token: Optional[tuple], name: str, cat: str = "phosphor", **args):
+        """Open a span continuing a trace captured by handoff()."""
+        if token is None or not self.enabled:
+            return _NOOP
+        trace_id, flow = token
+        if not trace_id:
+            return _Unsampled()
+        return Span(self, name, cat, args, trace_id, flow)
+
+    def traced(self, name: Optional[str] = None, cat: str = "phosphor"):
+        """Decorator wrapping a function (plain or async) in a span."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    with self.span(span_name, cat):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(span_name, cat):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _emit(self, event: dict):
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        event["pid"] = os.getpid()
+        event["tid"] = tid
+        self._events.append(event)
+
+    def flush(self) -> Optional[Path]:
+        """Write everything recorded so far (Chrome trace JSON object format)."""
+        if self.path is None:
+            return None
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [{"ph": "M", "name": "process_name", "pid": pid, "args": {"name": "phosphor"}}]
+        metadata += [
+            {"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+            for tid, thread_name in threads.items()
+        ]
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "traceEvents": metadata + events,
+                    "displayTimeUnit": "ms",
+                    "otherData": {"sample_rate": self.sample_rate, "dropped_events": self.dropped},
+                }, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[TRACE] Failed to write {self.path}: {e}")
+            return None
+        return self.path
+
+
+TRACER = Tracer()
+span = TRACER.span
+traced = TRACER.traced
+handoff = TRACER.handoff
+resume = TRACER.resume
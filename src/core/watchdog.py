@@ -0,0 +1,165 @@
+"""Event-loop stall detection with stack sampling, written to .phosphor/diagnostics."""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+from src.core import metrics
+
+LOOP_LAG = metrics.histogram("phosphor_loop_lag_seconds", "Event loop scheduling lag per heartbeat")
+LOOP_STALLS = metrics.counter("phosphor_loop_stalls_total", "Event loop stalls above the watchdog threshold")
+
+
+class Stall:
+    """One period where the event loop missed its heartbeat."""
+
+    __slots__ = ("started", "duration", "samples")
+
+    def __init__(self, started: float):
+        self.started = started  # Wall-clock time the loop stopped responding
+        self.duration = 0.0
+        self.samples: Counter = Counter()  # stack (tuple of frames) -> times seen
+
+    def to_dict(self) -> dict:
+        total = sum(self.samples.values())
+        stacks = []
+        for stack, count in self.samples.most_common(3):
+            summary = traceback.StackSummary.from_list(list(stack))
+            stacks.append({
+                "samples": count,
+                "share": round(count / total, 3) if total else 0,
+                "traceback": "".join(summary.format()),
+            })
+        return {
+            "started": self.started,
+            "duration_ms": round(self.duration * 1000, 1),
+            "samples": total,
+            "stacks": stacks,
+        }
+
+
+class LoopWatchdog:
+    """Measure event-loop lag and capture what the loop was doing when it stalled.
+
+    A heartbeat task on the loop records how late each ``interval`` sleep
+    wakes up. A monitor thread checks the last heartbeat; once the loop is
+    more than ``threshold`` behind, it samples the loop thread's stack from
+    ``sys._current_frames()`` every ``sample_interval`` until the heartbeat
+    returns. The ``keep`` longest stalls are kept and written to
+    ``<out_dir>/stalls.json``.
+
+    While the loop is healthy the thread only wakes once per ``interval``
+    to compare two floats, so it is cheap enough to leave running.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.25,
+        interval: float = 0.1,
+        sample_interval: float = 0.01,
+        keep: int = 20,
+        out_dir: str = ".phosphor/diagnostics",
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.sample_interval = sample_interval
+        self.keep = keep
+        self.out_dir = Path(out_dir)
+        self.stalls: List[Stall] = []  # Worst first, at most ``keep``
+        self.running = False
+        self._last_beat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[threading.Event] = None
+
+    def start(self):
+        """Start watching the running event loop (call from the loop thread)."""
+        if self.running:
+            return
+        self.running = True
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop = threading.Event()
+        threading.Thread(target=self._monitor, args=(self._stop,), name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        """Stop watching; recorded stalls are kept."""
+        if not self.running:
+            return
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._stop:
+            self._stop.set()
+            self._stop = None
+
+    @property
+    def stalls_path(self) -> Path:
+        return self.out_dir / "stalls.json"
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            LOOP_LAG.observe(max(0.0, loop.time() - expected))
+            self._last_beat = time.monotonic()
+
+    def _monitor(self, stop: threading.Event):
+        stall: Optional[Stall] = None
+        while not stop.wait(self.sample_interval if stall else self.interval):
+            behind = time.monotonic() - self._last_beat - self.interval
+            if behind >= self.threshold:
+                if stall is None:
+                    stall = Stall(time.time() - behind)
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    stall.samples[_stack(frame)] += 1
+            elif stall is not None:
+                stall.duration = time.time() - stall.started
+                self._record(stall)
+                stall = None
+
+    def _record(self, stall: Stall):
+        """Keep a finished stall if it ranks among the worst, then persist."""
+        LOOP_STALLS.inc()
+        if len(self.stalls) >= self.keep and stall.duration <= self.stalls[-1].duration:
+            return
+        self.stalls.append(stall)
+        self.stalls.sort(key=lambda s: s.duration, reverse=True)
+        del self.stalls[self.keep:]
+        self._write()
+
+    def _write(self):
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.stalls_path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "pid": os.getpid(),
+                    "threshold_ms": self.threshold * 1000,
+                    "stalls": [s.to_dict() for s in self.stalls],
+                }, f, indent=2)
+            os.replace(tmp, self.stalls_path)
+        except OSError as e:
+            print(f"[WATCHDOG] Failed to write {self.stalls_path}: {e}")
+
+
+def _stack(frame, limit: int = 40) -> tuple:
+    """Cheap, hashable stack key (outermost frame first); source lines are looked up on write."""
+    frames = []
+    while frame is not None and len(frames) < limit:
+        code = frame.f_code
+        frames.append((code.co_filename, frame.f_lineno, code.co_name, None))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
@@ -0,0 +1,248 @@
+"""Pool of long-lived worker processes speaking line-delimited JSON.
+
+Starting an AI CLI per request pays process start-up and agent
+initialization every time. WorkerPool keeps ``size`` workers running and
+hands each request to an idle one, so a burst is served at steady-state
+latency. One JSON object per line, in both directions::
+
+    worker -> {"type": "ready"}                                  once started
+    pool   -> {"id": 1, "type": "ping"}
+    worker -> {"id": 1, "type": "pong"}
+    pool   -> {"id": 2, "type": "request", "prompt": "...", ...}
+    worker -> {"id": 2, "type": "response", "message": "..."}
+           or {"id": 2, "type": "error", "error": "..."}
+
+Anything else a worker prints is ignored. Closing stdin asks a worker to
+exit. Workers are replaced in the background when they crash, time out,
+fail a health check, or have served ``max_requests`` requests.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from src.core import metrics
+
+POOL_CALLS = metrics.histogram("phosphor_worker_pool_call_seconds", "Worker pool request time", ("pool",))
+POOL_RECYCLES = metrics.counter("phosphor_worker_pool_recycles_total", "Workers replaced", ("pool", "reason"))
+
+
+class WorkerError(Exception):
+    """A worker failed, timed out, or returned an error."""
+
+
+class _Worker:
+    """One worker process."""
+
+    def __init__(self, command: List[str], env: Optional[Dict[str, str]], name: str):
+        self.command = command
+        self.env = env
+        self.name = name
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.served = 0
+        self._ids = itertools.count(1)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self, timeout: float):
+        """Spawn the process and wait for its ready line."""
+        self.served = 0
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                env={**os.environ, **(self.env or {})},
+                limit=16 * 1024 * 1024,
+            )
+        except OSError as e:
+            self.process = None
+            raise WorkerError(f"{self.name}: cannot start {self.command[0]}: {e}") from e
+        try:
+            await asyncio.wait_for(self._read_until(lambda m: m.get("type") == "ready"), timeout)
+        except (asyncio.TimeoutError, WorkerError) as e:
+            await self.kill()
+            raise WorkerError(f"{self.name}: not ready after {timeout:.0f}s") from e
+
+    async def _read_until(self, wanted) -> dict:
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                raise WorkerError(f"{self.name}: exited (code {await self.process.wait()})")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # Log output
+            if isinstance(message, dict) and wanted(message):
+                return message
+
+    async def send(self, message: dict, timeout: float) -> dict:
+        """Send one message and wait for the reply with the same id."""
+        if not self.alive:
+            raise WorkerError(f"{self.name}: not running")
+        message_id = next(self._ids)
+        try:
+            self.process.stdin.write(json.dumps({"id": message_id, **message}).encode("utf-8") + b"\n")
+            await self.process.stdin.drain()
+            return await asyncio.wait_for(self._read_until(lambda m: m.get("id") == message_id), timeout)
+        except ConnectionError as e:
+            raise WorkerError(f"{self.name}: write failed: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise WorkerError(f"{self.name}: no reply within {timeout:.0f}s") from e
+
+    async def stop(self, grace: float = 2.0):
+        """Close stdin and give the worker a moment to exit, then kill it."""
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), grace)
+        except (asyncio.TimeoutError, ConnectionError):
+            await self.kill()
+
+    async def kill(self):
+        if self.alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+            await self.process.wait()
+
+
+class WorkerPool:
+    """Fixed-size pool of warm workers, each handling one request at a time."""
+
+    def __init__(self, command: List[str], size: int = 2, name: str = "worker",
+                 max_requests: int = 100, timeout: float = 60.0, startup_timeout: float = 30.0,
+                 health_interval: float = 30.0, env: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            command: Worker executable and arguments
+            size: Number of workers
+            name: Metrics label and worker name prefix
+            max_requests: Recycle a worker after this many requests (0 = never)
+            timeout: Seconds a request may take before its worker is killed
+            startup_timeout: Seconds a new worker has to print its ready line
+            health_interval: Seconds between pings of idle workers (0 = off)
+            env: Extra environment variables for workers
+        """
+        self.command = command
+        self.size = size
+        self.name = name
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.health_interval = health_interval
+        self.env = env
+        self._workers = [_Worker(command, env, f"{name}-{i}") for i in range(size)]
+        self._idle: Optional[asyncio.Queue] = None
+        self._tasks: set = set()
+        self._health: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start every worker (in parallel) and the health checks.
+
+        Workers that fail to start are retried in the background; raises
+        WorkerError only if none came up.
+        """
+        self._idle = asyncio.Queue()
+        results = await asyncio.gather(
+            *(worker.start(self.startup_timeout) for worker in self._workers), return_exceptions=True
+        )
+        for worker, result in zip(self._workers, results):
+            if isinstance(result, Exception):
+                print(f"[WORKER POOL] {result}")
+                self._respawn(worker, "start_failed")
+            else:
+                self._idle.put_nowait(worker)
+        if self.health_interval:
+            self._health = asyncio.create_task(self._health_loop())
+        if all(isinstance(result, Exception) for result in results):
+            raise WorkerError(f"{self.name}: no worker could be started")
+
+    async def call(self, prompt: str, **fields: Any) -> Dict[str, Any]:
+        """Run one request on an idle worker and return its response message.
+
+        Raises:
+            WorkerError: no worker is running or none came free within ``timeout``;
+                the worker crashed, timed out or answered with an error
+        """
+        if self._idle is None:
+            raise WorkerError(f"{self.name}: pool not started")
+        # Fail fast (so callers can fall back) instead of queueing behind workers that are not there
+        if not any(worker.alive for worker in self._workers):
+            raise WorkerError(f"{self.name}: no worker is running")
+        try:
+            worker = await asyncio.wait_for(self._idle.get(), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise WorkerError(f"{self.name}: no worker free within {self.timeout:.0f}s") from e
+        started = time.monotonic()
+        try:
+            response = await worker.send({"type": "request", "prompt": prompt, **fields}, self.timeout)
+        except WorkerError:
+            self._respawn(worker, "failed")
+            raise
+        except asyncio.CancelledError:
+            self._respawn(worker, "cancelled")  # Mid-request: its next reply would be stale
+            raise
+        finally:
+            POOL_CALLS.observe(time.monotonic() - started, pool=self.name)
+        worker.served += 1
+        if self.max_requests and worker.served >= self.max_requests:
+            self._respawn(worker, "recycled")
+        else:
+            self._idle.put_nowait(worker)
+        if response.get("type") == "error":
+            raise WorkerError(response.get("error") or "worker error")
+        return response
+
+    def _respawn(self, worker: _Worker, reason: str):
+        """Replace a worker in the background; it rejoins the idle queue once ready."""
+        POOL_RECYCLES.inc(pool=self.name, reason=reason)
+
+        async def replace():
+            delay = 1.0
+            if reason == "recycled":
+                await worker.stop()
+            else:
+                await worker.kill()
+            while True:
+                try:
+                    await worker.start(self.startup_timeout)
+                    self._idle.put_nowait(worker)
+                    return
+                except WorkerError as e:
+                    print(f"[WORKER POOL] {e}; retrying in {delay:.0f}s")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 60.0)
+
+        task = asyncio.create_task(replace())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _health_loop(self):
+        """Ping idle workers; replace any that do not answer."""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for _ in range(self._idle.qsize()):
+                worker = self._idle.get_nowait()
+                try:
+                    await worker.send({"type": "ping"}, min(self.timeout, 5.0))
+                except WorkerError as e:
+                    print(f"[WORKER POOL] Health check failed: {e}")
+                    self._respawn(worker, "unhealthy")
+                    continue
+                self._idle.put_nowait(worker)
+
+    async def close(self):
+        """Stop health checks, pending replacements and every worker."""
+        for task in list(self._tasks) + ([self._health] if self._health else []):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *([self._health] if self._health else []), return_exceptions=True)
+        await asyncio.gather(*(worker.stop() for worker in self._workers), return_exceptions=True)
@@ -1,111 +1,848 @@
+"""Magic Wormhole integration for peer-to-peer file transfers.
 
+TransferManager runs any number of sends and receives at once, each as
+a ``wormhole`` CLI process driven from the event loop, and turns the
+CLI's progress bar into bytes, bytes/s and ETA for the transfers panel.
 
-"""Magic Wormhole integration for peer-to-peer file transfers."""
+The magic-wormhole library is not used in-process: it runs on Twisted,
+whose reactor would have to be installed onto Textual's asyncio loop
+before anything imports Twisted, and its file-transfer protocol (offer,
+transit, ack) lives in the CLI rather than the library API. One process
+per transfer also keeps a stuck transfer from stalling the UI or the
+others, and makes cancellation a kill.
+
+Directories and globs are not zipped to disk first: ``send_archive``
+serves an ArchiveStream over a direct TCP connection and hands out a
+``stream://host:port/key`` code that ``/grab`` accepts like a wormhole
+code. The receiver unpacks as it reads and verifies each file's
+checksum (see archive_stream). Unlike wormhole there is no relay or NAT
+traversal, so the receiver must be able to reach the sender's address,
+and no PAKE: the stream is encrypted and authenticated (NaCl SecretBox)
+with a random key carried in the code itself, so it is as private as
+the channel the code is shared over. An unused offer closes after
+``stream_timeout`` seconds.
+
+Single files can also go by DCC SEND (see dcc) when the peer is on the
+same machine or network: ``offer_dcc`` listens and sends the offer over
+IRC through the ``send_dcc`` callback, ``handle_dcc`` takes the peer's
+offers, RESUME and ACCEPT requests, and ``accept_dcc`` receives into a
+``.part`` file that a later offer of the same file resumes from.
+"""
 
 import asyncio
-import subprocess
-from typing import Optional, Callable
-
-
-class WormholeClient:
-    """Client for Magic Wormhole file transfers."""
-    
-    def __init__(self):
-        self.status_callback: Optional[Callable] = None
-    
-    async def send_file(self, filepath: str) -> str:
-        """Send a file and return the wormhole code."""
+import base64
+import itertools
+import json
+import os
+import queue
+import re
+import secrets
+import socket
+import struct
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.dcc import DccRequest, reachable, receive_file, resolve, safe_filename, send_file
+
+# tqdm (unit="B", unit_scale=True) prints e.g. " 27%|██▋ | 2.75M/10.0M [00:00<00:01, 5.51MB/s]"
+_PROGRESS = re.compile(r"(\d+(?:\.\d+)?)([kMGTP]?)B?/(\d+(?:\.\d+)?)([kMGTP]?)B?\s*\[")
+_CODE = re.compile(r"wormhole (?:code is:|receive)\s+(?:--\S+\s+)*(\S+)", re.IGNORECASE)
+_UNITS = {"": 1, "k": 10**3, "M": 10**6, "G": 10**9, "T": 10**12, "P": 10**15}
+
+ACTIVE_STATES = ("waiting", "transferring")
+STREAM_SCHEME = "stream://"
+DCC_SCHEME = "dcc://"
+MAX_DCC_OFFERS = 32  # Offers not yet accepted; the oldest are dropped
+_STREAM_CODE = re.compile(r"stream://\[?([^\]/]+?)\]?:(\d+)/([A-Za-z0-9_-]{43})$")
+_STREAM_HELLO = b"phosphor-stream-1"
+_FRAME = struct.Struct("!I")
+_NONCE = struct.Struct("!B15xQ")  # Direction, counter: 24 bytes, never sent
+MAX_FRAME = 16 * 1024 * 1024
+
+
+class TransferError(Exception):
+    """A transfer could not be started."""
+
+
+class _SealedChannel:
+    """One side of an archive stream: length-prefixed SecretBox frames.
+
+    Nonces are a per-direction counter known to both ends, so a dropped,
+    replayed or reordered frame fails to decrypt. An empty frame ends the
+    stream, which tells a finished stream from a cut connection.
+    """
+
+    SENDER, RECEIVER = 0, 1
+    END = 16  # Length of a sealed empty frame (just the MAC)
+
+    def __init__(self, key: bytes, role: int):
+        try:
+            from nacl.secret import SecretBox
+        except ImportError as e:
+            raise TransferError("archive streams need PyNaCl: pip install pynacl") from e
+        self._box = SecretBox(key)
+        self._out, self._in = role, 1 - role
+        self._sent = itertools.count()
+        self._received = itertools.count()
+
+    def seal(self, data: bytes) -> bytes:
+        sealed = self._box.encrypt(data, _NONCE.pack(self._out, next(self._sent))).ciphertext
+        return _FRAME.pack(len(sealed)) + sealed
+
+    async def read_frame(self, reader: asyncio.StreamReader) -> bytes:
+        """The next frame, still sealed (see open()).
+
+        Raises:
+            ConnectionError: the connection closed mid-frame, or the frame is oversized
+        """
         try:
-            # wormhole outputs to stderr, so we merge stderr into stdout
-            process = await asyncio.create_subprocess_exec(
-                "wormhole", "send", "--hide-progress", filepath,
+            length, = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+            if length > MAX_FRAME:
+                raise ConnectionError(f"oversized frame ({length} bytes)")
+            return await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("connection closed mid-stream") from None
+
+    def open(self, sealed: bytes) -> bytes:
+        """Decrypt the next frame (frames must be opened in the order they arrived).
+
+        Raises:
+            TransferError: the frame is forged, replayed or out of order, or the key is wrong
+        """
+        from nacl.exceptions import CryptoError
+
+        try:
+            return self._box.decrypt(sealed, _NONCE.pack(self._in, next(self._received)))
+        except CryptoError:
+            raise TransferError("stream failed authentication (wrong code or tampering)") from None
+
+    async def read(self, reader: asyncio.StreamReader) -> bytes:
+        """The next frame's plaintext (ConnectionError or TransferError as above)."""
+        return self.open(await self.read_frame(reader))
+
+
+def format_bytes(count: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1000 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1000
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class Transfer:
+    """One send or receive; ``state`` is waiting, transferring, done, failed or cancelled."""
+
+    def __init__(self, transfer_id: int, direction: str, name: str):
+        self.id = transfer_id
+        self.direction = direction  # "send" or "receive"
+        self.name = name
+        self.code: Optional[str] = None
+        self.peer: Optional[str] = None  # Nick the code was shared with, if any
+        self.state = "waiting"
+        self.error: Optional[str] = None
+        self.total = 0
+        self.done = 0
+        self.rate = 0.0  # Bytes/s, smoothed
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self._sample = (self.started, 0)
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._task: Optional[asyncio.Task] = None
+        self._socket: Optional[socket.socket] = None  # DCC connection while a worker thread uses it
+        self._offset = 0  # DCC send: where to start (a RESUME moves it)
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    @property
+    def eta(self) -> Optional[float]:
+        if not self.rate or not self.total:
+            return None
+        return max(self.total - self.done, 0) / self.rate
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def _progress(self, done: int, total: int):
+        now = time.monotonic()
+        last_time, last_done = self._sample
+        if now - last_time >= 0.25 and done >= last_done:
+            rate = (done - last_done) / (now - last_time)
+            self.rate = rate if not self.rate else 0.7 * self.rate + 0.3 * rate
+            self._sample = (now, done)
+        self.done, self.total = done, total
+        if self.state == "waiting":
+            self.state = "transferring"
+
+    async def wait(self) -> bool:
+        """Wait for the transfer to end; True if it completed."""
+        if self._task:
+            try:
+                await asyncio.shield(self._task)
+            except asyncio.CancelledError:
+                if not self._task.cancelled():
+                    raise  # We were cancelled, not the transfer
+        return self.state == "done"
+
+    def summary(self) -> str:
+        """One line for the transfers panel or /transfers."""
+        arrow = "📤" if self.direction == "send" else "📥"
+        if self.state == "waiting":
+            detail = f"waiting for peer ({self.code})" if self.code else "connecting"
+        elif self.state == "transferring":
+            percent = f"{min(self.done * 100 // self.total, 100)}% " if self.total else ""
+            detail = (f"{percent}{format_bytes(self.done)}/{format_bytes(self.total)}  "
+                      f"{format_bytes(self.rate)}/s  ETA {format_eta(self.eta)}")
+        elif self.state == "done":
+            detail = f"done, {format_bytes(self.total)} at {format_bytes(self.total / max(self.elapsed, 1e-3))}/s"
+        else:
+            detail = self.error or self.state
+        return f"[{self.id}] {arrow} {self.name}  {detail}"
+
+
+class TransferManager:
+    """Concurrent wormhole sends and receives with progress reporting."""
+
+    def __init__(self, command: Sequence[str] = ("wormhole",), relay_url: Optional[str] = None,
+                 transit_helper: Optional[str] = None, on_update: Optional[Callable[[Transfer], None]] = None,
+                 update_interval: float = 0.25, stream_host: Optional[str] = None, stream_port: int = 0,
+                 send_dcc: Optional[Callable[[str, DccRequest], None]] = None,
+                 dcc_ports: Optional[Tuple[int, int]] = None, dcc_timeout: float = 300.0,
+                 stream_timeout: float = 300.0):
+        """
+        Args:
+            command: The wormhole CLI (or a stand-in speaking the same output)
+            relay_url: Mailbox server, e.g. ws://127.0.0.1:4000/v1 (default: the public one)
+            transit_helper: Transit relay, e.g. tcp:127.0.0.1:4001
+            on_update: Called on the event loop when a transfer changes
+            update_interval: Minimum seconds between progress updates per transfer
+            stream_host: Address put in stream:// codes and DCC offers (default: this machine's outbound address)
+            stream_port: Port archive streams listen on (default: any free port)
+            send_dcc: Sends a DCC request to a nick over IRC; without it there is no DCC
+            dcc_ports: First and last port DCC offers may listen on (default: any free port)
+            dcc_timeout: Seconds a DCC offer waits for the peer to connect
+            stream_timeout: Seconds an archive stream waits for the receiver to connect
+        """
+        self.stream_host = stream_host
+        self.stream_port = stream_port
+        self.send_dcc = send_dcc
+        self.dcc_ports = dcc_ports
+        self.dcc_timeout = dcc_timeout
+        self.stream_timeout = stream_timeout
+        self.dcc_offers: "OrderedDict[str, Tuple[str, DccRequest]]" = OrderedDict()  # code -> (nick, offer)
+        self._dcc_sends: Dict[Tuple[str, int], Transfer] = {}  # (nick, port) -> offer waiting for a connection
+        self._dcc_resumes: Dict[Tuple[str, int], asyncio.Future] = {}  # (nick, port) -> RESUME awaiting ACCEPT
+        self._offer_ids = itertools.count(1)
+        self.command = list(command)
+        if relay_url:
+            self.command += ["--relay-url", relay_url]
+        if transit_helper:
+            self.command += ["--transit-helper", transit_helper]
+        self.on_update = on_update
+        self.update_interval = update_interval
+        self.transfers: Dict[int, Transfer] = {}
+        self._ids = itertools.count(1)
+
+    def active(self) -> List[Transfer]:
+        return [transfer for transfer in self.transfers.values() if transfer.active]
+
+    async def send(self, path: str) -> Transfer:
+        """Offer a file or directory; returns once the code is known.
+
+        Raises:
+            TransferError: the CLI is missing or failed before printing a code
+        """
+        transfer = Transfer(next(self._ids), "send", os.path.basename(os.path.normpath(path)) or path)
+        if os.path.isfile(path):
+            transfer.total = os.path.getsize(path)
+        code_ready = asyncio.get_running_loop().create_future()
+        await self._start(transfer, ["send", path], code_ready=code_ready)
+        await asyncio.wait([code_ready, transfer._task], return_when=asyncio.FIRST_COMPLETED)
+        if not code_ready.done():
+            raise TransferError(transfer.error or "wormhole exited without a code")
+        return transfer
+
+    async def receive(self, code: str, output_dir: str = ".") -> Transfer:
+        """Start receiving into ``output_dir``; returns at once (see Transfer.wait()).
+
+        Raises:
+            TransferError: the CLI is missing
+        """
+        transfer = Transfer(next(self._ids), "receive", code)
+        transfer.code = code
+        await self._start(transfer, ["receive", "--accept-file", code], cwd=output_dir)
+        return transfer
+
+    async def _start(self, transfer: Transfer, arguments: List[str], cwd: Optional[str] = None,
+                     code_ready: Optional[asyncio.Future] = None):
+        try:
+            transfer._process = await asyncio.create_subprocess_exec(
+                *self.command, *arguments,
+                cwd=cwd,
+                stdin=asyncio.subprocess.DEVNULL,
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.STDOUT
+                stderr=asyncio.subprocess.STDOUT,  # wormhole reports on stderr
             )
-            
-            # Read output to find the code
-            code = None
-            while True:
-                line = await process.stdout.readline()
+        except OSError as e:
+            raise TransferError(f"cannot run {self.command[0]}: {e}") from e
+        self.transfers[transfer.id] = transfer
+        transfer._task = asyncio.create_task(self._run(transfer, code_ready))
+        self._notify(transfer)
+
+    async def _run(self, transfer: Transfer, code_ready: Optional[asyncio.Future]):
+        """Follow the CLI's output until it exits."""
+        process = transfer._process
+        pending = b""
+        last_update = 0.0
+        output: List[str] = []
+        while True:
+            chunk = await process.stdout.read(4096)
+            if not chunk:
+                break
+            # Progress bars redraw with \r, so split on both line endings
+            parts = re.split(rb"[\r\n]", pending + chunk)
+            pending = parts.pop()
+            for raw in parts:
+                line = raw.decode("utf-8", "replace").strip()
                 if not line:
+                    continue
+                match = _PROGRESS.search(line)
+                if match:
+                    done = float(match.group(1)) * _UNITS[match.group(2)]
+                    total = float(match.group(3)) * _UNITS[match.group(4)]
+                    transfer._progress(int(done), int(total))
+                    now = time.monotonic()
+                    if now - last_update >= self.update_interval:
+                        last_update = now
+                        self._notify(transfer)
+                    continue
+                output.append(line)
+                if code_ready and not code_ready.done():
+                    code = _CODE.search(line)
+                    if code:
+                        transfer.code = code.group(1)
+                        code_ready.set_result(transfer.code)
+                        self._notify(transfer)
+                if line.startswith("Receiving ") and " into: " in line and transfer.direction == "receive":
+                    transfer.name = line.rsplit(" into: ", 1)[1].strip()
+        await process.wait()
+        transfer.finished = time.monotonic()
+        if transfer.state != "cancelled":
+            if process.returncode == 0:
+                transfer.state = "done"
+                transfer.done = transfer.total = max(transfer.total, transfer.done)
+            else:
+                transfer.state = "failed"
+                transfer.error = output[-1] if output else f"wormhole exited with {process.returncode}"
+        self._notify(transfer)
+
+    async def send_archive(self, spec: str) -> Transfer:
+        """Offer a directory or glob as a streamed archive; returns once listening.
+
+        Raises:
+            TransferError: nothing matches, PyNaCl is missing, or no port could be opened
+        """
+        from src.core.archive_stream import ArchiveStream, expand
+
+        key = secrets.token_bytes(32)
+        _SealedChannel(key, _SealedChannel.SENDER)  # PyNaCl is there before any work is done
+        name, entries = await asyncio.to_thread(expand, spec)
+        if not entries:
+            raise TransferError(f"nothing matches {spec}")
+        stream = await asyncio.to_thread(ArchiveStream, name, entries)  # Samples files to pick the codec
+        transfer = Transfer(next(self._ids), "send", stream.name)
+        transfer.total = stream.total
+        peer: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            # The receiver proves it holds the key by sealing a fresh challenge (no replays)
+            channel = _SealedChannel(key, _SealedChannel.SENDER)
+            challenge = secrets.token_bytes(16)
+            try:
+                writer.write(challenge)
+                hello = await asyncio.wait_for(channel.read(reader), 10)
+            except (asyncio.TimeoutError, ConnectionError, TransferError):
+                hello = b""
+            if hello != _STREAM_HELLO + challenge or peer.done():
+                writer.close()
+                return
+            peer.set_result((reader, writer, channel))
+
+        try:
+            server = await asyncio.start_server(on_connect, host="0.0.0.0", port=self.stream_port)
+        except OSError as e:
+            raise TransferError(f"cannot listen for the archive stream: {e}") from e
+        port = server.sockets[0].getsockname()[1]
+        host = self.stream_host or await asyncio.to_thread(_local_address)
+        transfer.code = f"{STREAM_SCHEME}{host}:{port}/{base64.urlsafe_b64encode(key).decode().rstrip('=')}"
+        self._launch(transfer, self._serve_archive(transfer, server, peer, stream), server.close, stream.cancel)
+        return transfer
+
+    async def _serve_archive(self, transfer: Transfer, server, peer: asyncio.Future, stream):
+        writer = None
+        try:
+            try:
+                reader, writer, channel = await asyncio.wait_for(peer, self.stream_timeout)
+            except asyncio.TimeoutError:
+                raise ConnectionError(f"no receiver connected within {self.stream_timeout:.0f}s") from None
+            server.close()  # One receiver per code
+            header = {"name": transfer.name, "total": stream.total}
+            writer.write(channel.seal(json.dumps(header).encode("utf-8")))
+            stream.start()
+            last_update = 0.0
+
+            def next_frame() -> Optional[bytes]:
+                chunk = stream.next_chunk()
+                while chunk == b"":  # An empty frame would end the stream
+                    chunk = stream.next_chunk()
+                return None if chunk is None else channel.seal(chunk)
+
+            while True:
+                frame = await asyncio.to_thread(next_frame)
+                if frame is None:
                     break
-                line_str = line.decode().strip()
-                
-                if self.status_callback:
-                    self.status_callback(f"[wormhole] {line_str}")
-                
-                # Look for the wormhole code in various formats
-                # Format: "Wormhole code is: 7-guitar-ocean"
-                if "wormhole code is:" in line_str.lower():
-                    parts = line_str.split(":")
-                    if len(parts) >= 2:
-                        code = parts[-1].strip()
-                        break
-                # Format: "wormhole receive 7-guitar-ocean"
-                elif "wormhole receive" in line_str.lower():
-                    parts = line_str.split()
-                    if len(parts) >= 2:
-                        code = parts[-1].strip()
-                        break
-            
-            if code:
-                if self.status_callback:
-                    self.status_callback(f"File ready! Code: {code}")
-                return code
+                writer.write(frame)
+                await writer.drain()
+                transfer._progress(stream.done, stream.total)
+                if time.monotonic() - last_update >= self.update_interval:
+                    last_update = time.monotonic()
+                    self._notify(transfer)
+            writer.write(channel.seal(b""))
+            # The receiver reports whether every file's checksum matched
+            try:
+                status = (await channel.read(reader)).decode("utf-8", "replace").strip()
+            except (ConnectionError, TransferError):
+                status = ""
+            if status == "OK":
+                transfer.state = "done"
             else:
-                # Check if process had an error
-                await process.wait()
-                return "error-generating-code"
-                
-        except FileNotFoundError:
-            if self.status_callback:
-                self.status_callback("Error: wormhole not installed")
-            return "wormhole-not-found"
+                transfer.state = "failed"
+                transfer.error = status or "receiver closed the connection"
+            if stream.skipped:
+                print(f"[TRANSFER] Not sent (links, devices or unreadable): {', '.join(stream.skipped)}")
+        except asyncio.CancelledError:
+            transfer.state = "cancelled"
+            transfer.error = "cancelled"
+        except (BrokenPipeError, ConnectionResetError):
+            transfer.state = "failed"
+            transfer.error = "receiver disconnected"
         except Exception as e:
-            if self.status_callback:
-                self.status_callback(f"Error: {str(e)}")
-            return f"error: {str(e)}"
-    
-    async def receive_file(self, code: str, output_dir: str = ".") -> bool:
-        """Receive a file using a wormhole code."""
+            transfer.state = "failed"
+            transfer.error = str(e) or type(e).__name__
+        finally:
+            stream.cancel()
+            server.close()
+            if writer:
+                writer.close()
+            transfer.finished = time.monotonic()
+            self._notify(transfer)
+
+    async def receive_stream(self, code: str, output_dir: str = ".") -> Transfer:
+        """Start receiving a stream:// archive into ``output_dir``; returns at once.
+
+        Raises:
+            TransferError: the code is malformed, or PyNaCl is missing
+        """
+        match = _STREAM_CODE.match(code.strip())
+        if not match:
+            raise TransferError(f"not a stream code: {code}")
+        host, port = match.group(1), int(match.group(2))
+        channel = _SealedChannel(base64.urlsafe_b64decode(match.group(3) + "="), _SealedChannel.RECEIVER)
+        transfer = Transfer(next(self._ids), "receive", code)
+        transfer.code = code
+        self._launch(transfer, self._fetch_archive(transfer, host, port, channel, output_dir))
+        return transfer
+
+    def _launch(self, transfer: Transfer, coroutine, *cleanups: Callable[[], None]):
+        """Run a stream transfer's task; cleanups also run if it is cancelled before it starts."""
+        self.transfers[transfer.id] = transfer
+        transfer._task = asyncio.create_task(coroutine)
+
+        def finished(task: asyncio.Task):
+            for cleanup in cleanups:
+                cleanup()
+            if task.cancelled():
+                transfer.state = "cancelled"
+                transfer.error = "cancelled"
+                transfer.finished = time.monotonic()
+                self._notify(transfer)
+
+        transfer._task.add_done_callback(finished)
+        self._notify(transfer)
+
+    async def _fetch_archive(self, transfer: Transfer, host: str, port: int, channel: _SealedChannel,
+                             output_dir: str):
+        from src.core.archive_stream import extract_stream
+
+        writer = None
+        chunks: "queue.Queue" = queue.Queue(maxsize=8)  # Backpressure: the socket waits for the disk
+        extraction = None
         try:
-            # Auto-accept the file with --accept-file
-            process = await asyncio.create_subprocess_exec(
-                "wormhole", "receive", "--accept-file", "--hide-progress", code,
-                cwd=output_dir,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.STDOUT
-            )
-            
-            # Stream output for status updates
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 15)
+            try:
+                challenge = await asyncio.wait_for(reader.readexactly(16), 15)
+            except asyncio.IncompleteReadError:
+                raise ConnectionError("sender closed the connection (code already used?)") from None
+            writer.write(channel.seal(_STREAM_HELLO + challenge))
+            header = json.loads(await channel.read(reader))
+            transfer.name = header.get("name", transfer.name)
+            transfer.total = header.get("total", 0)
+            transfer.state = "transferring"
+            self._notify(transfer)
+            # Frames are opened on the extraction thread, so the loop only moves bytes
+            extraction = asyncio.ensure_future(asyncio.to_thread(
+                extract_stream, lambda: channel.open(chunks.get()), output_dir,
+                lambda written: transfer._progress(written, transfer.total)
+            ))
+            last_update = 0.0
             while True:
-                line = await process.stdout.readline()
-                if not line:
-                    break
-                line_str = line.decode().strip()
-                if line_str and self.status_callback:
-                    self.status_callback(f"[wormhole] {line_str}")
-            
-            await process.wait()
-            
-            if process.returncode == 0:
-                if self.status_callback:
-                    self.status_callback("File received successfully!")
-                return True
+                sealed = await channel.read_frame(reader)
+                try:
+                    chunks.put_nowait(sealed)
+                except queue.Full:
+                    await asyncio.to_thread(chunks.put, sealed)
+                if len(sealed) == channel.END:
+                    break  # The (empty) end frame; a forged one fails to open
+                if extraction.done():
+                    break  # Extraction failed; its error is raised below
+                if time.monotonic() - last_update >= self.update_interval:
+                    last_update = time.monotonic()
+                    self._notify(transfer)
+            result = await extraction
+            if result.failed:
+                transfer.state = "failed"
+                transfer.error = f"{len(result.failed)} files failed verification: {', '.join(result.failed[:5])}"
+                writer.write(channel.seal(f"FAILED {transfer.error}".encode("utf-8")))
             else:
-                if self.status_callback:
-                    self.status_callback("Failed to receive file")
-                return False
-                
-        except FileNotFoundError:
-            if self.status_callback:
-                self.status_callback("Error: wormhole not installed")
+                transfer.state = "done"
+                transfer.done = result.bytes
+                writer.write(channel.seal(b"OK"))
+            await writer.drain()
+        except asyncio.CancelledError:
+            transfer.state = "cancelled"
+            transfer.error = "cancelled"
+        except Exception as e:
+            transfer.state = "failed"
+            transfer.error = str(e) or type(e).__name__
+        finally:
+            if extraction and not extraction.done():
+                while True:  # Let the extraction thread reach the end and stop
+                    try:
+                        chunks.put_nowait(b"")  # Fails to open: extraction stops with an error
+                        break
+                    except queue.Full:
+                        chunks.get_nowait()
+                extraction.add_done_callback(lambda f: f.cancelled() or f.exception())  # Truncated: expected to fail
+            if writer:
+                writer.close()
+            transfer.finished = time.monotonic()
+            self._notify(transfer)
+
+    async def dcc_reachable(self, peer_host: Optional[str]) -> bool:
+        """Whether a peer at ``peer_host`` can probably connect to our DCC offers."""
+        if not self.send_dcc:
             return False
+        host = await self._advertised_host()
+        return await asyncio.to_thread(reachable, peer_host, host)
+
+    async def _advertised_host(self) -> str:
+        address = await asyncio.to_thread(resolve, self.stream_host) if self.stream_host else None
+        return str(address) if address else await asyncio.to_thread(_local_address)
+
+    async def offer_dcc(self, path: str, peer: str) -> Transfer:
+        """Offer a file to ``peer`` by DCC SEND; returns once the offer is sent.
+
+        Raises:
+            TransferError: DCC is unavailable, ``path`` is not a file or is empty,
+                or no port could be opened
+        """
+        if not self.send_dcc:
+            raise TransferError("DCC is not available")
+        if not os.path.isfile(path):
+            raise TransferError(f"not a file: {path}")
+        if not os.path.getsize(path):
+            raise TransferError("empty file (DCC offers of size 0 are refused)")
+        host = await self._advertised_host()
+        server = self._dcc_listen()
+        port = server.getsockname()[1]
+        transfer = Transfer(next(self._ids), "send", os.path.basename(path))
+        transfer.total = os.path.getsize(path)
+        transfer.peer = peer
+        transfer.code = f"DCC to {peer}"
+        try:
+            self.send_dcc(peer, DccRequest("SEND", transfer.name, port, size=transfer.total, host=host))
         except Exception as e:
-            if self.status_callback:
-                self.status_callback(f"Error: {str(e)}")
+            server.close()
+            raise TransferError(f"cannot send the DCC offer: {e}") from e
+        key = (peer.lower(), port)
+        self._dcc_sends[key] = transfer
+        self._launch(transfer, self._serve_dcc(transfer, server, path),
+                     server.close, lambda: self._dcc_sends.pop(key, None))
+        return transfer
+
+    def _dcc_listen(self) -> socket.socket:
+        first, last = self.dcc_ports or (0, 0)
+        error: Optional[OSError] = None
+        for port in range(first, last + 1):
+            try:
+                server = socket.create_server(("0.0.0.0", port))
+            except OSError as e:
+                error = e
+                continue
+            server.setblocking(False)
+            return server
+        raise TransferError(f"cannot listen for DCC: {error}")
+
+    async def _serve_dcc(self, transfer: Transfer, server: socket.socket, path: str):
+        conn = None
+        fd = None
+        try:
+            try:
+                conn, _ = await asyncio.wait_for(asyncio.get_running_loop().sock_accept(server), self.dcc_timeout)
+            except asyncio.TimeoutError:
+                raise ConnectionError(f"{transfer.peer} did not connect within {self.dcc_timeout:.0f}s") from None
+            server.close()  # One connection per offer
+            conn.setblocking(True)
+            fd = os.open(path, os.O_RDONLY)
+            self._dcc_started(transfer, transfer._offset)
+            await self._run_dcc(transfer, conn, send_file, fd, transfer._offset, transfer.total,
+                                self._thread_progress(transfer))
+            transfer.state = "done"
+            transfer.done = transfer.total
+        except asyncio.CancelledError:
+            transfer.state = "cancelled"
+            transfer.error = "cancelled"
+        except (BrokenPipeError, ConnectionResetError):
+            if transfer.state != "cancelled":
+                transfer.state = "failed"
+                transfer.error = "receiver disconnected"
+        except Exception as e:
+            if transfer.state != "cancelled":
+                transfer.state = "failed"
+                transfer.error = str(e) or type(e).__name__
+        finally:
+            server.close()
+            if conn:
+                conn.close()
+            if fd is not None:
+                os.close(fd)
+            transfer.finished = time.monotonic()
+            self._notify(transfer)
+
+    def handle_dcc(self, nick: str, request: DccRequest) -> Optional[str]:
+        """Take a DCC request from ``nick``; returns the /grab code for a new offer.
+
+        SEND offers are kept until accept_dcc, unless they have no size:
+        the receiver reads exactly ``size`` bytes, so a missing (0) size
+        would finish at once with an empty file. RESUME moves one of our
+        waiting offers to the requested position and is answered with
+        ACCEPT; ACCEPT answers a RESUME we sent.
+        """
+        key = (nick.lower(), request.port)
+        if request.kind == "SEND":
+            if not request.port:
+                print(f"[DCC] Ignoring passive DCC offer from {nick}: not supported")
+                return None
+            if not safe_filename(request.filename):
+                print(f"[DCC] Ignoring offer from {nick} with unusable name {request.filename!r}")
+                return None
+            if not request.size:
+                print(f"[DCC] Ignoring offer of {request.filename!r} from {nick}: no file size given")
+                return None
+            code = f"{DCC_SCHEME}{next(self._offer_ids)}"
+            self.dcc_offers[code] = (nick, request)
+            while len(self.dcc_offers) > MAX_DCC_OFFERS:
+                self.dcc_offers.popitem(last=False)
+            return code
+        if request.kind == "RESUME":
+            transfer = self._dcc_sends.get(key)
+            if transfer and transfer.state == "waiting" and request.position <= transfer.total:
+                transfer._offset = request.position
+                self.send_dcc(nick, request._replace(kind="ACCEPT"))
+        elif request.kind == "ACCEPT":
+            future = self._dcc_resumes.get(key)
+            if future and not future.done():
+                future.set_result(request.position)
+        return None
+
+    async def accept_dcc(self, code: str, output_dir: str = ".") -> Transfer:
+        """Receive a DCC offer into ``output_dir``; returns at once (see Transfer.wait()).
+
+        A ``.part`` file left by an earlier attempt is resumed if the
+        sender accepts a DCC RESUME; it is kept when a transfer fails.
+
+        Raises:
+            TransferError: there is no such offer, or the file already exists
+        """
+        offer = self.dcc_offers.pop(code.strip(), None)
+        if offer is None:
+            raise TransferError(f"no DCC offer {code}")
+        nick, request = offer
+        name = safe_filename(request.filename)
+        target = os.path.join(output_dir, name)
+        if os.path.exists(target):
+            raise TransferError(f"{target} already exists")
+        transfer = Transfer(next(self._ids), "receive", name)
+        transfer.code = code
+        transfer.peer = nick
+        transfer.total = request.size
+        self._launch(transfer, self._fetch_dcc(transfer, nick, request, target))
+        return transfer
+
+    async def _fetch_dcc(self, transfer: Transfer, nick: str, request: DccRequest, target: str):
+        part = target + ".part"
+        sock = None
+        fd = None
+        try:
+            held = os.path.getsize(part) if os.path.exists(part) else 0
+            offset = await self._request_resume(nick, request, held) if 0 < held <= request.size else 0
+            family = socket.AF_INET6 if ":" in request.host else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            try:
+                await asyncio.wait_for(asyncio.get_running_loop().sock_connect(sock, (request.host, request.port)), 15)
+            except (asyncio.TimeoutError, OSError) as e:
+                raise ConnectionError(f"cannot reach {nick} at {request.host}:{request.port} ({e or 'timed out'})") from None
+            sock.setblocking(True)
+            fd = os.open(part, os.O_WRONLY | os.O_CREAT, 0o644)
+            os.ftruncate(fd, offset)
+            os.lseek(fd, offset, os.SEEK_SET)
+            self._dcc_started(transfer, offset)
+            await self._run_dcc(transfer, sock, receive_file, fd, offset, request.size, self._thread_progress(transfer))
+            os.close(fd)
+            fd = None
+            os.replace(part, target)
+            transfer.state = "done"
+            transfer.done = request.size
+        except asyncio.CancelledError:
+            transfer.state = "cancelled"
+            transfer.error = "cancelled"
+        except ConnectionResetError:
+            if transfer.state != "cancelled":
+                transfer.state = "failed"
+                transfer.error = "sender disconnected"
+        except Exception as e:
+            if transfer.state != "cancelled":
+                transfer.state = "failed"
+                transfer.error = str(e) or type(e).__name__
+        finally:
+            if fd is not None:
+                os.close(fd)
+            if sock:
+                sock.close()
+            if transfer.state != "done" and os.path.exists(part):
+                transfer.error = f"{transfer.error} (partial file kept; a new offer resumes it)"
+            transfer.finished = time.monotonic()
+            self._notify(transfer)
+
+    async def _request_resume(self, nick: str, request: DccRequest, held: int) -> int:
+        """Ask the sender to skip the ``held`` bytes we have; 0 if it does not accept in time."""
+        key = (nick.lower(), request.port)
+        future = asyncio.get_running_loop().create_future()
+        self._dcc_resumes[key] = future
+        try:
+            self.send_dcc(nick, DccRequest("RESUME", request.filename, request.port, position=held))
+            position = await asyncio.wait_for(future, 30)
+        except asyncio.TimeoutError:
+            print(f"[DCC] {nick} did not accept RESUME; starting over")
+            return 0
+        finally:
+            self._dcc_resumes.pop(key, None)
+        return position if position <= held else 0
+
+    def _dcc_started(self, transfer: Transfer, offset: int):
+        transfer.state = "transferring"
+        transfer.done = offset
+        transfer._sample = (time.monotonic(), offset)  # A resumed prefix is not throughput
+        self._notify(transfer)
+
+    async def _run_dcc(self, transfer: Transfer, sock: socket.socket, engine: Callable, *args):
+        """Run a blocking DCC engine call on a thread; on cancellation stop the thread before returning."""
+        transfer._socket = sock
+        work = asyncio.ensure_future(asyncio.to_thread(engine, sock, *args))
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            _shutdown(sock)
+            await asyncio.wait([work])
+            raise
+        finally:
+            transfer._socket = None
+
+    def _thread_progress(self, transfer: Transfer) -> Callable[[int], None]:
+        """A progress callback for worker threads that notifies on the event loop."""
+        loop = asyncio.get_running_loop()
+        last_update = [0.0]
+
+        def progress(done: int):
+            transfer._progress(done, transfer.total)
+            now = time.monotonic()
+            if now - last_update[0] >= self.update_interval:
+                last_update[0] = now
+                loop.call_soon_threadsafe(self._notify, transfer)
+
+        return progress
+
+    def cancel(self, transfer_id: int) -> bool:
+        """Stop a transfer; False if there is no such active transfer."""
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None or not transfer.active:
             return False
-    
-    def set_status_callback(self, callback: Callable):
-        """Set callback for status updates."""
-        self.status_callback = callback
+        transfer.state = "cancelled"
+        transfer.error = "cancelled"
+        if transfer._socket is not None:
+            _shutdown(transfer._socket)  # DCC: the worker thread fails out and the task cleans up
+            return True
+        if transfer._process is None:
+            transfer._task.cancel()  # Archive stream or DCC offer: the task cleans up
+            return True
+        try:
+            transfer._process.terminate()
+        except ProcessLookupError:
+            pass
+        return True
+
+    def forget_finished(self, older_than: float = 0.0):
+        """Drop ended transfers that finished more than ``older_than`` seconds ago."""
+        now = time.monotonic()
+        for transfer_id, transfer in list(self.transfers.items()):
+            if transfer.finished is not None and now - transfer.finished >= older_than:
+                del self.transfers[transfer_id]
+
+    async def close(self):
+        """Cancel every active transfer and wait for the processes to exit."""
+        tasks = [transfer._task for transfer in self.active() if transfer._task]
+        for transfer in self.active():
+            self.cancel(transfer.id)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _notify(self, transfer: Transfer):
+        if self.on_update:
+            self.on_update(transfer)
+
+
+def _shutdown(sock: socket.socket):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass  # Already closed
+
+
+def _local_address() -> str:
+    """This machine's address on its default route (no packets are sent)."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        try:
+            probe.connect(("192.0.2.1", 9))
+            return probe.getsockname()[0]
+        except OSError:
+            return "127.0.0.1"
@@ -3,52 +3,103 @@
 IRC AI Handler - Listens for /ai commands and responds with Azure container info
 """
 
+import math
 import miniirc
+import queue
+import threading
 import time
 import os
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from typing import Optional
 from collections import defaultdict
 from src.azure_container_manager import AzureContainerManager
+from src.core.job_executor import JobExecutor
+from src.core.rate_limit import RateLimited, RateLimiter, acquire_all, format_wait, refund_all
+
+
+class MessageSender:
+    """Sends queued IRC lines from one background thread, spaced to avoid flooding.
+
+    send() never blocks, so job callbacks and handlers can post replies freely.
+    """
+    
+    def __init__(self, irc: miniirc.IRC, delay: float = 0.5):
+        """
+        Initialize the sender
+        
+        Args:
+            irc: miniirc IRC instance
+            delay: Seconds between lines
+        """
+        self.irc = irc
+        self.delay = delay
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="irc-sender", daemon=True)
+        self._thread.start()
+    
+    def send(self, target: str, line: str) -> None:
+        """Queue one line for a channel or nick"""
+        self._queue.put((target, line))
+    
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            target, line = item
+            try:
+                self.irc.msg(target, line)
+            except Exception as e:
+                print(f"Error sending to {target}: {e}")
+            time.sleep(self.delay)
+    
+    def close(self) -> None:
+        """Stop after the lines already queued"""
+        self._queue.put(None)
 
 
 class IRCAIHandler:
     """Handles /ai commands in IRC with rate limiting and error handling"""
     
     def __init__(self, azure_manager: AzureContainerManager, 
-                 cooldown_seconds: int = 10):
+                 cooldown_seconds: int = 10, burst: int = 3,
+                 channel_rate: float = 0.5, channel_burst: int = 10,
+                 max_workers: int = 4,
+                 max_pending: int = 20, timeout: float = 60.0,
+                 sender: Optional[MessageSender] = None):
         """
         Initialize IRC AI Handler
         
         Args:
             azure_manager: AzureContainerManager instance
-            cooldown_seconds: Cooldown period per user
+            cooldown_seconds: Steady-state seconds between queries per user
+            burst: Queries a user may send back to back
+            channel_rate: Queries per second per channel
+            channel_burst: Queries a channel may send back to back
+            max_workers: Queries answered in parallel
+            max_pending: Queries running or waiting before new ones are refused
+            timeout: Seconds before a query is given up on
+            sender: Non-blocking send path (created on first use if omitted)
         """
         self.azure_manager = azure_manager
         self.cooldown_seconds = cooldown_seconds
         
-        # Rate limiting: track last command time per user
-        self.user_last_command: Dict[str, datetime] = {}
+        # Rate limiting: token buckets per user, per hostmask (survives nick changes) and per channel
+        self.user_limiter = RateLimiter(1 / cooldown_seconds, burst, name="irc-ai-user")
+        self.host_limiter = RateLimiter(1 / cooldown_seconds, burst, name="irc-ai-host")
+        self.channel_limiter = RateLimiter(channel_rate, channel_burst, name="irc-ai-channel")
         
-        # Track processing state
-        self.processing = False
+        # Queries run on a bounded pool, one at a time per user, in parallel across users
+        self.jobs = JobExecutor(max_workers=max_workers, max_pending=max_pending,
+                                timeout=timeout, name="irc-ai")
+        self.sender = sender
         
     def is_rate_limited(self, user: str) -> bool:
         """Check if user is rate limited"""
-        if user not in self.user_last_command:
-            return False
-        
-        time_since_last = datetime.now() - self.user_last_command[user]
-        return time_since_last.seconds < self.cooldown_seconds
+        return self.user_limiter.wait_time(user) > 0
     
     def get_cooldown_remaining(self, user: str) -> int:
-        """Get remaining cooldown time for user"""
-        if user not in self.user_last_command:
-            return 0
-        
-        time_since_last = datetime.now() - self.user_last_command[user]
-        remaining = self.cooldown_seconds - time_since_last.seconds
-        return max(0, remaining)
+        """Get remaining cooldown time for user (whole seconds, rounded up)"""
+        return math.ceil(self.user_limiter.wait_time(user))
     
     def handle_ai_command(self, irc: miniirc.IRC, hostmask: tuple, 
                          args: list) -> None:
@@ -75,42 +126,66 @@ class IRCAIHandler:
             irc.msg(channel, f"{nick}: Usage: /ai <your question>")
             return
         
-        # Rate limiting check
-        if self.is_rate_limited(nick):
-            remaining = self.get_cooldown_remaining(nick)
-            irc.msg(channel, f"{nick}: Please wait {remaining}s before next query.")
+        # One query in flight per user; other users are not held up
+        if self.jobs.pending(nick):
+            irc.msg(channel, f"{nick}: Still working on your last query, please wait...")
             return
         
-        # Prevent concurrent processing
-        if self.processing:
-            irc.msg(channel, f"{nick}: Processing another query, please wait...")
+        # Rate limiting check: user, hostmask and channel must all have a token
+        host = f"{hostmask[1]}@{hostmask[2]}" if len(hostmask) > 2 else nick
+        buckets = [
+            (self.user_limiter, nick),
+            (self.host_limiter, host),
+            (self.channel_limiter, channel),
+        ]
+        wait = acquire_all(buckets)
+        if wait:
+            irc.msg(channel, f"{nick}: Please wait {format_wait(wait)} before next query.")
             return
         
-        try:
-            self.processing = True
-            self.user_last_command[nick] = datetime.now()
-            
-            # Send processing message
-            irc.msg(channel, f"🤖 Processing query from {nick}...")
-            
-            # Get answer from Azure
-            answer = self.azure_manager.answer_question(question)
-            
-            # Split long messages
-            self._send_multiline(irc, channel, f"💡 {answer}")
-            
-        except Exception as e:
-            error_msg = "I can't reach Azure right now — try again later."
+        if self.sender is None:
+            self.sender = MessageSender(irc)
+        
+        def on_error(e: Exception) -> None:
+            if isinstance(e, RateLimited):
+                self.sender.send(channel, f"❌ {nick}: Azure API budget used up — try again in {format_wait(e.retry_after)}.")
+                return
             print(f"Error processing AI command: {e}")
-            irc.msg(channel, f"❌ {error_msg}")
-            
-        finally:
-            self.processing = False
+            self.sender.send(channel, "❌ I can't reach Azure right now — try again later.")
+        
+        def on_timeout() -> None:
+            self.sender.send(channel, f"❌ {nick}: Azure is taking too long — try again later.")
+        
+        # Get the answer from Azure off the IRC thread
+        job = self.jobs.submit(
+            nick, channel, self.azure_manager.answer_question, question,
+            on_done=lambda answer: self._send_multiline(irc, channel, f"💡 {answer}"),
+            on_error=on_error,
+            on_timeout=on_timeout,
+        )
+        if job is None:
+            refund_all(buckets)  # Refused before running: the user is not charged
+            irc.msg(channel, f"{nick}: Too many queries in progress, try again shortly.")
+            return
+        
+        self.sender.send(channel, f"🤖 Processing query from {nick}...")
+    
+    def cancel_user(self, nick: str, channel: Optional[str] = None) -> None:
+        """Drop a user's queries (in one channel, or all) when they leave"""
+        cancelled = self.jobs.cancel(nick, channel)
+        if cancelled:
+            print(f"Cancelled {cancelled} AI queries from {nick}")
+    
+    def close(self) -> None:
+        """Stop taking queries and flush the send queue"""
+        self.jobs.shutdown()
+        if self.sender:
+            self.sender.close()
     
     def _send_multiline(self, irc: miniirc.IRC, channel: str, 
                        message: str, max_length: int = 400) -> None:
         """
-        Send long messages split into multiple lines
+        Queue long messages split into multiple lines
         
         Args:
             irc: miniirc IRC instance
@@ -118,18 +193,18 @@ class IRCAIHandler:
             message: Message to send
             max_length: Maximum length per message
         """
+        if self.sender is None:
+            self.sender = MessageSender(irc)
         lines = message.split('\n')
         
         for line in lines:
             if len(line) <= max_length:
-                irc.msg(channel, line)
-                time.sleep(0.5)  # Avoid flooding
+                self.sender.send(channel, line)  # Spaced out by the sender to avoid flooding
             else:
                 # Split long lines
                 chunks = [line[i:i+max_length] for i in range(0, len(line), max_length)]
                 for chunk in chunks:
-                    irc.msg(channel, chunk)
-                    time.sleep(0.5)
+                    self.sender.send(channel, chunk)
 
 
 class IRCAIBot:
@@ -156,9 +231,6 @@ class IRCAIBot:
         self.azure_manager = azure_manager
         self.use_ssl = use_ssl
         
-        # Initialize AI handler
-        self.ai_handler = IRCAIHandler(azure_manager)
-        
         # Initialize IRC connection
         self.irc = miniirc.IRC(
             ip=server,
@@ -169,6 +241,9 @@ class IRCAIBot:
             debug=False
         )
         
+        # Initialize AI handler; replies go out through a non-blocking sender
+        self.ai_handler = IRCAIHandler(azure_manager, sender=MessageSender(self.irc))
+        
         # Register message handler
         @self.irc.Handler('PRIVMSG')
         def handle_privmsg(irc, hostmask, args):
@@ -185,6 +260,20 @@ class IRCAIBot:
         def handle_join(irc, hostmask, args):
             if hostmask[0] == nick:
                 print(f"✅ Joined {args[0]}")
+        
+        # Nobody is left to read answers for users who leave
+        @self.irc.Handler('PART')
+        def handle_part(irc, hostmask, args):
+            self.ai_handler.cancel_user(hostmask[0], args[0])
+        
+        @self.irc.Handler('QUIT')
+        def handle_quit(irc, hostmask, args):
+            self.ai_handler.cancel_user(hostmask[0])
+        
+        @self.irc.Handler('NICK')
+        def handle_nick(irc, hostmask, args):
+            new_nick = args[0][1:] if args[0].startswith(':') else args[0]
+            self.ai_handler.jobs.rename(hostmask[0], new_nick)
     
     def run(self):
         """Start the bot (blocking)"""
@@ -201,4 +290,5 @@ class IRCAIBot:
                 time.sleep(1)
         except KeyboardInterrupt:
             print("\n🛑 Shutting down bot...")
+            self.ai_handler.close()
             self.irc.disconnect()
@@ -15,11 +15,22 @@ from src.ui.widgets.chat_pane import ChatPane
 from src.ui.widgets.sidebar import Sidebar, MemberList
 from src.ui.widgets.channel_search import ChannelSearchScreen
 from src.ui.widgets.command_palette import SlashCommandPalette
+from src.ui.widgets.transfers import TransfersPanel
 from src.ui.screens import TeletextScreen, HomeScreen, KeysScreen, VolumeScreen
 from src.core.irc_client import IRCClient
-from src.core.mcp_client import MCPClient
-from src.core.wormhole import WormholeClient
-from src.core.audio import AudioEngine
+from src.core.message_store import MessageStore
+from src.core.list_cache import ChannelListCache
+from src.core.completion import NickCompleter
+from src.core.system_sampler import SystemSampler
+from src.core import metrics, tracing
+from src.core.watchdog import LoopWatchdog
+from src.core.profiler import SessionProfiler
+from src.core.lazy import Subsystems
+
+
+UI_DISPATCH_PENDING = metrics.gauge("phosphor_ui_dispatch_pending", "Callbacks handed to the UI thread and not yet run")
+UI_DISPATCH_WAIT = metrics.histogram("phosphor_ui_dispatch_wait_seconds", "Delay between queueing a callback and the UI thread running it")
+MEMBER_LIST_RENDER = metrics.histogram("phosphor_member_list_render_seconds", "Time to redraw the member list")
 
 
 class DMNotification(Message):
@@ -61,6 +72,9 @@ class PhosphorCommands(Provider):
             ("Theme: Default", "Switch to default theme", self._theme_default),
             ("Theme: Halloween 🎃", "Switch to spooky Halloween theme", self._theme_halloween),
             ("Take Screenshot 📸", "Save a screenshot of the current screen", self._take_screenshot),
+            ("Toggle Stall Watchdog", "Record UI freezes and their stacks to .phosphor/diagnostics", self._toggle_watchdog),
+            ("Profile CPU (start/stop)", "cProfile + sampled stacks of this session", self._profile_cpu),
+            ("Profile Memory (start/stop)", "tracemalloc growth by subsystem", self._profile_mem),
         ]
 
     async def search(self, query: str) -> Hits:
@@ -115,6 +129,21 @@ class PhosphorCommands(Provider):
         if hasattr(self.app, 'action_take_screenshot'):
             self.app.action_take_screenshot()
 
+    async def _toggle_watchdog(self) -> None:
+        """Turn event-loop stall detection on or off."""
+        if hasattr(self.app, 'action_toggle_watchdog'):
+            self.app.action_toggle_watchdog()
+
+    async def _profile_cpu(self) -> None:
+        """Start or stop CPU profiling."""
+        if hasattr(self.app, 'action_toggle_profile'):
+            self.app.action_toggle_profile("cpu")
+
+    async def _profile_mem(self) -> None:
+        """Start or stop memory profiling."""
+        if hasattr(self.app, 'action_toggle_profile'):
+            self.app.action_toggle_profile("mem")
+
 
 class Phosphor(App):
     """The main phosphor application."""
@@ -154,15 +183,73 @@ class Phosphor(App):
         self.channels_joined = set()  # Track which channels we've successfully joined
         self.channels_joining = set()  # Track which channels are currently joining
         self.irc = None
-        self.mcp = MCPClient()
-        self.wormhole = WormholeClient()
-        self.audio = None
+        # AI/Azure, wormhole and audio are imported on first use, or warmed in
+        # the background once the home screen has been drawn
+        self.subsystems = Subsystems()
+        self.subsystems.register("mcp", self._create_mcp)
+        self.subsystems.register("wormhole", self._create_wormhole)
+        # Persisted channel history (drives CHATHISTORY gap fetches); "save_history": false keeps it in memory
+        self.history = MessageStore(
+            max_records=self.config.get("history_max_records", 5000),
+            persist=self.config.get("save_history", True),
+        )
+        self.list_cache = ChannelListCache()  # Last full LIST per network
+        self.list_min_users = 2  # Skip empty/single-user channels when listing the whole network
+        self._channel_search_screen = None
+        self._list_results = []  # Entries of the LIST in flight
+        self._list_cacheable = False  # Only the default (unfiltered) LIST is cached
+        self.completer = NickCompleter()  # Tab completion, ranked by who spoke last
+        self.sampler = SystemSampler()  # psutil stats off the event loop, while a dashboard is open
+        self.metrics_server = None  # Prometheus endpoint, if config sets metrics_port
+        self.profiler = SessionProfiler()  # /profile start|stop [cpu|mem]
+        self.watchdog = LoopWatchdog(threshold=self.config.get("watchdog_threshold_ms", 250) / 1000)
+        self._completion = None  # Cycling state between consecutive Tab presses
         self.input_bar = None
         self.chat_pane = None
         self.active_theme = self._load_theme()  # Load saved theme
-        
-        # Set up wormhole callback
-        self.wormhole.set_status_callback(self._on_wormhole_status)
+    
+    @property
+    def mcp(self):
+        """MCP client (built on first use)."""
+        return self.subsystems.get("mcp")
+    
+    @property
+    def wormhole(self):
+        """Wormhole transfer manager (built on first use)."""
+        return self.subsystems.get("wormhole")
+    
+    @property
+    def audio(self):
+        """Audio engine, or None until it has been set up in the background."""
+        return self.subsystems.peek("audio")
+    
+    def _create_mcp(self):
+        from src.core.mcp_client import MCPClient
+        return MCPClient(
+            config_path=self.config.get("mcp_config", "mcp.json"),
+            cache_ttls=self.config.get("ai_cache_ttls"),
+            file_index=self.config.get("file_index", False),
+        )
+    
+    def _create_wormhole(self):
+        from src.core.wormhole import TransferManager
+        return TransferManager(
+            command=self.config.get("wormhole_command", ["wormhole"]),
+            relay_url=self.config.get("wormhole_relay_url"),
+            transit_helper=self.config.get("wormhole_transit_helper"),
+            on_update=self._on_transfer_update,
+            stream_host=self.config.get("transfer_host"),
+            stream_port=self.config.get("transfer_port", 0),
+            send_dcc=self._send_dcc,
+            dcc_ports=self.config.get("dcc_ports"),  # [first, last] to fit a port forward
+            dcc_timeout=self.config.get("dcc_timeout", 300),
+            stream_timeout=self.config.get("stream_timeout", 300),
+        )
+    
+    @staticmethod
+    def _create_audio(enabled: bool, volume: float):
+        from src.core.audio import AudioEngine
+        return AudioEngine(enabled=enabled, volume=volume)
     
     def _load_config(self) -> dict:
         """Load configuration from .phosphor/config.json."""
@@ -255,6 +342,7 @@ class Phosphor(App):
             # Center - chat pane
             with Container(id="chat-container"):
                 yield ChatPane(id="chat-pane")
+                yield TransfersPanel(id="transfers-panel")
                 yield SlashCommandPalette(id="command-palette")
                 yield Input(
                     placeholder=f"Message {self.current_channel}",
@@ -270,7 +358,23 @@ class Phosphor(App):
         """Show home screen first."""
         # Apply saved theme
         self._apply_theme()
+        self._start_metrics_server()
+        if self.config.get("watchdog", True):
+            self.watchdog.start()
         self.push_screen(HomeScreen(config=self.config, theme=self.active_theme))
+        self.call_after_refresh(self.subsystems.warm, ["wormhole", "mcp"])
+    
+    def _start_metrics_server(self):
+        """Serve internal metrics for Prometheus on localhost if configured."""
+        port = self.config.get("metrics_port")
+        if not port:
+            return
+        try:
+            self.metrics_server = metrics.MetricsServer(int(port))
+            self.metrics_server.start()
+        except (OSError, ValueError) as e:
+            self.metrics_server = None
+            self.notify(f"Metrics endpoint unavailable on port {port}: {e}", severity="warning")
 
     def on_home_screen_settings_confirmed(self, event: HomeScreen.SettingsConfirmed):
         """Handle settings from home screen."""
@@ -302,15 +406,17 @@ class Phosphor(App):
         )
         self.irc.set_message_callback(self._on_irc_message)
         self.irc.set_members_callback(self._on_members_update)
+        self.irc.set_summary_callback(self._on_membership_summary)
         self.irc.set_channel_list_callback(self._on_channel_list_received)
         self.irc.set_join_callback(self._on_channel_joined)
         self.irc.set_nick_callback(self._on_nick_update)
+        self.irc.set_history_callback(self._on_history_received)
+        self.irc.set_dcc_callback(self._on_dcc_request)
         
-        # Initialize audio with chosen settings
-        self.audio = AudioEngine(
-            enabled=event.audio_enabled,
-            volume=event.volume
-        )
+        # Initialize audio with chosen settings (off the event loop)
+        enabled, volume = event.audio_enabled, event.volume
+        self.subsystems.register("audio", lambda: self._create_audio(enabled, volume))
+        self.subsystems.warm(["audio"])
         
         # Pop home screen and start main app
         self.pop_screen()
@@ -442,24 +548,49 @@ class Phosphor(App):
             self.connection_status = "failed"
             self.irc_connected = False
     
-    def _on_irc_message(self, nick: str, target: str, message: str):
+    def _dispatch(self, callback, *args):
+        """Run a callback on the main thread from a worker thread (blocks until done)."""
+        queued = time.perf_counter()
+        trace = tracing.handoff()
+        
+        def run():
+            UI_DISPATCH_WAIT.observe(time.perf_counter() - queued)
+            with tracing.resume(trace, "ui.dispatch", callback=getattr(callback, "__name__", "?")):
+                return callback(*args)
+        
+        UI_DISPATCH_PENDING.inc()
+        try:
+            return self.call_from_thread(run)
+        finally:
+            UI_DISPATCH_PENDING.dec()
+    
+    @tracing.traced("app.on_irc_message")
+    def _on_irc_message(self, nick: str, target: str, message: str, server_time: float = None, msgid: str = None):
         """Handle incoming IRC messages."""
         # miniirc runs in a separate thread, so we need call_from_thread
+        own_nick = self.irc.get_confirmed_nick()
         
         # Check if this is a private message (target is our nick, not a channel)
-        if target == self.irc.get_confirmed_nick():
+        if target == own_nick:
             # This is a DM from 'nick' to us
-            self.call_from_thread(self._handle_dm_received, nick, message)
+            self._dispatch(self._handle_dm_received, nick, message, server_time)
+        elif nick == own_nick and not target.startswith(("#", "&")):
+            # echo-message: our own DM coming back from the server
+            self._dispatch(self.chat_pane.add_message, nick, message, False, None, target, server_time)
         else:
             # Regular channel message
-            self.call_from_thread(self._handle_channel_message, nick, target, message)
+            self._dispatch(self._handle_channel_message, nick, target, message, server_time, msgid)
         
-        self.audio.process_log(message)
+        if self.audio:
+            self.audio.process_log(message)
     
-    def _handle_channel_message(self, nick: str, channel: str, message: str):
+    @tracing.traced("app.handle_channel_message")
+    def _handle_channel_message(self, nick: str, channel: str, message: str, server_time: float = None, msgid: str = None):
         """Handle received channel message - called from main thread."""
         # Add message to chat pane
-        self.chat_pane.add_message(nick, message, False, channel)
+        self.chat_pane.add_message(nick, message, False, channel, server_time=server_time)
+        self.history.append(channel, nick, message, server_time or time.time(), msgid)
+        self.completer.note_spoke(channel, nick, server_time)
         
         # Play retro notification sound for new messages (not from self)
         if self.audio and nick != self.irc.get_confirmed_nick():
@@ -470,12 +601,13 @@ class Phosphor(App):
             sidebar = self.query_one("#sidebar", Sidebar)
             sidebar.increment_channel_unread(channel)
     
-    def _handle_dm_received(self, from_nick: str, message: str):
+    @tracing.traced("app.handle_dm_received")
+    def _handle_dm_received(self, from_nick: str, message: str, server_time: float = None):
         """Handle received DM - called from main thread."""
         sidebar = self.query_one("#sidebar", Sidebar)
         
         # Add to DM messages
-        self.chat_pane.add_message(from_nick, message, False, dm_nick=from_nick)
+        self.chat_pane.add_message(from_nick, message, False, dm_nick=from_nick, server_time=server_time)
         
         # Play distinct retro DM notification sound
         if self.audio:
@@ -490,14 +622,58 @@ class Phosphor(App):
             # Ensure conversation is in sidebar
             sidebar.add_dm_conversation(from_nick)
     
+    def _show_own_message(self, message: str, channel: str = None, dm_nick: str = None):
+        """Show a message we sent, unless the server will echo it back (echo-message)."""
+        if self.irc.echoes_own_messages:
+            return
+        self.chat_pane.add_message(self.irc.get_confirmed_nick(), message, False, channel, dm_nick=dm_nick)
+        if channel:
+            self.history.append(channel, self.irc.get_confirmed_nick(), message, time.time())
+    
+    def _on_history_received(self, channel: str, messages: list[dict], truncated: bool = False):
+        """Handle a CHATHISTORY backlog page from the IRC thread."""
+        self._dispatch(self._handle_history, channel, messages, truncated)
+    
+    @tracing.traced("app.handle_history")
+    def _handle_history(self, channel: str, messages: list[dict], truncated: bool = False):
+        """Persist and display backlog - called from main thread."""
+        now = time.time()
+        fresh = []
+        for msg in messages:
+            if not msg.get("ts"):
+                msg["ts"] = now
+            # append() is False for a msgid we already have (overlapping pages, or seen live)
+            if self.history.append(channel, msg["nick"], msg["text"], msg["ts"], msg.get("msgid")):
+                fresh.append(msg)
+        if fresh:
+            self.chat_pane.insert_history(channel, fresh)
+        if truncated:
+            pages = self.irc.history_max_pages
+            self.chat_pane.add_message(
+                "System",
+                f"⚠️ History truncated: fetched the newest {pages} pages since you were last here; "
+                f"older messages in the gap were skipped",
+                is_system=True, channel=channel,
+            )
+    
     def _on_members_update(self, channel: str, members: list[str]):
         """Handle member list updates."""
         if channel == self.current_channel:
-            self.call_from_thread(self._update_member_list_ui, members)
+            self._dispatch(self._update_member_list_ui, members)
+    
+    def _on_membership_summary(self, channels: list[str], text: str):
+        """Handle an aggregated netsplit/netjoin line from the IRC thread."""
+        self._dispatch(self._handle_membership_summary, channels, text)
+    
+    def _handle_membership_summary(self, channels: list[str], text: str):
+        """Show one summary line per affected channel - called from main thread."""
+        for channel in channels:
+            if channel in self.channels_joined:
+                self.chat_pane.add_message("System", text, is_system=True, channel=channel)
     
     def _on_nick_update(self, nick: str, success: bool, message: str):
         """Handle nickname confirmation/change from IRC server."""
-        self.call_from_thread(self._handle_nick_update, nick, success, message)
+        self._dispatch(self._handle_nick_update, nick, success, message)
     
     def _handle_nick_update(self, nick: str, success: bool, message: str):
         """Handle nickname update - called from main thread."""
@@ -519,7 +695,7 @@ class Phosphor(App):
     
     def _on_channel_joined(self, channel: str, success: bool):
         """Handle channel join completion."""
-        self.call_from_thread(self._handle_channel_joined, channel, success)
+        self._dispatch(self._handle_channel_joined, channel, success)
     
     def _handle_channel_joined(self, channel: str, success: bool):
         """Handle channel join completion - called from main thread."""
@@ -530,6 +706,11 @@ class Phosphor(App):
             
             self.chat_pane.add_message("System", f"✓ Joined {channel}", is_system=True)
             
+            # Restore what we saw last session, then fetch only the gap since
+            # the newest stored message (or the latest page if we have none)
+            self.chat_pane.insert_history(channel, self.history.recent(channel))
+            self.irc.request_history(channel, self.history.last_seen(channel))
+            
             # Update sidebar to show channel is ready
             sidebar = self.query_one("#sidebar", Sidebar)
             sidebar.mark_channel_ready(channel)
@@ -546,27 +727,95 @@ class Phosphor(App):
             self.channels_joining.discard(channel)
             self.chat_pane.add_message("System", f"❌ Failed to join {channel}", is_system=True)
     
-    def _on_channel_list_received(self, channels: list):
-        """Handle channel list from IRC server."""
-        # Debug: Add a system message to show we received channels
-        self.call_from_thread(self.chat_pane.add_message, "System", f"DEBUG: Received {len(channels)} channels from IRC", True)
+    def _on_channel_list_received(self, channels: list, done: bool):
+        """Handle a chunk of the channel list from the IRC thread."""
+        self._list_results.extend(channels)
+        if done and self._list_cacheable:
+            self.list_cache.save(self._network_key(), self._list_results)
         
         # Forward to channel search screen if it's open
-        if hasattr(self, '_channel_search_screen') and self._channel_search_screen:
-            self.call_from_thread(self._channel_search_screen.update_channel_list, channels)
-        else:
-            self.call_from_thread(self.chat_pane.add_message, "System", "DEBUG: No channel search screen open", True)
+        if self._channel_search_screen:
+            self._dispatch(self._channel_search_screen.append_channels, channels, done)
     
-    def _on_wormhole_status(self, status: str):
-        """Handle wormhole status updates."""
-        # Wormhole runs as async subprocess in same thread, so call directly
-        if self.chat_pane:
-            self.chat_pane.add_message("Wormhole", status, is_system=True)
+    def _network_key(self) -> str:
+        """Identify the current network for per-network caches."""
+        return f"{self.irc.host}:{self.irc.port}"
+
+    
+    def _on_transfer_update(self, transfer):
+        """Refresh the transfers panel; announce transfers that just ended."""
+        # Transfers are driven by subprocess readers on this loop, so call directly
+        self._refresh_transfers()
+        if transfer.active or not self.chat_pane:
+            return
+        if transfer.state == "done" and transfer.direction == "receive":
+            self.chat_pane.add_embed("File Received", f"✓ {transfer.summary()}", "success")
+            # Notify sender if it came through a DM
+            if transfer.peer:
+                try:
+                    self.irc.send_message(transfer.peer, "✓ File received successfully!")
+                    self._show_own_message("✓ File received successfully!", dm_nick=transfer.peer)
+                except Exception:
+                    pass
+        elif transfer.state == "done":
+            self.chat_pane.add_message("Wormhole", f"✓ {transfer.summary()}", is_system=True)
+        elif transfer.state == "failed":
+            self.chat_pane.add_embed(
+                "Transfer Failed",
+                f"❌ {transfer.summary()}\nCheck the code and try again.",
+                "error"
+            )
+        # Finished transfers stay on the panel for a few seconds
+        self.set_timer(10, self._refresh_transfers)
+    
+    def _send_dcc(self, nick: str, request):
+        """Transfer manager hook: DCC requests go out over IRC."""
+        if not self.irc:
+            raise ConnectionError("not connected to IRC")
+        self.irc.send_dcc(nick, request)
     
+    def _on_dcc_request(self, nick: str, request):
+        """Handle a DCC request from the IRC thread."""
+        self._dispatch(self._handle_dcc_request, nick, request)
+    
+    def _handle_dcc_request(self, nick: str, request):
+        """Hand a DCC request to the transfer manager; show offers in the DM - called from main thread."""
+        code = self.wormhole.handle_dcc(nick, request)
+        if code:
+            from src.core.wormhole import format_bytes
+            size = f" ({format_bytes(request.size)})" if request.size else ""
+            self._handle_dm_received(nick, f"📁 DCC offer: {request.filename}{size} | Use: /grab {code}")
+    
+    async def _use_dcc(self, nick: str) -> bool:
+        """Whether /send to ``nick`` should be a direct DCC offer rather than a wormhole code.
+        
+        The "dcc" config key is "auto" (DCC when the peer looks reachable:
+        same machine or network, or we have a public address), "always"
+        or "never".
+        """
+        mode = self.config.get("dcc", "auto")
+        if mode == "never" or not self.irc:
+            return False
+        if mode == "always":
+            return True
+        return await self.wormhole.dcc_reachable(self.irc.host_of(nick))
+    
+    def _refresh_transfers(self):
+        manager = self.subsystems.peek("wormhole")
+        if manager is None:
+            return
+        manager.forget_finished(older_than=10)
+        try:
+            self.query_one("#transfers-panel", TransfersPanel).show_transfers(list(manager.transfers.values()))
+        except Exception:
+            pass  # Main screen not mounted yet
+    
+    @tracing.traced("app.update_member_list_ui")
     def _update_member_list_ui(self, members: list[str]):
         """Update member list UI - called from main thread."""
         if self.member_list:
-            self.member_list.update_members(members)
+            with MEMBER_LIST_RENDER.time():
+                self.member_list.update_members(members)
     
     def on_member_list_update(self, event: MemberListUpdate):
         """Handle member list updates."""
@@ -697,6 +946,9 @@ class Phosphor(App):
             return
 
         if not palette.is_visible():
+            if event.key == "tab" and self._complete_nick():
+                event.prevent_default()
+                event.stop()
             return
 
         # Handle navigation keys
@@ -722,6 +974,45 @@ class Phosphor(App):
             event.prevent_default()
             event.stop()
 
+    def _complete_nick(self) -> bool:
+        """Complete the nick before the cursor; repeated Tab cycles through matches.
+        
+        Returns:
+            True if the input was changed (so Tab shouldn't move focus)
+        """
+        value = self.input_bar.value
+        cursor = self.input_bar.cursor_position
+        state = self._completion
+        
+        if state and value == state["value"] and cursor == state["cursor"]:
+            state["index"] = (state["index"] + 1) % len(state["candidates"])
+        else:
+            if self.current_dm or not self.irc or self.current_channel not in self.channels_joined:
+                return False
+            start = value.rfind(" ", 0, cursor) + 1
+            word = value[start:cursor]
+            if not word:
+                return False
+            candidates = self.completer.complete(
+                self.current_channel,
+                self.irc.get_channel_members(self.current_channel),
+                word,
+                exclude=self.irc.get_confirmed_nick(),
+            )
+            if not candidates:
+                return False
+            state = {"head": value[:start], "tail": value[cursor:], "candidates": candidates, "index": 0}
+            self._completion = state
+        
+        nick = state["candidates"][state["index"]]
+        # "nick: " addresses someone at the start of a line, like other IRC clients
+        completed = state["head"] + nick + (": " if not state["head"] else " ")
+        self.input_bar.value = completed + state["tail"]
+        self.input_bar.cursor_position = len(completed)
+        state["value"] = self.input_bar.value
+        state["cursor"] = len(completed)
+        return True
+
     async def on_input_submitted(self, event: Input.Submitted):
         """Handle message submission."""
         # Ignore if input_bar not yet initialized (e.g., from HomeScreen)
@@ -757,7 +1048,7 @@ class Phosphor(App):
             try:
                 self.irc.send_message(self.current_dm, message)
                 # Add to DM history
-                self.chat_pane.add_message(self.irc.get_confirmed_nick(), message, False, dm_nick=self.current_dm)
+                self._show_own_message(message, dm_nick=self.current_dm)
             except Exception as e:
                 self.chat_pane.add_message("System", f"Failed to send DM: {e}", is_system=True)
             return
@@ -781,7 +1072,7 @@ class Phosphor(App):
         try:
             self.irc.send_message(self.current_channel, message)
             # Add to current channel's history using actual nick for consistent coloring
-            self.chat_pane.add_message(self.irc.get_confirmed_nick(), message, False, self.current_channel)
+            self._show_own_message(message, channel=self.current_channel)
         except Exception as e:
             self.chat_pane.add_message("System", f"Failed to send: {e}", is_system=True)
     
@@ -792,7 +1083,7 @@ class Phosphor(App):
             # Just "/" with no command
             self.chat_pane.add_message(
                 "System",
-                "Available commands: /join, /msg, /dm, /close, /bookmark, /unbookmark, /bookmarks, /send, /grab, /ai",
+                "Available commands: /join, /list, /msg, /dm, /close, /bookmark, /unbookmark, /bookmarks, /send, /grab, /transfers, /cancel, /ai, /trace, /profile",
                 is_system=True,
             )
             return
@@ -802,36 +1093,60 @@ class Phosphor(App):
         if cmd == "send":
             # Send file via wormhole - works best in DM context
             if not args:
-                self.chat_pane.add_message("System", "Usage: /send <filepath>", is_system=True)
+                self.chat_pane.add_message("System", "Usage: /send <file|dir|glob>", is_system=True)
                 self.chat_pane.add_message("System", "Tip: Use in a DM to automatically share the code with the recipient.", is_system=True)
                 return
             
             filepath = args.strip()
             
             # Check if file exists
+            import glob
             from pathlib import Path
-            if not Path(filepath).exists():
+            is_glob = not Path(filepath).exists() and glob.has_magic(filepath)
+            if not Path(filepath).exists() and not is_glob:
                 self.chat_pane.add_message("System", f"❌ File not found: {filepath}", is_system=True)
                 return
             
+            from src.core.wormhole import TransferError
             self.chat_pane.add_message("System", f"📤 Preparing to send: {filepath}...", is_system=True)
-            code = await self.wormhole.send_file(filepath)
-            
-            if code.startswith("error") or code == "wormhole-not-found":
-                self.chat_pane.add_message("System", f"❌ Failed to initiate transfer: {code}", is_system=True)
-                self.chat_pane.add_message("System", "Make sure 'magic-wormhole' is installed: pip install magic-wormhole", is_system=True)
+            if self.current_dm and Path(filepath).is_file() and await self._use_dcc(self.current_dm):
+                # Direct connection: no relay in the path, and an interrupted transfer resumes
+                try:
+                    transfer = await self.wormhole.offer_dcc(filepath, self.current_dm)
+                except TransferError as e:
+                    self.chat_pane.add_message("System", f"DCC unavailable ({e}), using wormhole", is_system=True)
+                else:
+                    self.chat_pane.add_embed(
+                        "File Transfer Started",
+                        f"File: {transfer.name}\n\n✓ DCC offer sent to {self.current_dm} (direct connection)",
+                        "success"
+                    )
+                    return
+            archive = is_glob or Path(filepath).is_dir()
+            try:
+                if archive:
+                    # Streamed as a tar archive, unpacked and verified as it arrives
+                    transfer = await self.wormhole.send_archive(filepath)
+                else:
+                    transfer = await self.wormhole.send(filepath)
+            except TransferError as e:
+                self.chat_pane.add_message("System", f"❌ Failed to initiate transfer: {e}", is_system=True)
+                if not archive:  # Archive streams do not use the wormhole CLI
+                    self.chat_pane.add_message("System", "Make sure 'magic-wormhole' is installed: pip install magic-wormhole", is_system=True)
                 return
+            code = transfer.code
             
             # If we're in a DM, automatically send the code to the recipient
             if self.current_dm:
                 try:
                     # Send the wormhole code to the DM recipient
-                    transfer_msg = f"📁 File transfer: {Path(filepath).name} | Use: /grab {code}"
+                    transfer_msg = f"📁 File transfer: {transfer.name} | Use: /grab {code}"
                     self.irc.send_message(self.current_dm, transfer_msg)
-                    self.chat_pane.add_message(self.irc.get_confirmed_nick(), transfer_msg, False, dm_nick=self.current_dm)
+                    self._show_own_message(transfer_msg, dm_nick=self.current_dm)
+                    transfer.peer = self.current_dm
                     self.chat_pane.add_embed(
                         "File Transfer Started",
-                        f"File: {Path(filepath).name}\nCode: `{code}`\n\n✓ Code sent to {self.current_dm}",
+                        f"File: {transfer.name}\nCode: `{code}`\n\n✓ Code sent to {self.current_dm}",
                         "success"
                     )
                 except Exception as e:
@@ -857,7 +1172,6 @@ class Phosphor(App):
                 return
             
             code = args.strip()
-            self.chat_pane.add_message("System", f"📥 Receiving file with code: {code}...", is_system=True)
             
             # Determine download directory
             from pathlib import Path
@@ -865,27 +1179,40 @@ class Phosphor(App):
             if not download_dir.exists():
                 download_dir = Path(".")
             
-            success = await self.wormhole.receive_file(code, str(download_dir))
-            
-            if success:
-                self.chat_pane.add_embed(
-                    "File Received",
-                    f"✓ Transfer complete!\nSaved to: {download_dir}",
-                    "success"
-                )
-                # Notify sender if in DM
-                if self.current_dm:
-                    try:
-                        self.irc.send_message(self.current_dm, "✓ File received successfully!")
-                        self.chat_pane.add_message(self.irc.get_confirmed_nick(), "✓ File received successfully!", False, dm_nick=self.current_dm)
-                    except Exception:
-                        pass
+            from src.core.wormhole import DCC_SCHEME, STREAM_SCHEME, TransferError
+            try:
+                if code.startswith(DCC_SCHEME):
+                    transfer = await self.wormhole.accept_dcc(code, str(download_dir))
+                elif code.startswith(STREAM_SCHEME):
+                    transfer = await self.wormhole.receive_stream(code, str(download_dir))
+                else:
+                    transfer = await self.wormhole.receive(code, str(download_dir))
+            except TransferError as e:
+                hint = "" if code.startswith(DCC_SCHEME) else "\nMake sure 'magic-wormhole' is installed."
+                self.chat_pane.add_embed("Transfer Failed", f"❌ {e}{hint}", "error")
+                return
+            transfer.peer = transfer.peer or self.current_dm  # DCC offers know their sender
+            # Progress shows in the transfers panel; the result is announced when it ends
+            self.chat_pane.add_message(
+                "System", f"📥 Receiving with code {code} into {download_dir} (/cancel {transfer.id} to stop)", is_system=True
+            )
+        
+        elif cmd == "transfers":
+            manager = self.subsystems.peek("wormhole")
+            transfers = list(manager.transfers.values()) if manager else []
+            if not transfers:
+                self.chat_pane.add_message("System", "No transfers.", is_system=True)
+            for transfer in transfers:
+                self.chat_pane.add_message("System", transfer.summary(), is_system=True)
+        
+        elif cmd == "cancel":
+            manager = self.subsystems.peek("wormhole")
+            if not args.strip().isdigit():
+                self.chat_pane.add_message("System", "Usage: /cancel <transfer id> (see /transfers)", is_system=True)
+            elif manager and manager.cancel(int(args)):
+                self.chat_pane.add_message("System", f"🛑 Cancelled transfer {args.strip()}", is_system=True)
             else:
-                self.chat_pane.add_embed(
-                    "Transfer Failed",
-                    "❌ Could not receive file. Check the code and try again.\nMake sure 'magic-wormhole' is installed.",
-                    "error"
-                )
+                self.chat_pane.add_message("System", f"No active transfer {args.strip()}", is_system=True)
         
         elif cmd == "ai":
             # Check if this is a private query
@@ -926,7 +1253,7 @@ class Phosphor(App):
                             try:
                                 self.irc.send_message(self.current_channel, line)
                                 # Also show in local chat pane using actual nick
-                                self.chat_pane.add_message(self.irc.get_confirmed_nick(), line, False, self.current_channel)
+                                self._show_own_message(line, channel=self.current_channel)
                             except Exception as e:
                                 self.chat_pane.add_message("System", f"Failed to send to IRC: {e}", is_system=True)
                                 break
@@ -935,6 +1262,57 @@ class Phosphor(App):
                     self.chat_pane.add_embed("AI Assistant (Local)", response_text, "info")
                     self.chat_pane.add_message("System", "💡 Not connected to IRC. Result shown locally only.", is_system=True)
         
+        elif cmd == "list":
+            # Search the network's channels: /list [mask] [min_users]
+            pattern, min_users = None, None
+            for token in args.split():
+                if token.isdigit():
+                    min_users = int(token)
+                else:
+                    pattern = token if any(c in token for c in "*?") else f"*{token}*"
+            self.action_search_channels(pattern, min_users)
+        
+        elif cmd == "trace":
+            # Record spans to a Chrome trace: /trace start [sample rate] | /trace stop
+            tokens = args.split()
+            action = tokens[0] if tokens else "status"
+            if action == "start":
+                try:
+                    rate = float(tokens[1]) if len(tokens) > 1 else self.config.get("trace_sample_rate", 1.0)
+                except ValueError:
+                    self.chat_pane.add_message("System", "Usage: /trace start [sample rate 0-1]", is_system=True)
+                    return
+                tracing.TRACER.start(sample_rate=rate)
+                self.chat_pane.add_message("System", f"🔬 Tracing {rate:.0%} of spans. /trace stop to write the file.", is_system=True)
+            elif action == "stop":
+                path = tracing.TRACER.stop()
+                if path:
+                    self.chat_pane.add_message("System", f"🔬 Trace written to {path} (open in ui.perfetto.dev)", is_system=True)
+                else:
+                    self.chat_pane.add_message("System", "Tracing is not running.", is_system=True)
+            else:
+                state = "on" if tracing.TRACER.enabled else "off"
+                self.chat_pane.add_message("System", f"Tracing is {state}. Usage: /trace start [sample rate] | /trace stop", is_system=True)
+        
+        elif cmd == "profile":
+            # Profile the live session: /profile start|stop [cpu|mem]
+            tokens = args.split()
+            action = tokens[0] if tokens else "status"
+            kind = tokens[1] if len(tokens) > 1 else None
+            if action not in ("start", "stop") or kind not in (None, "cpu", "mem"):
+                running = [k for k, on in (("cpu", self.profiler.cpu_running), ("mem", self.profiler.mem_running)) if on]
+                self.chat_pane.add_message(
+                    "System",
+                    f"Profiling: {', '.join(running) or 'off'}. Usage: /profile start|stop [cpu|mem]",
+                    is_system=True,
+                )
+            elif action == "start":
+                self._start_profile(kind or "cpu")
+            else:
+                kinds = [kind] if kind else ["cpu", "mem"]
+                for k in kinds:
+                    self._stop_profile(k)
+        
         elif cmd == "join":
             # Join or create channel
             if not args:
@@ -1030,7 +1408,7 @@ class Phosphor(App):
                 # Send the message directly
                 try:
                     self.irc.send_message(target_nick, dm_message)
-                    self.chat_pane.add_message(self.irc.get_confirmed_nick(), dm_message, False, dm_nick=target_nick)
+                    self._show_own_message(dm_message, dm_nick=target_nick)
                     self.chat_pane.add_message("System", f"💬 Sent DM to {target_nick}", is_system=True)
                 except Exception as e:
                     self.chat_pane.add_message("System", f"Failed to send DM: {e}", is_system=True)
@@ -1058,7 +1436,7 @@ class Phosphor(App):
         
         else:
             self.chat_pane.add_message("System", f"Unknown command: /{cmd}", is_system=True)
-            self.chat_pane.add_message("System", "Available commands: /join, /msg, /dm, /close, /bookmark, /unbookmark, /bookmarks, /send, /grab, /ai", is_system=True)
+            self.chat_pane.add_message("System", "Available commands: /join, /list, /msg, /dm, /close, /bookmark, /unbookmark, /bookmarks, /send, /grab, /transfers, /cancel, /ai, /trace, /profile", is_system=True)
     
     def action_toggle_teletext(self):
         """Toggle the Teletext dashboard."""
@@ -1080,6 +1458,54 @@ class Phosphor(App):
         if self.chat_pane:
             self.chat_pane.add_message("System", f"📸 Screenshot saved: {filepath}", is_system=True)
     
+    def action_toggle_watchdog(self):
+        """Start or stop the event-loop stall watchdog."""
+        if self.watchdog.running:
+            self.watchdog.stop()
+            text = "🐕 Stall watchdog off"
+        else:
+            self.watchdog.start()
+            text = (f"🐕 Stall watchdog on: stalls over {self.watchdog.threshold * 1000:.0f}ms "
+                    f"are written to {self.watchdog.stalls_path}")
+        if self.chat_pane:
+            self.chat_pane.add_message("System", text, is_system=True)
+    
+    def action_toggle_profile(self, kind: str = "cpu"):
+        """Start or stop a CPU ('cpu') or memory ('mem') profile."""
+        running = self.profiler.cpu_running if kind == "cpu" else self.profiler.mem_running
+        if running:
+            self._stop_profile(kind)
+        else:
+            self._start_profile(kind)
+    
+    def _start_profile(self, kind: str):
+        """Begin profiling and say how to stop."""
+        if kind == "cpu":
+            self.profiler.start_cpu()
+            text = "⏱️ CPU profile running. /profile stop cpu to write it."
+        else:
+            self.profiler.start_mem()
+            text = "🧠 Memory baseline taken. /profile stop mem to report growth since now."
+        if self.chat_pane:
+            self.chat_pane.add_message("System", text, is_system=True)
+    
+    def _stop_profile(self, kind: str):
+        """Stop profiling and report where the results went."""
+        if kind == "cpu":
+            if not self.profiler.cpu_running:
+                return
+            paths = self.profiler.stop_cpu()
+            lines = ["⏱️ CPU profile written: " + ", ".join(str(p) for p in paths)]
+        else:
+            if not self.profiler.mem_running:
+                return
+            path, summary = self.profiler.stop_mem()
+            lines = [f"🧠 Memory growth by subsystem{f' (full report: {path})' if path else ''}:"]
+            lines += [f"  {line}" for line in summary] or ["  (no growth)"]
+        if self.chat_pane:
+            for line in lines:
+                self.chat_pane.add_message("System", line, is_system=True)
+    
     def action_show_keys(self):
         """Show the keyboard shortcuts screen."""
         self.push_screen(KeysScreen())
@@ -1135,19 +1561,28 @@ class Phosphor(App):
         except Exception:
             pass  # Ignore if widgets not yet mounted
     
-    def action_search_channels(self):
-        """Open channel search dialog."""
+    def action_search_channels(self, pattern: str = None, min_users: int = None):
+        """Open channel search dialog, optionally with a server-filtered LIST."""
         if not self.irc_connected:
             self.chat_pane.add_message("System", "Not connected to IRC. Cannot search channels.", is_system=True)
             return
         
-        self.chat_pane.add_message("System", "DEBUG: Opening channel search screen", True)
         self._channel_search_screen = ChannelSearchScreen()
         
         # Pass recent channels to the search screen
         recent_channels = list(self.channels_joined)
         self._channel_search_screen.recent_channels.update(recent_channels)
         
+        if pattern or min_users:
+            self._channel_search_screen.update_channel_list([], loading=True)
+            self.request_channel_list(pattern, min_users)
+        else:
+            # Show the cached LIST instantly; only hit the server when it's stale
+            cached, fresh = self.list_cache.load(self._network_key())
+            self._channel_search_screen.update_channel_list(cached, loading=not fresh)
+            if not fresh:
+                self.request_channel_list(min_users=self.list_min_users)
+        
         self.push_screen(self._channel_search_screen)
     
     def action_toggle_bookmark(self):
@@ -1176,14 +1611,18 @@ class Phosphor(App):
             if self.chat_pane:
                 self.chat_pane.add_message("System", f"Removed bookmark from {self.current_channel}", is_system=True)
     
-    def request_channel_list(self, pattern: str = None):
-        """Request channel list from IRC server."""
-        self.chat_pane.add_message("System", f"DEBUG: request_channel_list called, connected: {self.irc_connected}", True)
+    def request_channel_list(self, pattern: str = None, min_users: int = None):
+        """Request channel list from IRC server.
+        
+        The default whole-network listing is saved to the LIST cache;
+        pattern searches are not, since they only cover part of the network.
+        """
         if self.irc_connected:
-            self.chat_pane.add_message("System", f"DEBUG: Calling irc.list_channels with pattern: {pattern}", True)
-            self.irc.list_channels(pattern)
+            self._list_results = []
+            self._list_cacheable = not pattern and min_users == self.list_min_users
+            self.irc.list_channels(pattern, min_users)
         else:
-            self.chat_pane.add_message("System", "DEBUG: Not connected to IRC", True)
+            self.chat_pane.add_message("System", "Not connected to IRC. Cannot list channels.", is_system=True)
     
     def on_channel_search_screen_channel_selected(self, event: ChannelSearchScreen.ChannelSelected):
         """Handle channel selection from search dialog."""
@@ -1209,7 +1648,7 @@ class Phosphor(App):
         self.irc.join_channel(channel)
         
         # Update recent channels in search screen for next time
-        if hasattr(self, '_channel_search_screen'):
+        if self._channel_search_screen:
             self._channel_search_screen.add_recent_channel(channel)
         
         # Switch to the new channel
@@ -1226,5 +1665,18 @@ class Phosphor(App):
     async def on_unmount(self):
         """Clean up on exit."""
         self._save_bookmarks()
+        self.history.close()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        self.watchdog.stop()
+        tracing.TRACER.stop()
+        self.profiler.stop_cpu()
+        self.profiler.stop_mem()
+        mcp = self.subsystems.peek("mcp")
+        if mcp:
+            await mcp.close()
+        wormhole = self.subsystems.peek("wormhole")
+        if wormhole:
+            await wormhole.close()
         if self.irc:
             await self.irc.disconnect()
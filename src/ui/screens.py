@@ -13,6 +13,9 @@ from textual.containers import Container, Vertical, Horizontal
 from textual.widgets import Static, Input, Button, Switch, Label
 from textual.message import Message
 
+from src.core import metrics
+from src.core.system_sampler import SystemSampler, format_rate
+
 
 LOGO = """
 [green]██████╗ ██╗  ██╗ ██████╗ ███████╗[/][cyan]██████╗ [/][green]██╗  ██╗ ██████╗ ██████╗ [/]
@@ -399,7 +402,10 @@ class HomeScreen(Screen):
 class TeletextScreen(Screen):
     """Retro Teletext dashboard screen - Page 100 (Ceefax style)."""
 
-    BINDINGS = [("f1", "toggle_teletext", "Back to Chat")]
+    BINDINGS = [
+        ("f1", "toggle_teletext", "Back to Chat"),
+        ("m", "toggle_metrics_page", "Metrics"),
+    ]
 
     def __init__(self, app_ref=None, **kwargs):
         super().__init__(**kwargs)
@@ -410,16 +416,42 @@ class TeletextScreen(Screen):
         self.frame_count = 0
         self.blink_state = False
         self.ticker_offset = 0
+        self._rendered = {}  # region -> last markup pushed to its Static
+        self._stats_version = -1  # Sampler snapshot version last rendered
+        self.page = 100  # 100 = system dashboard, 200 = client metrics
         # Get theme from app
         self.theme = getattr(app_ref, 'active_theme', 'default') if app_ref else 'default'
 
+    # Dashboard regions, top to bottom; each is its own Static and is only
+    # re-rendered when its markup changes
+    REGIONS = ("header", "logo", "performance", "connection", "channels", "metrics", "ticker", "footer")
+    STATIC_REGIONS = ("logo", "footer")
+    # Regions that only belong to one page; the rest are shown on every page
+    PAGE_REGIONS = {
+        100: ("performance", "connection", "channels"),
+        200: ("metrics",),
+    }
+
     def compose(self) -> ComposeResult:
         """Compose the teletext screen."""
+        data = self._get_dynamic_data()
+        regions = []
+        for name in self.REGIONS:
+            region = Static(self._render_region(name, data), id=f"teletext-{name}", classes="teletext-region")
+            region.display = self._on_page(name)
+            regions.append(region)
         yield Container(
-            Static(self._generate_dashboard(), id="dashboard-content"),
+            Vertical(*regions, id="dashboard-content"),
             id="teletext-container"
         )
 
+    def _on_page(self, name: str) -> bool:
+        """Whether a region is shown on the current page."""
+        for page, names in self.PAGE_REGIONS.items():
+            if name in names:
+                return page == self.page
+        return True
+
     def _get_dynamic_data(self) -> dict:
         """Get dynamic data from the app."""
         data = {
@@ -438,8 +470,8 @@ class TeletextScreen(Screen):
             data["connected"] = getattr(self.app_ref, "irc_connected", False)
             
             # Server info
-            if hasattr(self.app_ref, "irc"):
-                irc = self.app_ref.irc
+            irc = getattr(self.app_ref, "irc", None)
+            if irc:
                 data["server"] = f"{irc.host}:{irc.port}"
                 data["nick"] = getattr(irc, "nick", "Unknown")
             
@@ -461,10 +493,8 @@ class TeletextScreen(Screen):
         minutes, secs = divmod(remainder, 60)
         return f"{td.days}d {hours:02d}:{minutes:02d}:{secs:02d}"
 
-    def _generate_ticker(self, width: int = 50) -> str:
+    def _generate_ticker(self, data: dict, width: int = 50) -> str:
         """Generate scrolling news ticker."""
-        data = self._get_dynamic_data()
-        
         status = "CONNECTED" if data["connected"] else "DISCONNECTED"
         ticker_text = f"    STATUS: {status} | SERVER: {data['server']} | NICK: {data['nick']} | CHANNEL: {data['current_channel']} | UPTIME: {self._format_uptime(data['uptime'])}    "
         
@@ -472,98 +502,48 @@ class TeletextScreen(Screen):
         scrolled = ticker_text[self.ticker_offset:] + ticker_text[:self.ticker_offset]
         return scrolled[:width]
 
-    def _get_memory_mb(self) -> float:
-        """Get current memory usage in MB."""
-        try:
-            import psutil
-            process = psutil.Process(os.getpid())
-            return process.memory_info().rss / (1024 * 1024)
-        except ImportError:
-            return 0.0
-    
     def _get_system_stats(self) -> dict:
-        """Get real-time system statistics."""
-        stats = {
-            "cpu_percent": 0.0,
-            "memory_percent": 0.0,
-            "memory_used_gb": 0.0,
-            "memory_total_gb": 0.0,
-            "network_sent_mb": 0.0,
-            "network_recv_mb": 0.0,
-            "disk_usage_percent": 0.0,
-        }
-        
-        try:
-            import psutil
-            
-            # CPU usage
-            stats["cpu_percent"] = psutil.cpu_percent(interval=0)
-            
-            # Memory usage
-            mem = psutil.virtual_memory()
-            stats["memory_percent"] = mem.percent
-            stats["memory_used_gb"] = mem.used / (1024 ** 3)
-            stats["memory_total_gb"] = mem.total / (1024 ** 3)
-            
-            # Network I/O
-            net = psutil.net_io_counters()
-            stats["network_sent_mb"] = net.bytes_sent / (1024 ** 2)
-            stats["network_recv_mb"] = net.bytes_recv / (1024 ** 2)
-            
-            # Disk usage
-            disk = psutil.disk_usage('/')
-            stats["disk_usage_percent"] = disk.percent
-            
-        except ImportError:
-            pass
-        
-        return stats
+        """Latest snapshot from the app's background sampler (never blocks)."""
+        sampler = getattr(self.app_ref, "sampler", None)
+        return sampler.snapshot if sampler else SystemSampler._empty()
 
-    def _generate_dashboard(self) -> str:
-        """Generate authentic Ceefax-style teletext dashboard."""
-        self.frame_count += 1
-        self.blink_state = not self.blink_state
-        
-        data = self._get_dynamic_data()
-        stats = self._get_system_stats()
-
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        day = datetime.now().strftime("%a")
-        date = datetime.now().strftime("%d")
-        month = datetime.now().strftime("%b")
-        
-        pid = os.getpid()
-        mem_mb = self._get_memory_mb()
-        session_uptime = self._format_uptime(data['uptime'])
-
-        # Theme-specific colors
-        is_halloween = self.theme == "halloween"
-        
-        if is_halloween:
-            primary = "#ff6600"
-            secondary = "#ff9900"
-            accent = "#9966ff"
-            text = "#ffcc00"
-            highlight = "#ff6600"
-            ticker_bg = "#4a2a4a"
-        else:
-            primary = "green"
-            secondary = "cyan"
-            accent = "yellow"
-            text = "white"
-            highlight = "yellow"
-            ticker_bg = "blue"
+    def _colors(self) -> dict:
+        """Theme-specific colors."""
+        if self.theme == "halloween":
+            return {
+                "primary": "#ff6600",
+                "secondary": "#ff9900",
+                "accent": "#9966ff",
+                "text": "#ffcc00",
+                "highlight": "#ff6600",
+                "ticker_bg": "#4a2a4a",
+            }
+        return {
+            "primary": "green",
+            "secondary": "cyan",
+            "accent": "yellow",
+            "text": "white",
+            "highlight": "yellow",
+            "ticker_bg": "blue",
+        }
 
-        lines = []
+    def _render_region(self, name: str, data: dict) -> str:
+        """Build the markup for one dashboard region."""
+        return getattr(self, f"_render_{name}")(data, self._colors(), self.theme == "halloween")
 
-        # Header line - PID, network stats, date and time
-        header = f"PID:{pid}  [{secondary}]↑{stats['network_sent_mb']:.1f}MB ↓{stats['network_recv_mb']:.1f}MB[/]  {day} {date} {month}  [{secondary}]{timestamp}[/]"
-        lines.append(f"[{text}]{header}[/]")
-        lines.append("")
-
-        # Logo banner - phosphor with highlighted middle P
-        lines.append("")
+    def _render_header(self, data: dict, c: dict, is_halloween: bool) -> str:
+        """PID, network rates, date and time."""
+        stats = self._get_system_stats()
+        now = datetime.now()
+        rates = f"↑{format_rate(stats['net_sent_rate'])} ↓{format_rate(stats['net_recv_rate'])}"
+        header = f"PID:{os.getpid()}  [{c['secondary']}]{rates}[/]  {now:%a %d %b}  [{c['secondary']}]{now:%H:%M:%S}[/]"
+        return f"[{c['text']}]{header}[/]\n"
+
+    def _render_logo(self, data: dict, c: dict, is_halloween: bool) -> str:
+        """Logo banner - phosphor with highlighted middle P."""
+        lines = [""]
         if is_halloween:
+            primary, secondary, accent, text = c["primary"], c["secondary"], c["accent"], c["text"]
             lines.append(f"[{primary}]██████╗ ██╗  ██╗ ██████╗ ███████╗[/][{accent}]██████╗ [/][{primary}]██╗  ██╗ ██████╗ ██████╗ [/]")
             lines.append(f"[{primary}]██╔══██╗██║  ██║██╔═══██╗██╔════╝[/][{accent}]██╔══██╗[/][{primary}]██║  ██║██╔═══██╗██╔══██╗[/]")
             lines.append(f"[{secondary}]██████╔╝███████║██║   ██║███████╗[/][{accent}]██████╔╝[/][{secondary}]███████║██║   ██║██████╔╝[/]")
@@ -580,36 +560,44 @@ class TeletextScreen(Screen):
             lines.append("[green on black]██║     ██║  ██║╚██████╔╝███████║[/][cyan on black]██║     [/][green on black]██║  ██║╚██████╔╝██║  ██║[/]")
             lines.append("[green on black]╚═╝     ╚═╝  ╚═╝ ╚═════╝ ╚══════╝[/][cyan on black]╚═╝     [/][green on black]╚═╝  ╚═╝ ╚═════╝ ╚═╝  ╚═╝[/]")
         lines.append("")
+        return "\n".join(lines)
 
-        # System Performance section - left-aligned, labels above bars
+    def _render_performance(self, data: dict, c: dict, is_halloween: bool) -> str:
+        """CPU and program memory bars - labels above bars, left-aligned."""
+        stats = self._get_system_stats()
+        lines = []
         if is_halloween:
-            lines.append(f"[{primary}]🦇 SYSTEM PERFORMANCE 🦇[/]")
+            lines.append(f"[{c['primary']}]🦇 SYSTEM PERFORMANCE 🦇[/]")
         else:
-            lines.append(f"[{accent}]SYSTEM PERFORMANCE[/]")
+            lines.append(f"[{c['accent']}]SYSTEM PERFORMANCE[/]")
         lines.append("")
         
-        # CPU - label above, bar below, left-aligned
         cpu_bar = self._render_bar(stats["cpu_percent"], 100, 50)
         cpu_color = self._get_usage_color(stats["cpu_percent"], is_halloween)
-        lines.append(f"[{text}]CPU {stats['cpu_percent']:5.1f}%[/]")
+        lines.append(f"[{c['text']}]CPU {stats['cpu_percent']:5.1f}%[/]")
         lines.append(f"[{cpu_color}]{cpu_bar}[/]")
         lines.append("")
         
         # Program Memory - show program memory out of 2GB
+        mem_mb = stats["process_rss_mb"]
         max_mem_gb = 2.0
         mem_percent = (mem_mb / 1024) / max_mem_gb * 100
         mem_bar = self._render_bar(mem_percent, 100, 50)
         mem_color = self._get_usage_color(mem_percent, is_halloween)
-        lines.append(f"[{text}]Memory {mem_mb:.1f}MB / 2048MB[/] [{secondary}]({mem_percent:.1f}%)[/]")
+        lines.append(f"[{c['text']}]Memory {mem_mb:.1f}MB / 2048MB[/] [{c['secondary']}]({mem_percent:.1f}%)[/]")
         lines.append(f"[{mem_color}]{mem_bar}[/]")
         lines.append("")
+        return "\n".join(lines)
 
-        # Connection status section
+    def _render_connection(self, data: dict, c: dict, is_halloween: bool) -> str:
+        """Connection status section."""
+        primary, secondary, accent, text = c["primary"], c["secondary"], c["accent"], c["text"]
+        lines = []
         if is_halloween:
             lines.append(f"[{primary}]💀 IRC Connection 💀[/]")
         else:
             lines.append(f"[{primary}]IRC Connection[/]")
-        lines.append(f"")
+        lines.append("")
         
         if data["connected"]:
             if is_halloween:
@@ -623,48 +611,65 @@ class TeletextScreen(Screen):
             else:
                 status_icon = "[red]●[/]" if self.blink_state else "[red]○[/]"
             lines.append(f"[{accent}]DISCONNECTED[/] {status_icon}")
-        lines.append(f"")
+        lines.append("")
 
         lines.append(f"[{text}]Server:[/]  [{secondary}]{data['server']}[/]")
         lines.append(f"[{text}]Nick:[/]    [{secondary}]{data['nick']}[/]")
-        lines.append(f"[{text}]Session:[/] [{secondary}]{session_uptime}[/]")
+        lines.append(f"[{text}]Session:[/] [{secondary}]{self._format_uptime(data['uptime'])}[/]")
         lines.append("")
+        return "\n".join(lines)
 
-        # Channels section - simplified
+    def _render_channels(self, data: dict, c: dict, is_halloween: bool) -> str:
+        """Channels section - simplified."""
+        lines = []
         if is_halloween:
-            lines.append(f"[{primary}]🕷️ CHANNELS 🕷️[/]")
+            lines.append(f"[{c['primary']}]🕷️ CHANNELS 🕷️[/]")
         else:
-            lines.append(f"[{accent}]CHANNELS[/]")
+            lines.append(f"[{c['accent']}]CHANNELS[/]")
         if data["channels"]:
             for channel in data["channels"][:5]:
                 if is_halloween:
-                    marker = f"[{primary}]🎃[/]" if channel == data["current_channel"] else " "
+                    marker = f"[{c['primary']}]🎃[/]" if channel == data["current_channel"] else " "
                 else:
-                    marker = f"[{accent}]►[/]" if channel == data["current_channel"] else " "
-                lines.append(f"{marker} [{text}]{channel}[/]")
+                    marker = f"[{c['accent']}]►[/]" if channel == data["current_channel"] else " "
+                lines.append(f"{marker} [{c['text']}]{channel}[/]")
         else:
-            lines.append(f"[{text}]No channels joined[/]")
+            lines.append(f"[{c['text']}]No channels joined[/]")
         lines.append("")
+        return "\n".join(lines)
 
-        # Scrolling ticker
-        ticker = self._generate_ticker(70)
+    def _render_metrics(self, data: dict, c: dict, is_halloween: bool) -> str:
+        """Page 200 - Phosphor's own counters, gauges and latency histograms."""
+        lines = []
         if is_halloween:
-            lines.append(f"[{secondary} on {ticker_bg}] 🦇 {ticker} [/]")
+            lines.append(f"[{c['primary']}]🕸️ CLIENT METRICS  P200 🕸️[/]")
         else:
-            lines.append(f"[{accent} on {ticker_bg}] ▶ {ticker} [/]")
+            lines.append(f"[{c['accent']}]CLIENT METRICS  P200[/]")
         lines.append("")
+        rows = metrics.REGISTRY.summary()
+        if not rows:
+            lines.append(f"[{c['text']}]{'No samples yet':<72}[/]")
+        for name, value in rows:
+            lines.append(f"[{c['text']}]{name[:30]:<30}[/] [{c['secondary']}]{value[:41]:<41}[/]")
+        lines.append("")
+        return "\n".join(lines)
 
-        # Simple footer
+    def _render_ticker(self, data: dict, c: dict, is_halloween: bool) -> str:
+        """Scrolling ticker."""
+        ticker = self._generate_ticker(data, 70)
         if is_halloween:
-            lines.append(f"[{secondary}]Press F1 to escape the haunted dashboard 👻[/]")
-        else:
-            lines.append(f"[{secondary}]Press F1 to return to chat[/]")
+            return f"[{c['secondary']} on {c['ticker_bg']}] 🦇 {ticker} [/]\n"
+        return f"[{c['accent']} on {c['ticker_bg']}] ▶ {ticker} [/]\n"
+
+    def _render_footer(self, data: dict, c: dict, is_halloween: bool) -> str:
+        """Simple footer."""
+        if is_halloween:
+            return f"[{c['secondary']}]Press F1 to escape the haunted dashboard 👻  M: metrics[/]"
+        return f"[{c['secondary']}]Press F1 to return to chat  M: metrics[/]"
 
-        return "\n".join(lines)
-    
     def _render_bar(self, value: float, max_value: float, width: int = 20) -> str:
         """Render a progress bar with smooth gradient."""
-        filled = (value / max_value) * width
+        filled = min(max(value / max_value, 0.0), 1.0) * width
         full_blocks = int(filled)
         partial = filled - full_blocks
         
@@ -705,12 +710,31 @@ class TeletextScreen(Screen):
             else:
                 return "red"
 
+    def _refresh_regions(self):
+        """Re-render the dynamic regions, touching only widgets whose markup changed."""
+        self.frame_count += 1
+        self.blink_state = not self.blink_state
+        data = self._get_dynamic_data()
+        
+        sampler = getattr(self.app_ref, "sampler", None)
+        stats_version = sampler.version if sampler else 0
+        
+        for name in self.REGIONS:
+            if name in self.STATIC_REGIONS or not self._on_page(name):
+                continue
+            if name == "performance" and stats_version == self._stats_version:
+                continue  # Nothing new from the sampler
+            markup = self._render_region(name, data)
+            if markup != self._rendered.get(name):
+                self._rendered[name] = markup
+                self.query_one(f"#teletext-{name}", Static).update(markup)
+        self._stats_version = stats_version
+
     async def _update_dashboard(self):
         """Periodically update the dashboard."""
         while True:
             try:
-                dashboard_widget = self.query_one("#dashboard-content", Static)
-                dashboard_widget.update(self._generate_dashboard())
+                self._refresh_regions()
                 await asyncio.sleep(1)
             except Exception:
                 break
@@ -720,10 +744,16 @@ class TeletextScreen(Screen):
         # Apply theme class
         if self.theme == "halloween":
             self.add_class("halloween")
+        sampler = getattr(self.app_ref, "sampler", None)
+        if sampler:
+            sampler.acquire()
         self.update_task = asyncio.create_task(self._update_dashboard())
 
     async def on_unmount(self):
         """Stop updates when screen is closed."""
+        sampler = getattr(self.app_ref, "sampler", None)
+        if sampler:
+            sampler.release()
         if self.update_task:
             self.update_task.cancel()
             try:
@@ -735,6 +765,14 @@ class TeletextScreen(Screen):
         """Return to chat screen."""
         self.app.pop_screen()
 
+    def action_toggle_metrics_page(self):
+        """Flip between the system dashboard (P100) and client metrics (P200)."""
+        self.page = 200 if self.page == 100 else 100
+        for name in self.REGIONS:
+            self.query_one(f"#teletext-{name}", Static).display = self._on_page(name)
+        self._stats_version = -1  # Performance region may have been skipped while hidden
+        self._refresh_regions()
+
 
 class KeysScreen(Screen):
     """Modal screen showing keyboard shortcuts and commands."""
@@ -813,6 +851,7 @@ class KeysScreen(Screen):
         
         shortcuts = [
             ("F1", "Toggle Teletext Dashboard"),
+            ("M", "Teletext: Client Metrics Page"),
             ("Ctrl+P", "Open Command Palette"),
             ("Ctrl+J", "Search/Join Channels"),
             ("Ctrl+B", "Bookmark Current Channel"),
@@ -9,6 +9,8 @@ from textual.binding import Binding
 import re
 from typing import List, Dict, Set
 
+from src.core.fuzzy import FuzzyIndex
+
 
 class ChannelSearchScreen(ModalScreen):
     """Modal screen for searching and joining channels."""
@@ -30,6 +32,13 @@ class ChannelSearchScreen(ModalScreen):
             "#general", "#random", "#help", "#programming", "#python", 
             "#javascript", "#linux", "#gaming", "#music", "#news"
         ]
+        self.network_channels: Dict[str, dict] = {}  # name -> {'name', 'users', 'topic'} from LIST
+        self.list_loading = False
+        # Ranked by user count; rebuilt off the UI thread when a full list arrives
+        self._index = self._new_index([])
+        self._index_pending = False  # A big rebuild is waiting for the screen to mount
+        self._streaming = False  # True once fresh LIST chunks have started replacing the cache
+        self._refresh_scheduled = False
     
     def compose(self) -> ComposeResult:
         """Compose the channel search dialog."""
@@ -42,7 +51,7 @@ class ChannelSearchScreen(ModalScreen):
                     id="channel-search-input"
                 )
                 
-                yield Static("> Suggestions", classes="section-header")
+                yield Static("> Suggestions", id="suggestions-header", classes="section-header")
                 yield ListView(id="suggestions-list")
                 
                 with Horizontal():
@@ -55,6 +64,10 @@ class ChannelSearchScreen(ModalScreen):
             self.add_class("halloween")
         self.query_one("#channel-search-input", Input).focus()
         self.update_suggestions("")
+        self._update_header()
+        if self._index_pending:
+            self._index_pending = False
+            self._rebuild_index()
     
     def on_input_changed(self, event: Input.Changed):
         """Update suggestions as user types."""
@@ -95,13 +108,20 @@ class ChannelSearchScreen(ModalScreen):
             return
         
         for suggestion in suggestions[:8]:  # Limit to 8 suggestions
-            item = ListItem(Label(f"  > {suggestion}"), classes="suggestion-item")
+            entry = self.network_channels.get(suggestion)
+            label = f"  > {suggestion}"
+            if entry:
+                label += f"  ({entry['users']})"
+            item = ListItem(Label(label), classes="suggestion-item")
             item.suggestion_text = suggestion
             suggestions_list.append(item)
     
     def _generate_suggestions(self, search_term: str) -> List[str]:
         """Generate intelligent suggestions based on search term."""
         if not search_term:
+            if self.network_channels:
+                # Busiest channels on the network
+                return [c['name'] for c in self._index.search("", 8)]
             # Show popular channels when no search term
             return self.popular_channels[:5]
         
@@ -112,6 +132,11 @@ class ChannelSearchScreen(ModalScreen):
         if not search_term.startswith('#'):
             suggestions.append(f"#{search_term}")
         
+        # Channels that actually exist on the network, best match first
+        for entry in self._index.search(search_term, 8):
+            if entry['name'] not in suggestions:
+                suggestions.append(entry['name'])
+        
         # Add popular channels that match
         for channel in self.popular_channels:
             if search_lower in channel.lower() and channel not in suggestions:
@@ -163,4 +188,85 @@ class ChannelSearchScreen(ModalScreen):
     
     def set_popular_channels(self, channels: List[str]):
         """Update the list of popular channels."""
-        self.popular_channels = channels
\ No newline at end of file
+        self.popular_channels = channels
+    
+    def update_channel_list(self, channels: List[dict], loading: bool = False):
+        """Replace the known network channels (e.g. from the LIST cache).
+        
+        Args:
+            channels: {'name', 'users', 'topic'} dicts
+            loading: True if a fresh LIST is still streaming in
+        """
+        self.network_channels = {c['name']: c for c in channels}
+        self.list_loading = loading
+        self._rebuild_index()
+    
+    def append_channels(self, channels: List[dict], done: bool):
+        """Add a chunk of streamed LIST results."""
+        if self.list_loading and not self._streaming:
+            # First fresh chunk replaces whatever stale cache was shown
+            self.network_channels = {}
+            self._index = self._new_index([])
+            self._streaming = True
+        for entry in channels:
+            self.network_channels[entry['name']] = entry
+        if done:
+            self.list_loading = False
+            self._streaming = False
+            self._rebuild_index()
+        else:
+            # Searchable right away; proper rank order comes with the final rebuild
+            self._index.extend(channels)
+            self._schedule_refresh()
+    
+    @staticmethod
+    def _new_index(channels: List[dict]) -> FuzzyIndex:
+        return FuzzyIndex(channels, key=lambda c: c['name'], rank=lambda c: c['users'])
+    
+    def _rebuild_index(self):
+        """Re-index all known channels, in a worker thread for big lists."""
+        channels = list(self.network_channels.values())
+        if len(channels) < 2000:
+            self._index = self._new_index(channels)
+            self._schedule_refresh()
+            return
+        if not self.is_mounted:
+            self._index_pending = True
+            return
+        
+        def build():
+            index = self._new_index(channels)
+            self.app.call_from_thread(self._swap_index, index)
+        
+        self.run_worker(build, thread=True, exclusive=True, group="channel-index")
+    
+    def _swap_index(self, index: FuzzyIndex):
+        """Install a freshly built index (main thread)."""
+        self._index = index
+        self._schedule_refresh()
+    
+    def _schedule_refresh(self):
+        """Coalesce suggestion refreshes while LIST chunks are arriving."""
+        if not self.is_mounted or self._refresh_scheduled:
+            return
+        self._refresh_scheduled = True
+        self.set_timer(0.2, self._refresh_from_list)
+    
+    def _refresh_from_list(self):
+        """Re-run the current search against the updated channel list."""
+        self._refresh_scheduled = False
+        try:
+            term = self.query_one("#channel-search-input", Input).value
+        except Exception:
+            return  # Screen already dismissed
+        self.update_suggestions(term)
+        self._update_header()
+    
+    def _update_header(self):
+        """Show how many network channels are known and whether more are coming."""
+        header = self.query_one("#suggestions-header", Static)
+        if not self.network_channels and not self.list_loading:
+            header.update("> Suggestions")
+            return
+        status = " - loading..." if self.list_loading else ""
+        header.update(f"> Suggestions ({len(self.network_channels):,} channels{status})")
@@ -1,11 +1,19 @@
 """Chat pane widget - the center message stream."""
 
+import time
+from bisect import bisect_right
 from datetime import datetime
+from typing import Optional
 from textual.containers import VerticalScroll, Horizontal
 from textual.widgets import Static, Markdown
 
+from src.core import metrics, tracing
 from src.ui.widgets.user_colors import format_username_colored
 
+CHAT_MOUNT = metrics.histogram("phosphor_chat_mount_seconds", "ChatPane time to build and mount rows", ("op",))
+CHAT_PAINT = metrics.histogram("phosphor_chat_paint_seconds", "Delay from mounting a message row to the next screen refresh")
+CHAT_ROWS = metrics.counter("phosphor_chat_rows_mounted_total", "Message rows mounted in the chat pane")
+
 
 class ChatPane(VerticalScroll):
     """The main chat message stream."""
@@ -14,17 +22,59 @@ class ChatPane(VerticalScroll):
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        # Store messages per channel: {channel: [(author, content, is_system, timestamp), ...]}
+        # Store messages per channel: {channel: [(author, content, is_system, timestamp, ts), ...]}
+        # kept sorted by ts (Unix time, from server-time when available)
         self.channel_messages = {}
-        # Store DM messages: {nick: [(author, content, is_system, timestamp), ...]}
+        # Store DM messages: {nick: [(author, content, is_system, timestamp, ts), ...]}
         self.dm_messages = {}
         self.current_channel = None
         self.current_dm = None  # Currently viewing DM with this nick
         self.current_nick = None  # The current user's IRC nick
     
-    def _get_timestamp(self) -> str:
-        """Get current time formatted as HH:MM."""
-        return datetime.now().strftime("%H:%M")
+    def _get_timestamp(self, when: Optional[float] = None) -> str:
+        """Format a Unix timestamp (default: now) as local HH:MM."""
+        if when is None:
+            return datetime.now().strftime("%H:%M")
+        return datetime.fromtimestamp(when).strftime("%H:%M")
+    
+    @staticmethod
+    def _unpack(msg_data: tuple) -> tuple:
+        """Normalize stored history entries to (author, content, is_system, timestamp)."""
+        if len(msg_data) >= 4:
+            return msg_data[:4]
+        author, content, is_system = msg_data
+        return author, content, is_system, "--:--"  # Placeholder for old messages without timestamp
+    
+    @staticmethod
+    def _store(history: list, entry: tuple) -> int:
+        """Insert an entry into a history list in ts order; return its index."""
+        ts = entry[4]
+        if not history or len(history[-1]) < 5 or history[-1][4] <= ts:
+            history.append(entry)
+            return len(history) - 1
+        index = bisect_right([m[4] if len(m) >= 5 else 0 for m in history], ts)
+        history.insert(index, entry)
+        return index
+    
+    def _mount_row(self, row: Horizontal, ts: float, at_end: bool):
+        """Mount a message row, placing late arrivals before newer rows."""
+        row.ts = ts
+        CHAT_ROWS.inc()
+        mounted = time.perf_counter()
+        self.call_after_refresh(lambda: CHAT_PAINT.observe(time.perf_counter() - mounted))
+        if not at_end:
+            # Walk back to the newest row that is not newer than this one
+            for child in reversed(self.children):
+                child_ts = getattr(child, "ts", None)
+                if child_ts is not None and child_ts <= ts:
+                    self.mount(row, after=child)
+                    return
+            rows = [child for child in self.children if getattr(child, "ts", None) is not None]
+            if rows:
+                self.mount(row, before=rows[0])
+                return
+        self.mount(row)
+        self.scroll_end(animate=False)
     
     def _create_message_widget(self, author: str, content: str, is_system: bool, timestamp: str) -> Horizontal:
         """Create a message row widget with content and timestamp."""
@@ -43,7 +93,10 @@ class ChatPane(VerticalScroll):
         
         return Horizontal(content_widget, time_widget, classes="message-row")
     
-    def add_message(self, author: str, content: str, is_system: bool = False, channel: str = None, dm_nick: str = None):
+    @CHAT_MOUNT.timed(op="message")
+    @tracing.traced("chat.add_message", "ui")
+    def add_message(self, author: str, content: str, is_system: bool = False, channel: str = None,
+                    dm_nick: str = None, server_time: Optional[float] = None):
         """Add a message to the chat.
         
         Args:
@@ -52,42 +105,94 @@ class ChatPane(VerticalScroll):
             is_system: Whether this is a system message
             channel: Channel name (for channel messages)
             dm_nick: Nick of the DM partner (for DM messages)
+            server_time: Unix timestamp from the server (server-time), defaults to now
         """
         # Strip leading colon from content if present (IRC protocol artifact)
         content = content.lstrip(": ")
         
-        # Get current timestamp
-        timestamp = self._get_timestamp()
+        ts = server_time if server_time is not None else time.time()
+        timestamp = self._get_timestamp(ts)
+        entry = (author, content, is_system, timestamp, ts)
         
         # Store message in history
         if dm_nick:
-            # DM message
-            if dm_nick not in self.dm_messages:
-                self.dm_messages[dm_nick] = []
-            self.dm_messages[dm_nick].append((author, content, is_system, timestamp))
-            
-            # Only display if viewing this DM conversation
-            if dm_nick == self.current_dm:
-                msg_widget = self._create_message_widget(author, content, is_system, timestamp)
-                self.mount(msg_widget)
-                self.scroll_end(animate=False)
+            # DM message - only display if viewing this DM conversation
+            history = self.dm_messages.setdefault(dm_nick, [])
+            visible = dm_nick == self.current_dm
         elif channel:
-            # Channel message
-            if channel not in self.channel_messages:
-                self.channel_messages[channel] = []
-            self.channel_messages[channel].append((author, content, is_system, timestamp))
-            
-            # Only display if it's for the current channel
-            if channel == self.current_channel:
-                msg_widget = self._create_message_widget(author, content, is_system, timestamp)
-                self.mount(msg_widget)
-                self.scroll_end(animate=False)
+            # Channel message - only display if it's for the current channel
+            history = self.channel_messages.setdefault(channel, [])
+            visible = channel == self.current_channel
         else:
             # System message with no target - show if in current view
             msg_widget = self._create_message_widget(author, content, is_system, timestamp)
             self.mount(msg_widget)
             self.scroll_end(animate=False)
+            return
+        
+        index = self._store(history, entry)
+        if visible:
+            msg_widget = self._create_message_widget(author, content, is_system, timestamp)
+            self._mount_row(msg_widget, ts, at_end=index == len(history) - 1)
+    
+    @CHAT_MOUNT.timed(op="history")
+    @tracing.traced("chat.insert_history", "ui")
+    def insert_history(self, channel: str, messages: list[dict]):
+        """Merge backlog into a channel in timestamp order without re-rendering.
+        
+        Args:
+            channel: Channel the backlog belongs to
+            messages: {'nick', 'text', 'ts'} dicts; ones already shown are skipped
+        """
+        history = self.channel_messages.setdefault(channel, [])
+        seen = {(m[4], m[0], m[1]) for m in history if len(m) >= 5}
+        entries = []
+        for msg in messages:
+            ts = msg.get("ts") or time.time()
+            content = msg.get("text", "").lstrip(": ")
+            key = (ts, msg.get("nick", ""), content)
+            if key in seen:
+                continue
+            seen.add(key)
+            entries.append((msg.get("nick", ""), content, False, self._get_timestamp(ts), ts))
+        if not entries:
+            return
+        entries.sort(key=lambda e: e[4])
+        
+        # Merge the two sorted runs in one pass
+        merged = []
+        i = j = 0
+        while i < len(history) or j < len(entries):
+            if j >= len(entries) or (i < len(history) and (history[i][4] if len(history[i]) >= 5 else 0) <= entries[j][4]):
+                merged.append(history[i])
+                i += 1
+            else:
+                merged.append(entries[j])
+                j += 1
+        self.channel_messages[channel] = merged
+        
+        if channel != self.current_channel:
+            return
+        
+        # Mount each new row before the first displayed row that is newer,
+        # grouping rows that share an anchor into a single mount call
+        rows = [child for child in self.children if getattr(child, "ts", None) is not None]
+        row_ts = [row.ts for row in rows]
+        groups = {}  # anchor index -> widgets
+        for entry in entries:
+            widget = self._create_message_widget(*entry[:4])
+            widget.ts = entry[4]
+            groups.setdefault(bisect_right(row_ts, entry[4]), []).append(widget)
+        CHAT_ROWS.inc(len(entries))
+        for anchor, widgets in groups.items():
+            if anchor < len(rows):
+                self.mount(*widgets, before=rows[anchor])
+            else:
+                self.mount(*widgets)
+        if len(rows) in groups:
+            self.scroll_end(animate=False)
     
+    @CHAT_MOUNT.timed(op="switch")
     def switch_channel(self, channel: str):
         """Switch to a different channel and restore its message history."""
         self.current_channel = channel
@@ -99,18 +204,14 @@ class ChatPane(VerticalScroll):
         # Restore messages for this channel
         if channel in self.channel_messages:
             for msg_data in self.channel_messages[channel]:
-                # Handle both old format (3 items) and new format (4 items with timestamp)
-                if len(msg_data) == 4:
-                    author, content, is_system, timestamp = msg_data
-                else:
-                    author, content, is_system = msg_data
-                    timestamp = "--:--"  # Placeholder for old messages without timestamp
-                
+                author, content, is_system, timestamp = self._unpack(msg_data)
                 msg_widget = self._create_message_widget(author, content, is_system, timestamp)
+                msg_widget.ts = msg_data[4] if len(msg_data) >= 5 else None
                 self.mount(msg_widget)
         
         self.scroll_end(animate=False)
     
+    @CHAT_MOUNT.timed(op="switch")
     def switch_dm(self, nick: str):
         """Switch to a DM conversation and restore its message history."""
         self.current_dm = nick
@@ -122,13 +223,9 @@ class ChatPane(VerticalScroll):
         # Restore messages for this DM
         if nick in self.dm_messages:
             for msg_data in self.dm_messages[nick]:
-                if len(msg_data) == 4:
-                    author, content, is_system, timestamp = msg_data
-                else:
-                    author, content, is_system = msg_data
-                    timestamp = "--:--"
-                
+                author, content, is_system, timestamp = self._unpack(msg_data)
                 msg_widget = self._create_message_widget(author, content, is_system, timestamp)
+                msg_widget.ts = msg_data[4] if len(msg_data) >= 5 else None
                 self.mount(msg_widget)
         
         self.scroll_end(animate=False)
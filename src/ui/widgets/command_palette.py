@@ -6,21 +6,42 @@ from textual.widgets import Static, OptionList
 from textual.widgets.option_list import Option
 from textual.message import Message
 
+from src.core.fuzzy import FuzzyIndex
+
 
 # Available commands with descriptions
 COMMANDS = [
     ("/join", "Join or search for a channel"),
+    ("/list", "Search network channels: /list [mask] [min users]"),
     ("/msg", "Send a direct message: /msg <nick> [message]"),
     ("/dm", "Start a DM conversation: /dm <nick>"),
     ("/close", "Close current DM conversation"),
     ("/bookmark", "Bookmark current or specified channel"),
     ("/unbookmark", "Remove bookmark from channel"),
     ("/bookmarks", "List all bookmarked channels"),
-    ("/send", "Send file to user: /send <filepath> (best in DM)"),
-    ("/grab", "Receive file: /grab <code>"),
+    ("/send", "Send file, folder or glob: /send <path|glob> (best in DM; DCC on the same network)"),
+    ("/grab", "Receive file: /grab <code> (wormhole, stream:// or dcc://)"),
+    ("/transfers", "List file transfers with progress"),
+    ("/cancel", "Cancel a file transfer: /cancel <id>"),
     ("/ai", "Ask AI assistant (use 'private' prefix for private response)"),
+    ("/trace", "Record a Perfetto trace: /trace start [rate] | stop"),
+    ("/profile", "Profile this session: /profile start|stop [cpu|mem]"),
 ]
 
+# Fuzzy matching runs over command names only: subsequences of a long
+# description match nearly any short query
+_NAMES = FuzzyIndex(COMMANDS, key=lambda c: c[0].lstrip("/"))
+
+
+def match_commands(text: str) -> list[tuple[str, str]]:
+    """Commands matching typed text: fuzzy name matches, then description substrings."""
+    search = text.lstrip("/").lower()
+    if not search:
+        return COMMANDS.copy()
+    matches = _NAMES.search(search, limit=len(COMMANDS))
+    matches += [c for c in COMMANDS if c not in matches and search in c[1].lower()]
+    return matches
+
 
 class SlashCommandPalette(Static):
     """A popup showing available slash commands."""
@@ -70,34 +91,35 @@ class SlashCommandPalette(Static):
         super().__init__(**kwargs)
         self.highlighted_index = 0
         self.filtered_commands = COMMANDS.copy()
+        self._rows: list[Static] = []
 
     def compose(self) -> ComposeResult:
         """Compose the command palette."""
         yield Vertical(id="command-list")
 
     def on_mount(self):
-        """Build the initial command list."""
+        """Mount one row per command; filtering only updates them."""
+        container = self.query_one("#command-list", Vertical)
+        self._rows = [Static("", classes="command-item") for _ in COMMANDS]
+        container.mount(*self._rows)
         self._rebuild_list()
 
     def _rebuild_list(self):
-        """Rebuild the command list display."""
-        container = self.query_one("#command-list", Vertical)
-        container.remove_children()
-
-        for i, (cmd, desc) in enumerate(self.filtered_commands):
-            if i == self.highlighted_index:
+        """Refresh the command rows in place."""
+        for i, row in enumerate(self._rows):
+            if i >= len(self.filtered_commands):
+                row.display = False
+                continue
+            cmd, desc = self.filtered_commands[i]
+            highlighted = i == self.highlighted_index
+            if highlighted:
                 # Highlighted item - bright colors with background
-                item = Static(
-                    f"[bold white on #5865F2] {cmd} [/]  [white]{desc}[/]",
-                    classes="command-item highlighted",
-                )
+                row.update(f"[bold white on #5865F2] {cmd} [/]  [white]{desc}[/]")
             else:
                 # Normal item
-                item = Static(
-                    f"[bold #43b581]{cmd}[/]  [#8e9297]{desc}[/]",
-                    classes="command-item",
-                )
-            container.mount(item)
+                row.update(f"[bold #43b581]{cmd}[/]  [#8e9297]{desc}[/]")
+            row.set_class(highlighted, "highlighted")
+            row.display = True
 
     def show(self):
         """Show the command palette."""
@@ -116,17 +138,7 @@ class SlashCommandPalette(Static):
 
     def filter(self, text: str):
         """Filter commands based on input text."""
-        # Remove leading slash for matching
-        search = text.lstrip("/").lower()
-
-        if not search:
-            self.filtered_commands = COMMANDS.copy()
-        else:
-            self.filtered_commands = [
-                (cmd, desc)
-                for cmd, desc in COMMANDS
-                if search in cmd.lower() or search in desc.lower()
-            ]
+        self.filtered_commands = match_commands(text)
 
         # Reset highlight if out of bounds
         if self.highlighted_index >= len(self.filtered_commands):
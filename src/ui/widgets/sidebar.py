@@ -6,6 +6,7 @@ from textual.containers import Container, Vertical
 from textual.widgets import Static, Tree
 from textual.message import Message
 
+from src.core import tracing
 from src.ui.widgets.user_colors import format_username_colored
 
 
@@ -113,6 +114,7 @@ class Sidebar(Container):
             self.bookmarked_channels.remove(channel)
             self._refresh_tree(select_channel=self.active_channel)
     
+    @tracing.traced("sidebar.refresh_tree", "ui")
     def _refresh_tree(self, select_channel: str = None, select_dm: str = None):
         """Refresh the channel tree display."""
         tree = self.query_one(Tree)
@@ -173,6 +175,7 @@ class Sidebar(Container):
         if target_line is not None:
             tree.cursor_line = target_line + 1
     
+    @tracing.traced("sidebar.mark_channel_ready", "ui")
     def mark_channel_ready(self, channel: str):
         """Mark a channel as ready (joined successfully)."""
         # This is mainly for visual feedback - could add a checkmark or color
@@ -210,6 +213,7 @@ class Sidebar(Container):
                 del self.dm_unread[nick]
             self._refresh_tree()
     
+    @tracing.traced("sidebar.increment_dm_unread", "ui")
     def increment_dm_unread(self, nick: str):
         """Increment unread count for a DM conversation."""
         if nick not in self.dm_conversations:
@@ -231,6 +235,7 @@ class Sidebar(Container):
         self.dm_unread[nick] = 0
         self._refresh_tree(select_dm=nick)
     
+    @tracing.traced("sidebar.increment_channel_unread", "ui")
     def increment_channel_unread(self, channel: str):
         """Increment unread count for a channel."""
         self.channel_unread[channel] = self.channel_unread.get(channel, 0) + 1
@@ -348,6 +353,7 @@ class MemberList(Container):
         except Exception:
             pass
     
+    @tracing.traced("members.update", "ui")
     def update_members(self, members: list[str]):
         """Update the member list with current channel members."""
         # Stop any skull animation when members load
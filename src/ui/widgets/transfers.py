@@ -0,0 +1,32 @@
+"""Transfers panel - live progress of wormhole sends and receives."""
+
+from rich.text import Text
+from textual.widgets import Static
+
+
+class TransfersPanel(Static):
+    """One line per transfer (bytes, bytes/s, ETA); hidden while there are none."""
+
+    DEFAULT_CSS = """
+    TransfersPanel {
+        height: auto;
+        max-height: 6;
+        padding: 0 1;
+        background: $surface;
+        border-top: solid $primary;
+        display: none;
+    }
+
+    TransfersPanel.visible {
+        display: block;
+    }
+    """
+
+    def show_transfers(self, transfers: list):
+        """Render transfers (objects with a summary() method), or hide when empty."""
+        if not transfers:
+            self.remove_class("visible")
+            self.update("")
+            return
+        self.update(Text("\n".join(transfer.summary() for transfer in transfers)))  # File names are not markup
+        self.add_class("visible")
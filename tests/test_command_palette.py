@@ -0,0 +1,26 @@
+"""Slash command palette matching."""
+
+import pytest
+
+pytest.importorskip("textual")
+
+from src.ui.widgets.command_palette import COMMANDS, match_commands  # noqa: E402
+
+
+def names(text):
+    return [cmd for cmd, _ in match_commands(text)]
+
+
+def test_short_query_matches_command_names_not_descriptions():
+    assert names("ai") == ["/ai"]
+    assert names("/j") == ["/join"]
+
+
+def test_description_matches_rank_after_every_name_match():
+    found = names("se")
+    assert found[:3] == ["/send", "/close", "/transfers"]  # Prefix, substring, subsequence of the name
+    assert "/join" in found[3:]  # "Join or search for a channel"
+
+
+def test_empty_query_lists_everything():
+    assert match_commands("/") == COMMANDS
@@ -0,0 +1,108 @@
+"""Path checks for the AI file tools (file_search.confine)."""
+
+import asyncio
+import os
+
+import pytest
+
+from src.core import file_search
+from src.core.file_search import PathRefused, confine
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "app.py").write_text("print('hi')\n")
+    (root / "README.md").write_text("readme\n")
+    (root / ".env").write_text("SECRET=1\n")
+    (root / ".ssh").mkdir()
+    (root / ".ssh" / "id_rsa").write_text("key\n")
+    (root / "build").mkdir()
+    (root / "build" / "out.txt").write_text("built\n")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "pkg.js").write_text("x\n")
+    (root / ".gitignore").write_text("build/\n*.log\n")
+    (root / "debug.log").write_text("log\n")
+    (tmp_path / "outside.txt").write_text("outside\n")
+    return root
+
+
+def test_paths_inside_the_tree_are_allowed(tree):
+    assert confine(str(tree), "README.md") == "README.md"
+    assert confine(str(tree), "./src/app.py") == "src/app.py"
+    assert confine(str(tree), "src/") == "src"
+    assert confine(str(tree), ".") == ""
+
+
+@pytest.mark.parametrize("path", ["/etc/passwd", "~/.bashrc", "../outside.txt", "src/../../outside.txt"])
+def test_paths_outside_the_tree_are_refused(tree, path):
+    with pytest.raises(PathRefused):
+        confine(str(tree), path)
+
+
+def test_symlink_escape_is_refused(tree):
+    os.symlink(tree.parent / "outside.txt", tree / "link.txt")
+    os.symlink(tree.parent, tree / "up")
+    with pytest.raises(PathRefused):
+        confine(str(tree), "link.txt")
+    with pytest.raises(PathRefused):
+        confine(str(tree), "up/outside.txt")
+
+
+def test_symlink_inside_the_tree_is_allowed(tree):
+    os.symlink(tree / "README.md", tree / "docs.md")
+    assert confine(str(tree), "docs.md") == "README.md"
+
+
+def test_symlink_to_a_dotfile_is_refused(tree):
+    os.symlink(tree / ".env", tree / "settings.txt")
+    with pytest.raises(PathRefused):
+        confine(str(tree), "settings.txt")
+
+
+@pytest.mark.parametrize("path", [".env", ".ssh/id_rsa", ".ssh", "src/.hidden"])
+def test_hidden_paths_are_refused(tree, path):
+    with pytest.raises(PathRefused):
+        confine(str(tree), path)
+
+
+@pytest.mark.parametrize("path", ["build/out.txt", "build", "debug.log", "node_modules/pkg.js"])
+def test_ignored_paths_are_refused(tree, path):
+    with pytest.raises(PathRefused):
+        confine(str(tree), path)
+    confine(str(tree), path, check_ignored=False)
+
+
+def test_walk_can_skip_hidden_entries(tree):
+    found = set(file_search.walk(str(tree), "*", include_hidden=False))
+    assert ".env" not in found and ".ssh/id_rsa" not in found and ".gitignore" not in found
+    assert {"README.md", "src/app.py"} <= found
+
+
+def test_file_tools_stay_inside_the_tree(tree, monkeypatch):
+    from src.core.mcp_client import MCPClient
+    monkeypatch.chdir(tree)
+    client = MCPClient(config_path=str(tree / "no-mcp.json"))
+
+    async def run():
+        return (
+            await client._read_file({"prompt": "/etc/passwd --head 3"}),
+            await client._read_file({"prompt": ".env"}),
+            await client._list_files({"prompt": "/root"}),
+            await client._list_files({"prompt": "."}),
+            await client._search_files({"prompt": "*.env* --grep SECRET"}),
+            await client._read_file({"prompt": "README.md"}),
+        )
+
+    passwd, env, root, listing, search, readme = asyncio.run(run())
+    assert "error" in passwd and "error" in env and "error" in root
+    assert ".env" not in listing["message"] and "build" not in listing["message"]
+    assert "SECRET=1" not in search.get("message", "")
+    assert "readme" in readme["message"]
+
+
+def test_file_tools_can_be_turned_off(tree):
+    from src.core.mcp_client import MCPClient
+    client = MCPClient(config_path=str(tree / "no-mcp.json"), file_tools=False)
+    assert "read-file" not in client.tools
@@ -0,0 +1,64 @@
+"""CHATHISTORY gap filling and the message store it feeds."""
+
+import pytest
+
+from src.core.message_store import MessageStore
+
+irc_client = pytest.importorskip("src.core.irc_client", exc_type=ImportError)
+
+
+class _Line:
+    def __init__(self):
+        self.sent = []
+
+    def quote(self, line, force=False):
+        self.sent.append(line)
+
+
+@pytest.fixture
+def irc(monkeypatch):
+    monkeypatch.setattr(irc_client.IRCClient, "supports_history", True)
+    client = irc_client.IRCClient("irc.example", 6667, "me")
+    client.client = _Line()
+    client.history_page_size = 3
+    client.history_max_pages = 2
+    pages = []
+    client.set_history_callback(lambda channel, messages, truncated: pages.append((messages, truncated)))
+    return client, pages
+
+
+def _page(first, count):
+    return [{"nick": "n", "text": str(i), "ts": float(i), "msgid": f"m{i}"} for i in range(first, first + count)]
+
+
+def test_gap_is_fetched_newest_first_down_to_last_seen(irc):
+    client, pages = irc
+    client.request_history("#c", {"msgid": "m0", "ts": 0.0})
+    client._finish_history_page("#c", _page(5, 3))
+    client._finish_history_page("#c", _page(3, 2))
+    assert client.client.sent == [
+        "CHATHISTORY LATEST #c msgid=m0 3",
+        "CHATHISTORY BETWEEN #c msgid=m5 msgid=m0 3",
+    ]
+    assert [truncated for _, truncated in pages] == [False, False]
+    assert "#c" not in client._history_requests
+
+
+def test_gap_longer_than_the_page_cap_is_marked_truncated(irc):
+    client, pages = irc
+    client.request_history("#c", {"msgid": "m0", "ts": 0.0})
+    client._finish_history_page("#c", _page(20, 3))
+    client._finish_history_page("#c", _page(17, 3))
+    assert len(client.client.sent) == 2
+    assert pages[-1] == (_page(17, 3), True)
+    assert "#c" not in client._history_requests
+
+
+def test_store_keeps_newest_last_when_older_backlog_arrives_later():
+    store = MessageStore(keep_recent=3, persist=False)
+    for i in (5, 6, 7):
+        store.append("#c", "n", str(i), float(i), f"m{i}")
+    store.append("#c", "n", "3", 3.0, "m3")  # Older than everything kept
+    store.append("#c", "n", "6.5", 6.5, "m6.5")
+    assert [r["text"] for r in store.recent("#c")] == ["6", "6.5", "7"]
+    assert store.last_seen("#c")["msgid"] == "m7"
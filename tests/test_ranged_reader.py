@@ -0,0 +1,28 @@
+"""MappedFile ranged reads."""
+
+import pytest
+
+from src.core.ranged_reader import MappedFile
+
+
+@pytest.fixture
+def make_file(tmp_path):
+    def make(data: bytes) -> str:
+        path = tmp_path / "log.txt"
+        path.write_bytes(data)
+        return str(path)
+    return make
+
+
+@pytest.mark.parametrize("data", [b"a\nb", b"a\nb\n"])
+@pytest.mark.parametrize("pattern", ["", "^", "$", "x*", "(foo)?"])
+def test_grep_empty_matches_report_each_line_once(make_file, data, pattern):
+    with MappedFile(make_file(data)) as f:
+        assert f.grep(pattern, 5) == [(1, "a"), (2, "b")]
+
+
+def test_grep_reports_matching_lines_with_numbers(make_file):
+    with MappedFile(make_file(b"one\ntwo\nthree")) as f:
+        assert f.grep("t", 5) == [(2, "two"), (3, "three")]
+        assert f.grep("E", 5, ignore_case=True) == [(1, "one"), (3, "three")]
+        assert f.grep("t", 1) == [(2, "two")]
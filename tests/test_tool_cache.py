@@ -0,0 +1,92 @@
+"""ToolCache in-flight sharing."""
+
+import asyncio
+
+import pytest
+
+from src.core.tool_cache import ToolCache
+
+
+def test_cancelling_the_first_caller_leaves_the_others_their_answer():
+    async def run():
+        cache = ToolCache()
+        calls = []
+
+        async def query():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"message": "ok"}
+
+        first = asyncio.create_task(cache.get_or_run("docker-health", {"prompt": "prod"}, query))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get_or_run("docker-health", {"prompt": "prod"}, query))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        results = await asyncio.gather(first, second, return_exceptions=True)
+        return results, calls, cache
+
+    (first, second), calls, cache = asyncio.run(run())
+    assert isinstance(first, asyncio.CancelledError)
+    assert second == {"message": "ok"}
+    assert calls == [1]
+    assert cache.stats()["docker-health"]["misses"] == 1
+
+
+def test_the_shared_call_is_cancelled_when_every_caller_is():
+    async def run():
+        cache = ToolCache()
+        cancelled = asyncio.Event()
+
+        async def query():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.create_task(cache.get_or_run("docker-health", {}, query)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return cache
+
+    cache = asyncio.run(run())
+    assert not cache._inflight
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    async def run():
+        cache = ToolCache()
+        calls = []
+
+        async def query():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("backend down")
+
+        results = await asyncio.gather(
+            *(cache.get_or_run("docker-health", {}, query) for _ in range(2)), return_exceptions=True
+        )
+        with pytest.raises(RuntimeError):
+            await cache.get_or_run("docker-health", {}, query)
+        return results, calls
+
+    results, calls = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert calls == [1, 1]
+
+
+def test_results_are_cached_and_copied():
+    async def run():
+        cache = ToolCache()
+
+        async def query():
+            return {"message": "ok"}
+
+        first = await cache.get_or_run("system-info", {}, query)
+        first["command"] = "system-info"
+        return await cache.get_or_run("system-info", {}, query)
+
+    assert asyncio.run(run()) == {"message": "ok"}
@@ -0,0 +1,57 @@
+"""WorkerPool against demo/stub_kiro_worker.py."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from src.core.worker_pool import WorkerError, WorkerPool
+
+STUB = [sys.executable, str(Path(__file__).resolve().parent.parent / "demo" / "stub_kiro_worker.py")]
+
+
+def test_call_fails_fast_when_no_worker_starts():
+    async def run():
+        pool = WorkerPool(["/nonexistent-kiro"], size=2, health_interval=0)
+        with pytest.raises(WorkerError):
+            await pool.start()
+        started = time.monotonic()
+        try:
+            with pytest.raises(WorkerError):
+                await pool.call("status")
+        finally:
+            await pool.close()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 1
+
+
+def test_call_gives_up_when_no_worker_comes_free():
+    async def run():
+        pool = WorkerPool(STUB + ["--startup", "0", "--latency", "2"], size=1, timeout=0.5, health_interval=0)
+        await pool.start()
+        try:
+            busy = asyncio.create_task(pool.call("slow"))
+            await asyncio.sleep(0.1)
+            with pytest.raises(WorkerError):
+                await pool.call("queued")
+            busy.cancel()
+            await asyncio.gather(busy, return_exceptions=True)
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_call_answers_on_a_warm_worker():
+    async def run():
+        pool = WorkerPool(STUB + ["--startup", "0", "--latency", "0"], size=1, health_interval=0)
+        await pool.start()
+        try:
+            return await pool.call("status")
+        finally:
+            await pool.close()
+
+    assert "stub answer" in asyncio.run(run())["message"]
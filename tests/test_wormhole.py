@@ -0,0 +1,149 @@
+"""Direct transfers over loopback: archive streams and DCC."""
+
+import asyncio
+
+import pytest
+
+from src.core.dcc import parse_ctcp
+from src.core.wormhole import TransferError, TransferManager
+
+
+@pytest.fixture
+def files(tmp_path):
+    source = tmp_path / "project"
+    (source / "sub").mkdir(parents=True)
+    (source / "a.txt").write_text("alpha\n" * 1000)
+    (source / "sub" / "b.bin").write_bytes(bytes(range(256)) * 4096)
+    out = tmp_path / "out"
+    out.mkdir()
+    return source, out
+
+
+def test_archive_stream_round_trip(files):
+    pytest.importorskip("nacl")
+    source, out = files
+
+    async def run():
+        manager = TransferManager(stream_host="127.0.0.1")
+        send = await manager.send_archive(str(source))
+        receive = await manager.receive_stream(send.code, str(out))
+        return await asyncio.wait_for(asyncio.gather(send.wait(), receive.wait()), 30), send, receive
+
+    (sent, received), send, receive = asyncio.run(run())
+    assert (sent, received) == (True, True), (send.error, receive.error)
+    assert (out / "project" / "a.txt").read_text() == "alpha\n" * 1000
+    assert (out / "project" / "sub" / "b.bin").read_bytes() == bytes(range(256)) * 4096
+
+
+def test_archive_stream_refuses_the_wrong_key(files):
+    pytest.importorskip("nacl")
+    source, out = files
+
+    async def run():
+        manager = TransferManager(stream_host="127.0.0.1")
+        send = await manager.send_archive(str(source))
+        key = send.code.rsplit("/", 1)[1]
+        forged = send.code[:-len(key)] + ("A" if key[0] != "A" else "B") + key[1:]
+        receive = await manager.receive_stream(forged, str(out))
+        ok = await asyncio.wait_for(receive.wait(), 30)
+        still_offered = send.state == "waiting"
+        manager.cancel(send.id)
+        await send.wait()
+        return ok, receive.error, still_offered
+
+    ok, error, still_offered = asyncio.run(run())
+    assert not ok and error
+    assert still_offered  # A bad attempt does not use up the code
+    assert not any(out.iterdir())
+
+
+def test_archive_stream_gives_up_without_a_receiver(files):
+    pytest.importorskip("nacl")
+    source, _ = files
+
+    async def run():
+        manager = TransferManager(stream_host="127.0.0.1", stream_timeout=0.2)
+        send = await manager.send_archive(str(source))
+        return await asyncio.wait_for(send.wait(), 10), send.error
+
+    ok, error = asyncio.run(run())
+    assert not ok and "no receiver connected" in error
+
+
+class _Peers:
+    """Two managers whose DCC requests travel as CTCP text, as over IRC."""
+
+    def __init__(self, **options):
+        self.alice = TransferManager(stream_host="127.0.0.1", send_dcc=self._to_bob, **options)
+        self.bob = TransferManager(stream_host="127.0.0.1", send_dcc=self._to_alice, **options)
+        self.codes = []
+        self.sent = []
+
+    def _deliver(self, manager, sender, request):
+        self.sent.append(request.kind)
+        request = parse_ctcp(f"\x01{request.to_ctcp()}\x01")
+        asyncio.get_running_loop().call_soon(
+            lambda: self.codes.append(manager.handle_dcc(sender, request)))
+
+    def _to_bob(self, nick, request):
+        self._deliver(self.bob, "alice", request)
+
+    def _to_alice(self, nick, request):
+        self._deliver(self.alice, "bob", request)
+
+
+async def _grab(peers, out):
+    await asyncio.sleep(0.01)
+    code = peers.codes.pop()
+    assert code and code.startswith("dcc://")
+    return await peers.bob.accept_dcc(code, str(out))
+
+
+def test_dcc_offer_is_parsed_accepted_and_received(files):
+    source, out = files
+
+    async def run():
+        peers = _Peers()
+        send = await peers.alice.offer_dcc(str(source / "sub" / "b.bin"), "bob")
+        receive = await _grab(peers, out)
+        return await asyncio.wait_for(asyncio.gather(send.wait(), receive.wait()), 30), send, receive
+
+    (sent, received), send, receive = asyncio.run(run())
+    assert (sent, received) == (True, True), (send.error, receive.error)
+    assert (out / "b.bin").read_bytes() == (source / "sub" / "b.bin").read_bytes()
+    assert not (out / "b.bin.part").exists()
+
+
+def test_dcc_resumes_a_partial_file(files):
+    source, out = files
+    data = (source / "sub" / "b.bin").read_bytes()
+    (out / "b.bin.part").write_bytes(data[:300000])
+
+    async def run():
+        peers = _Peers()
+        send = await peers.alice.offer_dcc(str(source / "sub" / "b.bin"), "bob")
+        receive = await _grab(peers, out)
+        ok = await asyncio.wait_for(asyncio.gather(send.wait(), receive.wait()), 30)
+        return ok, send, receive, peers.sent
+
+    ok, send, receive, sent = asyncio.run(run())
+    assert ok == [True, True], (send.error, receive.error)
+    assert sent == ["SEND", "RESUME", "ACCEPT"]
+    assert send._offset == 300000
+    assert (out / "b.bin").read_bytes() == data
+
+
+def test_dcc_offer_without_a_size_is_refused(tmp_path):
+    manager = TransferManager()
+    request = parse_ctcp("\x01DCC SEND notes.txt 2130706433 5000\x01")
+    assert request.size == 0
+    assert manager.handle_dcc("mallory", request) is None
+    assert not manager.dcc_offers
+
+    async def offer_empty():
+        (tmp_path / "empty").write_bytes(b"")
+        peers = _Peers()
+        with pytest.raises(TransferError, match="empty"):
+            await peers.alice.offer_dcc(str(tmp_path / "empty"), "bob")
+
+    asyncio.run(offer_empty())